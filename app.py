@@ -7,17 +7,57 @@ from config import app, db
 from models import Participant
 from flask_migrate import Migrate
 
-migrate = Migrate(app, db)
+migrate = Migrate(app, db, render_as_batch=True)
 
 # Import blueprints
 from blueprints.main import main_bp
 from blueprints.api import api_bp
 from blueprints.round2 import round2_bp
+from blueprints.admin import admin_bp
+from blueprints.metrics import metrics_bp
+from metrics import init_metrics
+from query_inspector import init_query_inspector
+from request_profiler import init_request_profiler
+from study_export import export_data_command
+from study_dataset import build_dataset_command
+from services import StudySummaryService
+from write_queue import serialized_writer
 
 # Register blueprints
 app.register_blueprint(main_bp)
 app.register_blueprint(api_bp)
 app.register_blueprint(round2_bp)
+app.register_blueprint(admin_bp)
+app.register_blueprint(metrics_bp)
+
+# Request latency and per-request query metrics
+init_metrics(app)
+# Opt-in N+1, slow-query and query-budget checks (QUERY_INSPECTION=log|strict)
+init_query_inspector(app)
+# On-demand cProfile of single requests (signed header or /admin/profiling)
+init_request_profiler(app)
+
+# CLI: flask export-data OUTPUT_DIR [--format csv|jsonl] [--table NAME]
+app.cli.add_command(export_data_command)
+# CLI: flask build-dataset OUTPUT.csv|OUTPUT.parquet
+app.cli.add_command(build_dataset_command)
+
+
+@app.cli.command('rebuild-summary')
+def rebuild_summary_command():
+    """Recompute the study summary table from the raw tables, e.g. after a repair."""
+    rows = serialized_writer.run(StudySummaryService.rebuild)
+    db.session.commit()
+    print(f"Rebuilt study summary: {rows} rows")
+
+
+@app.cli.command('refresh-summary')
+def refresh_summary_command():
+    """Bring the study summary up to date with recent changes; run it periodically, e.g. from cron."""
+    participants = serialized_writer.run(StudySummaryService.refresh)
+    db.session.commit()
+    print(f"Refreshed study summary for {participants} participants")
+
 
 # Setup Flask-Login
 login_manager = LoginManager()
@@ -0,0 +1,93 @@
+"""
+Blueprint for admin routes.
+Operational endpoints for the research team, protected by the ADMIN_TOKEN header.
+"""
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from config import db
+from dashboard import study_progress
+from db_pool import pool_status
+from request_profiler import profiling_toggle
+from services import StudySummaryService
+from study_export import EXPORT_FORMATS, EXPORT_TABLES, stream_export
+from utils import admin_required
+from watch_time_buffer import watch_time_buffer
+from write_queue import serialized_writer
+
+admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
+
+
+@admin_bp.route('/metrics/watch_time_buffer')
+@admin_required
+def watch_time_buffer_metrics():
+    """Report this worker's write-behind buffer size and flush lag."""
+    return jsonify(watch_time_buffer.stats())
+
+
+@admin_bp.route('/metrics/write_queue')
+@admin_required
+def write_queue_metrics():
+    """Report this worker's single-writer queue depth and transaction grouping."""
+    return jsonify(serialized_writer.stats())
+
+
+@admin_bp.route('/metrics/db_pool')
+@admin_required
+def db_pool_metrics():
+    """Report this worker's connection pool usage, checkout waits and exhaustion."""
+    return jsonify(pool_status(db.engine))
+
+
+@admin_bp.route('/profiling', methods=['GET', 'POST', 'DELETE'])
+@admin_required
+def profiling():
+    """
+    Show, enable or disable sampled request profiling for every worker.
+    POST {"sample_rate": 0.05, "minutes": 10, "endpoint": "api.get_videos"}; endpoint is optional.
+    """
+    if request.method == 'DELETE':
+        profiling_toggle.disable()
+        return jsonify({'enabled': False})
+
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        try:
+            sample_rate = float(data.get('sample_rate', 0.01))
+            minutes = float(data.get('minutes', 10))
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'message': 'sample_rate and minutes must be numbers'}), 400
+        if not 0 < sample_rate <= 1 or not 0 < minutes <= 24 * 60:
+            return jsonify({'success': False, 'message': 'sample_rate must be in (0, 1] and minutes in (0, 1440]'}), 400
+        settings = profiling_toggle.enable(sample_rate, minutes, data.get('endpoint'))
+        return jsonify({'enabled': True, **settings})
+
+    settings = profiling_toggle.settings()
+    return jsonify({'enabled': bool(settings), **settings})
+
+
+@admin_bp.route('/export/<table_name>')
+@admin_required
+def export_table(table_name):
+    """Stream one study table as CSV (default) or JSONL (?format=jsonl)."""
+    export_format = request.args.get('format', 'csv')
+    if table_name not in EXPORT_TABLES or export_format not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'message': 'Unknown table or format',
+                        'tables': list(EXPORT_TABLES), 'formats': list(EXPORT_FORMATS)}), 404
+    return Response(
+        stream_with_context(stream_export(table_name, export_format)),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename={table_name}.{export_format}'}
+    )
+
+
+@admin_bp.route('/summary')
+@admin_required
+def study_summary():
+    """Per group, round and category totals from the incrementally maintained summary table."""
+    return jsonify({'rows': StudySummaryService.get_rows()})
+
+
+@admin_bp.route('/dashboard')
+@admin_required
+def dashboard():
+    """Live study progress: participants per group, funnel drop-off and heartbeat rates."""
+    return jsonify(study_progress.get())
@@ -3,10 +3,12 @@ Blueprint for API routes.
 Separates API endpoints from main application routes.
 """
 from flask import Blueprint, request, jsonify
+from config import APP_CONFIG
 from utils import (participant_required, db_handler, create_json_response,
                   validate_api_request_data, parse_request_json, record_watch_time,
-                  get_videos_for_categories)
-from services import VideoInteractionService
+                  validate_watch_time_entries, record_watch_time_batch, rejected_watch_time_entries)
+from services import VideoInteractionService, PlaylistService
+from write_queue import serialized_writer
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
@@ -15,31 +17,46 @@ api_bp = Blueprint('api', __name__, url_prefix='/api')
 @participant_required
 @db_handler
 def user_interaction(participant):
-    """Handle video interaction API requests (like, dislike, star, comment)."""
-    data = request.get_json()
+    """
+    Handle video interaction API requests (like, dislike, star, comment).
+    Accepts a single action, or {"actions": [...]} with an ordered batch of actions.
+    """
+    # Parsed regardless of Content-Type: the player's unload beacon sends plain text
+    data, error_msg = parse_request_json(request)
+    if error_msg:
+        return create_json_response(False, error_msg, status_code=400)
+    
+    if isinstance(data, dict) and 'actions' in data:
+        validation_error, actions = VideoInteractionService.validate_actions(
+            data['actions'], APP_CONFIG.max_interaction_batch_size
+        )
+        if validation_error:
+            return create_json_response(False, validation_error, status_code=400)
+        
+        serialized_writer.run(VideoInteractionService.apply_actions, participant.participant_number, actions)
+        return create_json_response(True, 'Interactions recorded', data={'recorded': len(actions)})
     
     # Validate required fields
     is_valid, error_msg = validate_api_request_data(data, ['video_id', 'action'])
     if not is_valid:
         return create_json_response(False, error_msg, status_code=400)
 
-    video_id = data['video_id']
+    video_id = VideoInteractionService.known_video_id(data['video_id'])
+    if video_id is None:
+        return create_json_response(False, 'Video not found', status_code=400)
     action = data['action']
     comment_text = data.get('comment', '')
 
     try:
         # Delegate to service layer based on action type
-        if action in ['like', 'dislike']:
-            VideoInteractionService.handle_like_dislike(participant.participant_number, video_id, action)
-        
-        elif action in ['remove_like', 'remove_dislike']:
-            VideoInteractionService.handle_remove_action(participant.participant_number, video_id, action)
-        
-        elif action in ['star', 'star_remove']:
-            VideoInteractionService.handle_star_action(participant.participant_number, video_id, action)
+        if action in VideoInteractionService.REACTION_UPDATES:
+            # like, dislike, remove_like, remove_dislike, star, star_remove
+            serialized_writer.run(VideoInteractionService.apply_reaction,
+                                  participant.participant_number, video_id, action)
         
         elif action == 'comment':
-            if not VideoInteractionService.handle_comment(participant.participant_number, video_id, comment_text):
+            if not serialized_writer.run(VideoInteractionService.handle_comment,
+                                         participant.participant_number, video_id, comment_text):
                 return create_json_response(False, 'Comment text is required', status_code=400)
         
         else:
@@ -68,7 +85,10 @@ def record_watch_time_endpoint(participant):
     if not is_valid:
         return create_json_response(False, validation_error, status_code=400)
 
-    video_id = data['video_id']
+    try:
+        video_id = int(data['video_id'])  # The duration index is keyed by integer id
+    except (TypeError, ValueError):
+        return create_json_response(False, "video_id must be an integer", status_code=400)
     watch_duration = data['watch_duration']
     round_number = data['round_number']
     current_position = data.get('current_position')  # Optional parameter
@@ -85,6 +105,32 @@ def record_watch_time_endpoint(participant):
     return create_json_response(success, message, status_code=200 if success else 400)
 
 
+@api_bp.route('/record_watch_time/batch', methods=['POST'])
+@participant_required
+@db_handler
+def record_watch_time_batch_endpoint(participant):
+    """API endpoint to record a batch of queued watch-time deltas in one transaction."""
+    data, error_msg = parse_request_json(request)
+    if error_msg:
+        return create_json_response(False, error_msg, status_code=400)
+    if not isinstance(data, dict):
+        return create_json_response(False, "No data provided", status_code=400)
+
+    validation_error, entries = validate_watch_time_entries(
+        data.get('entries'), APP_CONFIG.max_watch_time_batch_size
+    )
+    if validation_error:
+        return create_json_response(False, validation_error, status_code=400,
+                                    data={'rejected': rejected_watch_time_entries(data.get('entries'))})
+
+    success, message = record_watch_time_batch(participant.participant_number, entries)
+    if not success:
+        return create_json_response(False, message, status_code=400,
+                                    data={'recorded': 0, 'rejected': rejected_watch_time_entries(entries)})
+    
+    return create_json_response(True, message, data={'recorded': len(entries)})
+
+
 @api_bp.route('/videos')
 @participant_required
 def get_videos(participant):
@@ -94,7 +140,7 @@ def get_videos(participant):
         return jsonify({'error': 'Categories parameter is required'}), 400
     
     category_names = categories.split(',')
-    videos_data = get_videos_for_categories(category_names, limit_per_category=3)
+    videos_data = PlaylistService.get_playlist_videos(participant.participant_number, 1, category_names)
     
     return jsonify({'videos': videos_data})
 
@@ -111,12 +157,7 @@ def get_videos_round2(participant):
     if len(category_names) != 3:
         return jsonify({'error': 'Exactly 3 categories are required'}), 400
 
-    videos_data = get_videos_for_categories(
-        category_names,
-        participant_number=participant.participant_number,
-        exclude_watched_round=1,
-        limit_per_category=1
-    )
+    videos_data = PlaylistService.get_playlist_videos(participant.participant_number, 2, category_names)
     
     return jsonify({'videos': videos_data})
 
@@ -133,11 +174,6 @@ def get_videos_after_info_cocoons_round2(participant):
     if len(category_names) != 3:
         return jsonify({'error': 'Exactly 3 categories are required'}), 400
 
-    videos_data = get_videos_for_categories(
-        category_names,
-        participant_number=participant.participant_number,
-        exclude_watched_round=1,
-        limit_per_category=1
-    )
+    videos_data = PlaylistService.get_playlist_videos(participant.participant_number, 2, category_names)
     
     return jsonify({'videos': videos_data})
@@ -11,6 +11,7 @@ from utils import (participant_required, db_handler, validate_category_selection
                   validate_group_number, get_categories_excluding_info, GROUP_MESSAGES)
 from services import (VideoSelectionService, ParticipantService, 
                      AdditionalInfoService, StrategyRedirectService)
+from write_queue import serialized_writer
 
 main_bp = Blueprint('main', __name__)
 
@@ -80,8 +81,7 @@ def submit_categories(participant):
 @participant_required
 def video_viewing_1(participant):
     """Display round 1 video viewing page."""
-    preferences = ParticipantService.get_participant_preferences(participant.participant_number, 1)
-    selected_categories = [pref.category.name for pref in preferences]
+    selected_categories = ParticipantService.get_selected_category_names(participant.participant_number, 1)
     return render_template('video_viewing_1.html', selected_categories=selected_categories)
 
 
@@ -161,5 +161,8 @@ def info_cocoons(participant):
 
 @main_bp.route('/end_study')
 @participant_required
+@db_handler
 def end_study(participant):
+    if participant.completed_at is None:
+        serialized_writer.run(ParticipantService.mark_completed, participant.participant_number)
     return render_template('end_study.html', participant_number=participant.participant_number)
@@ -0,0 +1,17 @@
+"""
+Blueprint for the Prometheus metrics endpoint.
+Served at /metrics for scrapers, protected by the ADMIN_TOKEN like the admin routes.
+"""
+from flask import Blueprint, Response
+from metrics import render_metrics
+from utils import admin_required
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics')
+@admin_required
+def prometheus_metrics():
+    """Latency, per-request query and worker state metrics summed across gunicorn workers."""
+    payload, content_type = render_metrics()
+    return Response(payload, content_type=content_type)
@@ -41,8 +41,7 @@ def submit_categories_round2(participant):
 @participant_required
 def video_viewing_2(participant):
     """Display round 2 video viewing page."""
-    preferences_round2 = ParticipantService.get_participant_preferences(participant.participant_number, 2)
-    selected_categories = [pref.category.name for pref in preferences_round2]
+    selected_categories = ParticipantService.get_selected_category_names(participant.participant_number, 2)
     return render_template('video_viewing_2.html', selected_categories=selected_categories)
 
 
@@ -86,6 +85,5 @@ def submit_categories_after_info_cocoons_round2(participant):
 @participant_required
 def video_viewing_after_info_cocoons_2(participant):
     """Display video viewing page after info cocoons."""
-    preferences_after_info = ParticipantService.get_participant_preferences(participant.participant_number, 2)
-    selected_categories = [pref.category.name for pref in preferences_after_info]
+    selected_categories = ParticipantService.get_selected_category_names(participant.participant_number, 2)
     return render_template('video_viewing_after_info_cocoons_2.html', selected_categories=selected_categories)
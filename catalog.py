@@ -0,0 +1,166 @@
+"""
+Per-worker video catalog caches.
+Keeps compact, immutable video records grouped by category name, and an
+id -> duration index, so the video and watch-time APIs do not have to query
+the catalog tables on every request.
+"""
+import os
+import threading
+from abc import ABC, abstractmethod
+import uuid
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from config import APP_CONFIG, db
+from db_routing import read_replica
+from query_inspector import FULL_SCAN_OPTION, budget_exempt
+from models import Video, VideoCategory
+
+
+class VideoRecord(NamedTuple):
+    """Read-only view of a catalog video with only the fields the APIs use."""
+    id: int
+    title: str
+    url: str
+    category_id: int
+    category_name: str
+
+
+def query_video_records(*criteria, session=None):
+    """
+    Column-projected query for catalog videos.
+
+    Selects only the columns in `VideoRecord` field order, so rows can be
+    turned into records without hydrating `Video`/`VideoCategory` entities or
+    touching the session identity map.
+    """
+    session = session or db.session
+    return session.query(
+        Video.id.label('id'),
+        Video.title.label('title'),
+        Video.url.label('url'),
+        VideoCategory.id.label('category_id'),
+        VideoCategory.name.label('category_name'),
+    ).join(VideoCategory, Video.category_id == VideoCategory.id).filter(*criteria)
+
+
+class VersionedCache(ABC):
+    """
+    Base for lazily loaded, process-local copies of catalog data.
+
+    The catalog only changes when the data scripts run, so every worker keeps
+    its own copy and reloads it when the shared version file changes.
+    Subclasses implement `_load()`.
+    """
+
+    def __init__(self, version_file: str):
+        self._version_file = version_file
+        self._lock = threading.Lock()
+        self._data = None
+        self._loaded_version = None
+
+    def _current_version(self):
+        """Return a cheap fingerprint of the shared version file."""
+        try:
+            stat = os.stat(self._version_file)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    @abstractmethod
+    def _load(self):
+        """Read this cache's data from the database."""
+
+    def _snapshot(self):
+        """Return the cached data, reloading it if it is missing or stale."""
+        version = self._current_version()
+        data = self._data
+        if data is not None and version == self._loaded_version:
+            return data
+
+        with self._lock:
+            if self._data is None or version != self._loaded_version:
+                with budget_exempt():
+                    self._data = self._load()
+                self._loaded_version = version
+            return self._data
+
+    def clear(self) -> None:
+        """Drop this worker's copy; the next lookup reloads from the database."""
+        with self._lock:
+            self._data = None
+            self._loaded_version = None
+
+    def invalidate(self) -> None:
+        """Drop the cached data in this and every other worker process."""
+        directory = os.path.dirname(self._version_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Replacing the file gives it a new inode, so other workers notice the
+        # change even on filesystems with coarse modification timestamps.
+        tmp_path = f"{self._version_file}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(uuid.uuid4().hex)
+        os.replace(tmp_path, self._version_file)
+        self.clear()
+
+
+class VideoCatalog(VersionedCache):
+    """
+    Lazily loaded, process-local copy of the video catalog.
+    Call `invalidate()` after modifying `Video` or `VideoCategory` rows.
+    """
+
+    def _load(self) -> Dict[str, Tuple[VideoRecord, ...]]:
+        """Read the whole catalog from the database into immutable records."""
+        grouped: Dict[str, List[VideoRecord]] = {}
+        with read_replica():
+            full_load = query_video_records().order_by(Video.id).execution_options(**{FULL_SCAN_OPTION: True})
+            for row in full_load:
+                record = VideoRecord._make(row)
+                grouped.setdefault(record.category_name, []).append(record)
+        return {name: tuple(records) for name, records in grouped.items()}
+
+    def get_videos_by_category(self, category_names: Iterable[str]) -> Dict[str, Tuple[VideoRecord, ...]]:
+        """Return the cached videos for each requested category name."""
+        catalog = self._snapshot()
+        return {name: catalog.get(name, ()) for name in category_names}
+
+
+class VideoDurationIndex(VersionedCache):
+    """
+    Compact id -> duration map covering every `Video` row, including uncategorized ones.
+
+    Stored as two parallel arrays sorted by video id and searched with bisect,
+    which costs 16 bytes per video instead of a dict of boxed integers.
+    A duration of 0 means the video exists but its duration is unknown.
+    """
+
+    def _load(self) -> Tuple[array, array]:
+        ids, durations = array('q'), array('q')
+        with read_replica():
+            full_load = (db.session.query(Video.id, Video.duration).order_by(Video.id)
+                         .execution_options(**{FULL_SCAN_OPTION: True}))
+            for video_id, duration in full_load:
+                ids.append(video_id)
+                durations.append(duration or 0)
+        return ids, durations
+
+    def get(self, video_id: int) -> Optional[int]:
+        """Return the video's duration in seconds (0 if unknown), or None if the video does not exist."""
+        ids, durations = self._snapshot()
+        position = bisect_left(ids, video_id)
+        if position < len(ids) and ids[position] == video_id:
+            return durations[position]
+        return None
+
+
+video_catalog = VideoCatalog(APP_CONFIG.catalog_version_file)
+video_durations = VideoDurationIndex(APP_CONFIG.catalog_version_file)
+
+
+def invalidate_video_catalog() -> None:
+    """Invalidate every catalog cache after the catalog tables change."""
+    video_catalog.invalidate()
+    video_durations.clear()
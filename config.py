@@ -6,15 +6,26 @@ import os
 from dataclasses import dataclass
 from typing import Optional
 
+from db_pool import InstrumentedQueuePool, size_pool
+
 
 @dataclass
 class DatabaseConfig:
     """Database configuration settings."""
     uri: str
     pool_size: int = 10
+    max_overflow: int = 10
     pool_timeout: int = 20
     pool_recycle: int = 3600
+    pool_pre_ping: bool = True  # Replace connections the server closed while idle
     echo: bool = False
+    replica_uri: Optional[str] = None  # Read-only copy for catalog and reporting reads
+    
+    # SQLite connection profile, applied to every new connection
+    sqlite_tuned: bool = True  # False keeps SQLite's defaults (rollback journal, full fsync)
+    sqlite_busy_timeout_ms: int = 5000  # Wait this long for a competing writer instead of failing
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size_kib: int = 64 * 1024
 
 
 @dataclass
@@ -29,6 +40,42 @@ class AppConfig:
     # Video settings
     info_video_duration: int = 228  # Duration for info video (ID 9999)
     max_participant_attempts: int = 100
+    catalog_version_file: str = ''  # Touched whenever the video catalog changes
+    max_watch_time_batch_size: int = 100  # Entries accepted by /api/record_watch_time/batch
+    max_interaction_batch_size: int = 100  # Actions accepted by one /api/user_interaction batch
+    
+    # Watch-time write-behind buffer
+    watch_time_write_behind: bool = False
+    watch_time_flush_interval: float = 5.0  # Seconds; bounds how much data a crash can lose
+    watch_time_buffer_max_keys: int = 500  # Flush early once this many records are pending
+    
+    # Single-writer queue (SQLite deployments)
+    serialized_writes: bool = False
+    write_queue_max_batch: int = 64  # Queued writes committed in one transaction
+    write_lock_file: str = ''  # Cross-process lock held while a worker writes
+    
+    # Query inspection: 'off', 'log' (warn about N+1s, slow queries and
+    # budget overruns) or 'strict' (also fail requests over their query budget)
+    query_inspection: str = 'off'
+    slow_query_ms: float = 100.0
+    query_repeat_threshold: int = 3  # Same statement this many times in one request is flagged
+    
+    # Request profiling (signed X-Profile-Request header or admin toggle)
+    profile_dir: str = ''
+    profiling_toggle_file: str = ''  # Shared by all workers so one toggle reaches every process
+    
+    # Incremental export stops this far behind the clock, so rows stamped just
+    # before their transaction commits are picked up next run
+    export_watermark_lag_seconds: float = 60.0
+    
+    # The summary refresh looks for changes up to this far behind the clock, for the same reason
+    summary_refresh_lag_seconds: float = 60.0
+    
+    # Study-progress dashboard: seconds each worker reuses one computation
+    dashboard_cache_ttl: float = 10.0
+    
+    # Admin endpoints are disabled unless a token is configured
+    admin_token: str = ''
     
     # Validation settings
     required_category_count: int = 3
@@ -47,16 +94,38 @@ class Config:
     def get_database_config() -> DatabaseConfig:
         """Get database configuration - simplified logic."""
         database_url = os.environ.get('DATABASE_URL')
+        # Size each worker's pool from gunicorn's workers x threads (see gunicorn.conf.py)
+        default_size, default_overflow = size_pool(
+            workers=int(os.environ.get('GUNICORN_WORKERS', 6)),
+            threads=int(os.environ.get('GUNICORN_THREADS', 4)),
+            max_connections=int(os.environ['DB_MAX_CONNECTIONS']) if os.environ.get('DB_MAX_CONNECTIONS') else None
+        )
+        pool = dict(
+            pool_size=int(os.environ.get('DB_POOL_SIZE', default_size)),
+            max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', default_overflow)),
+            pool_timeout=int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+            pool_recycle=int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+            pool_pre_ping=os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true',
+        )
+        replica_uri = Config.get_replica_uri(os.environ.get('REPLICA_DATABASE_URL'))
+        # SQL echo is chosen on its own, not implied by debug mode or the database
+        echo = os.environ.get('SQL_ECHO', 'false').lower() == 'true'
+        sqlite_profile = dict(
+            sqlite_tuned=os.environ.get('SQLITE_PROFILE', 'tuned').lower() == 'tuned',
+            sqlite_busy_timeout_ms=int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+            sqlite_mmap_size=int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+            sqlite_cache_size_kib=int(os.environ.get('SQLITE_CACHE_SIZE_KIB', 64 * 1024)),
+        )
         
         if database_url:
             # Production: Use provided DATABASE_URL (MySQL or other)
             print(f"[CONFIG] Using DATABASE_URL: {database_url[:50]}...")
             return DatabaseConfig(
                 uri=database_url,
-                pool_size=20,
-                pool_timeout=30,
-                pool_recycle=1800,
-                echo=False
+                replica_uri=replica_uri,
+                echo=echo,
+                **pool,
+                **sqlite_profile
             )
         else:
             # Development: Use SQLite fallback with absolute path
@@ -70,18 +139,56 @@ class Config:
             print(f"[CONFIG] Using SQLite at: {db_path}")
             return DatabaseConfig(
                 uri=f'sqlite:///{db_path}',
-                echo=True
+                replica_uri=replica_uri,
+                echo=echo,
+                **pool,
+                **sqlite_profile
             )
     
+    @staticmethod
+    def get_replica_uri(replica_url: Optional[str]) -> Optional[str]:
+        """Replica URL as given, except that SQLite snapshot files are opened read-only."""
+        if not replica_url:
+            return None
+        if replica_url.startswith('sqlite:///') and not replica_url.startswith('sqlite:///file:'):
+            return f"sqlite:///file:{replica_url[len('sqlite:///'):]}?mode=ro&uri=true"
+        return replica_url
+    
     @staticmethod
     def get_app_config() -> AppConfig:
         """Get application configuration."""
         is_production = os.environ.get('DATABASE_URL') is not None
+        base_dir = os.path.abspath(os.path.dirname(__file__))
         
         return AppConfig(
             secret_key=os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production'),
             debug=not is_production,
-            testing=False
+            testing=False,
+            catalog_version_file=os.environ.get(
+                'CATALOG_VERSION_FILE',
+                os.path.join(base_dir, 'instance', 'catalog.version')
+            ),
+            watch_time_write_behind=os.environ.get('WATCH_TIME_WRITE_BEHIND', 'false').lower() == 'true',
+            watch_time_flush_interval=float(os.environ.get('WATCH_TIME_FLUSH_INTERVAL', 5.0)),
+            watch_time_buffer_max_keys=int(os.environ.get('WATCH_TIME_BUFFER_MAX_KEYS', 500)),
+            serialized_writes=os.environ.get('SERIALIZED_WRITES', 'false').lower() == 'true',
+            write_queue_max_batch=int(os.environ.get('WRITE_QUEUE_MAX_BATCH', 64)),
+            write_lock_file=os.environ.get(
+                'WRITE_LOCK_FILE',
+                os.path.join(base_dir, 'instance', 'write.lock')
+            ),
+            query_inspection=os.environ.get('QUERY_INSPECTION', 'off').lower(),
+            slow_query_ms=float(os.environ.get('SLOW_QUERY_MS', 100.0)),
+            query_repeat_threshold=int(os.environ.get('QUERY_REPEAT_THRESHOLD', 3)),
+            profile_dir=os.environ.get('PROFILE_DIR', os.path.join(base_dir, 'instance', 'profiles')),
+            profiling_toggle_file=os.environ.get(
+                'PROFILING_TOGGLE_FILE',
+                os.path.join(base_dir, 'instance', 'profiling.json')
+            ),
+            export_watermark_lag_seconds=float(os.environ.get('EXPORT_WATERMARK_LAG_SECONDS', 60.0)),
+            summary_refresh_lag_seconds=float(os.environ.get('SUMMARY_REFRESH_LAG_SECONDS', 60.0)),
+            dashboard_cache_ttl=float(os.environ.get('DASHBOARD_CACHE_TTL', 10.0)),
+            admin_token=os.environ.get('ADMIN_TOKEN', '')
         )
 
 
@@ -90,28 +197,68 @@ APP_CONFIG = Config.get_app_config()
 DB_CONFIG = Config.get_database_config()
 
 # Flask application setup
+import sqlite3
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from db_routing import REPLICA_BIND, RoutingSession
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = APP_CONFIG.secret_key
 app.config['SQLALCHEMY_DATABASE_URI'] = DB_CONFIG.uri
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+if DB_CONFIG.replica_uri:
+    app.config['SQLALCHEMY_BINDS'] = {REPLICA_BIND: DB_CONFIG.replica_uri}
+    print("[CONFIG] Read replica configured for catalog and reporting reads")
 
-# Set connection pooling options based on database type
-if DB_CONFIG.uri.startswith(('mysql://', 'mysql+pymysql://')):
+# Set connection pooling options for every backend except in-memory SQLite,
+# which keeps one connection per thread and cannot be pooled
+if DB_CONFIG.uri in ('sqlite://', 'sqlite:///:memory:'):
     app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-        'pool_size': DB_CONFIG.pool_size,
-        'pool_timeout': DB_CONFIG.pool_timeout,
-        'pool_recycle': DB_CONFIG.pool_recycle,
         'echo': DB_CONFIG.echo
     }
-    print("[CONFIG] MySQL connection pooling enabled")
+    print("[CONFIG] Using in-memory SQLite (no connection pooling)")
 else:
     app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': DB_CONFIG.pool_size,
+        'max_overflow': DB_CONFIG.max_overflow,
+        'pool_timeout': DB_CONFIG.pool_timeout,
+        'pool_recycle': DB_CONFIG.pool_recycle,
+        'pool_pre_ping': DB_CONFIG.pool_pre_ping,
         'echo': DB_CONFIG.echo
     }
-    print("[CONFIG] Using SQLite (no connection pooling)")
+    print(f"[CONFIG] Connection pool: size {DB_CONFIG.pool_size}, overflow {DB_CONFIG.max_overflow}, "
+          f"timeout {DB_CONFIG.pool_timeout}s")
+    if DB_CONFIG.uri.startswith('sqlite:'):
+        print(f"[CONFIG] Using SQLite ({'tuned' if DB_CONFIG.sqlite_tuned else 'default'} profile)")
+
+
+@event.listens_for(Engine, 'connect')
+def _apply_sqlite_profile(dbapi_connection, connection_record):
+    """
+    Tune each new SQLite connection for several gunicorn workers sharing one file.
+    WAL lets readers run alongside the single writer, and busy_timeout makes a
+    blocked writer wait for the lock instead of failing with "database is locked".
+    """
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.execute(f'PRAGMA busy_timeout={DB_CONFIG.sqlite_busy_timeout_ms:d}')
+        if DB_CONFIG.sqlite_tuned:
+            try:
+                cursor.execute('PRAGMA journal_mode=WAL')
+            except sqlite3.OperationalError:
+                pass  # Read-only replica snapshots keep the journal mode they were written with
+            cursor.execute('PRAGMA synchronous=NORMAL')  # Durable in WAL mode except on power loss
+            cursor.execute(f'PRAGMA mmap_size={DB_CONFIG.sqlite_mmap_size:d}')
+            cursor.execute(f'PRAGMA cache_size=-{DB_CONFIG.sqlite_cache_size_kib:d}')
+            cursor.execute('PRAGMA temp_store=MEMORY')
+    finally:
+        cursor.close()
 
 # Database instance
-db = SQLAlchemy(app)
\ No newline at end of file
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
\ No newline at end of file
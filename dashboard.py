@@ -0,0 +1,132 @@
+"""
+Live study-progress dashboard for enrollment waves.
+
+Stage counts come from the study summary's participant rows and heartbeats
+from one range query on watch time, run on the read replica when one is
+configured. Each worker keeps the result for
+DASHBOARD_CACHE_TTL seconds and refreshes it with a single computation:
+while one request recomputes, concurrent requests get the previous result
+instead of running the same queries again.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import case, func
+
+from config import APP_CONFIG, db
+from db_routing import read_replica
+from models import StudySummary, WatchingTime
+
+GROUPS = range(APP_CONFIG.min_group_number, APP_CONFIG.max_group_number + 1)
+FUNNEL_STAGES = ['enrolled', 'video_viewing_1', 'additional_information', 'round_2', 'end_study']
+
+
+class SingleFlightCache:
+    """
+    Process-local cache of one computed value with a time-to-live.
+
+    Only one thread computes at a time. Once a value exists, threads that find
+    it stale while another thread is refreshing it return the stale value
+    rather than waiting.
+    """
+
+    def __init__(self, compute: Callable[[], Any], ttl: float):
+        self._compute = compute
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._value = None
+        self._expires = 0.0
+        self.computations = 0
+
+    def get(self) -> Any:
+        value = self._value
+        if value is not None and time.monotonic() < self._expires:
+            return value
+        if not self._lock.acquire(blocking=value is None):
+            return value  # Someone else is refreshing it
+        try:
+            if self._value is None or time.monotonic() >= self._expires:
+                self._value = self._compute()
+                self._expires = time.monotonic() + self.ttl
+                self.computations += 1
+            return self._value
+        finally:
+            self._lock.release()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._value = None
+            self._expires = 0.0
+
+
+def _funnel(counts: Dict[str, int]) -> list:
+    """Stage counts with the share of the previous stage that made it through."""
+    funnel = []
+    previous = None
+    for stage in FUNNEL_STAGES:
+        count = counts.get(stage, 0)
+        funnel.append({
+            'stage': stage,
+            'participants': count,
+            'from_previous': round(count / previous, 3) if previous else None,
+        })
+        previous = count
+    return funnel
+
+
+def compute_study_progress(now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Participants per group, the study funnel overall and per group, and
+    heartbeat activity.
+
+    Stages are the participant counts of the study summary's category-0
+    rows (see `SummaryTotals`), so they trail the raw tables by up to one
+    `flask refresh-summary` interval. Heartbeats are watch-time rows
+    updated in the last one and five minutes.
+    """
+    now = now or datetime.utcnow()
+    with read_replica():
+        rounds = {
+            (row.group_number, row.round_number): row
+            for row in StudySummary.query.filter(StudySummary.category_id == 0)
+        }
+
+        last_minute = WatchingTime.updated_at >= now - timedelta(minutes=1)
+        updated_5m, updated_1m, viewers_1m = db.session.query(
+            func.count(),
+            func.sum(case((last_minute, 1), else_=0)),
+            func.count(func.distinct(case((last_minute, WatchingTime.participant_number)))),
+        ).filter(WatchingTime.updated_at >= now - timedelta(minutes=5)).one()
+
+    groups = {}
+    totals = dict.fromkeys(FUNNEL_STAGES, 0)
+    for group_number in GROUPS:
+        enrolled, round_1, round_2 = (rounds.get((group_number, round_number)) for round_number in range(3))
+        counts = {
+            'enrolled': enrolled.participants if enrolled else 0,
+            'video_viewing_1': round_1.participants if round_1 else 0,
+            'additional_information': round_1.participants_completed if round_1 else 0,
+            'round_2': round_2.participants if round_2 else 0,
+            'end_study': round_2.participants_completed if round_2 else 0,
+        }
+        for stage, count in counts.items():
+            totals[stage] += count
+        groups[str(group_number)] = {'participants': counts['enrolled'], 'funnel': _funnel(counts)}
+
+    return {
+        'generated_at': now.isoformat(),
+        'cache_ttl_seconds': APP_CONFIG.dashboard_cache_ttl,
+        'participants': totals['enrolled'],
+        'funnel': _funnel(totals),
+        'groups': groups,
+        'heartbeats': {
+            'watch_rows_updated_last_minute': int(updated_1m or 0),
+            'watch_rows_updated_per_minute_5m': round(updated_5m / 5, 1),
+            'active_participants_last_minute': viewers_1m,
+        },
+    }
+
+
+study_progress = SingleFlightCache(compute_study_progress, APP_CONFIG.dashboard_cache_ttl)
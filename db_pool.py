@@ -0,0 +1,114 @@
+"""
+Connection pool sizing and checkout metrics.
+Sizes each worker's pool from the gunicorn worker and thread counts, and
+records how long requests wait for a connection and how often the pool runs dry.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+# Threads besides the request threads that hold connections: the
+# write-behind flusher and the serialized writer
+BACKGROUND_THREADS = 2
+
+# Upper bounds (seconds) of the checkout wait histogram
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+def size_pool(workers: int, threads: int, max_connections: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Return (pool_size, max_overflow) for one worker process.
+
+    Each worker keeps a connection for every request thread plus its
+    background threads. Overflow absorbs short bursts; when the database caps
+    connections, `max_connections` is shared across all workers.
+    """
+    pool_size = max(1, threads + BACKGROUND_THREADS)
+    if max_connections is None:
+        return pool_size, threads
+    per_worker = max(1, max_connections // max(1, workers))
+    pool_size = min(pool_size, per_worker)
+    return pool_size, per_worker - pool_size
+
+
+class PoolStats:
+    """Thread-safe checkout counters shared by every instrumented pool in the process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.exhausted = 0  # Checkouts that found every connection in use
+            self.timeouts = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+            self.wait_buckets = [0] * (len(WAIT_BUCKETS) + 1)  # Last bucket is +Inf
+
+    def record(self, waited: float, exhausted: bool, timed_out: bool) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            if exhausted:
+                self.exhausted += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            for index, bound in enumerate(WAIT_BUCKETS):
+                if waited <= bound:
+                    self.wait_buckets[index] += 1
+                    break
+            else:
+                self.wait_buckets[-1] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                'checkouts': self.checkouts,
+                'exhausted': self.exhausted,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': self.wait_seconds_total,
+                'wait_seconds_avg': self.wait_seconds_total / attempts if attempts else 0.0,
+                'wait_seconds_max': self.wait_seconds_max,
+                'wait_buckets': dict(zip([str(b) for b in WAIT_BUCKETS] + ['+Inf'], self.wait_buckets)),
+            }
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times every checkout and counts exhaustion and timeouts."""
+
+    def _do_get(self):
+        exhausted = self._max_overflow > -1 and self.checkedout() >= self.size() + self._max_overflow
+        started = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.record(time.perf_counter() - started, exhausted, timed_out=True)
+            raise
+        pool_stats.record(time.perf_counter() - started, exhausted, timed_out=False)
+        return entry
+
+
+def pool_status(engine) -> Dict[str, Any]:
+    """Checkout metrics plus the current state of the engine's pool."""
+    status = pool_stats.snapshot()
+    pool = engine.pool
+    if isinstance(pool, QueuePool):
+        status.update({
+            'pool_size': pool.size(),
+            'max_overflow': pool._max_overflow,
+            'checked_out': pool.checkedout(),
+            'idle': pool.checkedin(),
+            'overflow': max(0, pool.overflow()),
+        })
+    return status
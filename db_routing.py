@@ -0,0 +1,42 @@
+"""
+Read/write routing between the primary database and a read replica.
+Code inside `read_replica()` sends its queries to the 'replica' bind when one
+is configured; flushes and INSERT/UPDATE/DELETE statements always go to the
+primary, and without a replica everything stays on the primary.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND = 'replica'
+
+_use_replica: ContextVar[bool] = ContextVar('use_replica', default=False)
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that honours `read_replica()`."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and _use_replica.get() and not self._flushing and not isinstance(clause, UpdateBase):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@contextmanager
+def read_replica():
+    """
+    Route the enclosed read-only queries to the replica.
+
+    Only use it for data that tolerates replication lag, such as the video
+    catalog and reports; participant-facing reads that must see the
+    participant's own writes stay on the primary.
+    """
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
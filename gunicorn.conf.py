@@ -0,0 +1,26 @@
+# gunicorn.conf.py
+"""
+Gunicorn settings. Worker and thread counts come from the environment so
+config.py can size each worker's database pool from the same values.
+"""
+import os
+import shutil
+
+workers = int(os.environ.get('GUNICORN_WORKERS', 6))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+
+# Workers write their Prometheus samples here so /metrics can sum them
+prometheus_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus_multiproc')
+
+
+def on_starting(server):
+    """Start every deployment with empty metrics."""
+    shutil.rmtree(prometheus_dir, ignore_errors=True)
+    os.makedirs(prometheus_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of a worker that exited (counters and histograms are kept)."""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,145 @@
+"""
+Prometheus metrics for request latency and per-request database work.
+
+Request hooks time every request by endpoint, and SQLAlchemy cursor events
+count the queries and database time each request spends. Under gunicorn,
+gunicorn.conf.py sets PROMETHEUS_MULTIPROC_DIR so every worker writes its
+samples to a shared directory and `/metrics` reports the sum across workers.
+"""
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+from flask import g, has_request_context, request
+from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency by endpoint',
+    ['endpoint', 'method', 'status']
+)
+REQUEST_QUERIES = Histogram(
+    'db_queries_per_request', 'SQL statements issued while handling one request',
+    ['endpoint'], buckets=QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_TIME = Histogram(
+    'db_time_per_request_seconds', 'Time spent executing SQL while handling one request',
+    ['endpoint']
+)
+
+# Per-worker state, refreshed at most once per REFRESH_INTERVAL seconds
+REFRESH_INTERVAL = 1.0
+WATCH_TIME_BUFFERED = Gauge(
+    'watch_time_buffer_keys', 'Watch-time records waiting in write-behind buffers',
+    multiprocess_mode='livesum'
+)
+WATCH_TIME_FLUSH_LAG = Gauge(
+    'watch_time_buffer_flush_lag_seconds', 'Age of the oldest buffered watch-time delta',
+    multiprocess_mode='livemax'
+)
+WRITE_QUEUE_DEPTH = Gauge(
+    'write_queue_depth', 'Writes waiting for the serialized writer', multiprocess_mode='livesum'
+)
+POOL_CHECKED_OUT = Gauge(
+    'db_pool_checked_out', 'Connections currently checked out of the pool', multiprocess_mode='livesum'
+)
+POOL_CHECKOUTS = Counter('db_pool_checkouts', 'Connection checkouts')
+POOL_EXHAUSTED = Counter('db_pool_exhausted', 'Checkouts that found every pooled connection in use')
+POOL_TIMEOUTS = Counter('db_pool_timeouts', 'Checkouts that gave up waiting for a connection')
+POOL_WAIT = Counter('db_pool_wait_seconds', 'Time spent waiting for a pooled connection')
+
+_refresh_lock = threading.Lock()
+_last_refresh = 0.0
+_last_pool_totals: Dict[str, float] = {}
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_started'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('query_started', None)
+    # Only statements issued by a request thread are charged to that request;
+    # background flushes and the serialized writer run outside any request.
+    if started is not None and has_request_context() and 'db_queries' in g:
+        g.db_queries += 1
+        g.db_time += time.perf_counter() - started
+
+
+def _start_timer():
+    g.request_started = time.perf_counter()
+    g.db_queries = 0
+    g.db_time = 0.0
+
+
+def _record_request(response):
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    # Unmatched URLs share one label so scanners cannot blow up the label set
+    endpoint = request.endpoint or 'unmatched'
+    REQUEST_LATENCY.labels(endpoint, request.method, str(response.status_code)).observe(
+        time.perf_counter() - started
+    )
+    REQUEST_QUERIES.labels(endpoint).observe(g.db_queries)
+    REQUEST_DB_TIME.labels(endpoint).observe(g.db_time)
+    refresh_process_metrics()
+    return response
+
+
+def refresh_process_metrics(force: bool = False) -> None:
+    """Copy this worker's buffer, write queue and pool state into the shared metrics."""
+    global _last_refresh
+    now = time.monotonic()
+    if not force and now - _last_refresh < REFRESH_INTERVAL:
+        return
+    if not _refresh_lock.acquire(blocking=False):
+        return
+    try:
+        _last_refresh = now
+        from config import db
+        from db_pool import pool_status
+        from watch_time_buffer import watch_time_buffer
+        from write_queue import serialized_writer
+
+        buffer = watch_time_buffer.stats()
+        WATCH_TIME_BUFFERED.set(buffer['buffered_keys'])
+        WATCH_TIME_FLUSH_LAG.set(buffer['flush_lag_seconds'])
+        WRITE_QUEUE_DEPTH.set(serialized_writer.stats()['queued_writes'])
+
+        pool = pool_status(db.engine)
+        POOL_CHECKED_OUT.set(pool.get('checked_out', 0))
+        # The pool keeps running totals; counters only take the increase since the last refresh
+        for counter, key in ((POOL_CHECKOUTS, 'checkouts'), (POOL_EXHAUSTED, 'exhausted'),
+                             (POOL_TIMEOUTS, 'timeouts'), (POOL_WAIT, 'wait_seconds_total')):
+            delta = pool[key] - _last_pool_totals.get(key, 0)
+            if delta > 0:
+                counter.inc(delta)
+            _last_pool_totals[key] = pool[key]
+    finally:
+        _refresh_lock.release()
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Prometheus exposition of every worker's metrics (or this process's outside gunicorn)."""
+    refresh_process_metrics(force=True)
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    from prometheus_client import REGISTRY
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def init_metrics(flask_app) -> None:
+    """Install the request hooks on the app and the query hooks on every engine."""
+    flask_app.before_request(_start_timer)
+    flask_app.after_request(_record_request)
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
@@ -0,0 +1,47 @@
+"""Seed info video
+
+SQLite connections now enforce foreign keys, so watch time for the info
+cocoons video (ID 9999) needs its video row. Adds the row that
+scripts/data/load_videos.py creates, on databases that do not have it yet.
+
+Revision ID: 724be5b10c1e
+Revises: 9d3ad0819390
+Create Date: 2026-10-18 11:16:15.796146
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '724be5b10c1e'
+down_revision = '9d3ad0819390'
+branch_labels = None
+depends_on = None
+
+INFO_VIDEO_ID = 9999
+
+
+def upgrade():
+    bind = op.get_bind()
+    video = sa.table(
+        'video',
+        sa.column('id', sa.Integer), sa.column('title', sa.String), sa.column('url', sa.String),
+        sa.column('duration', sa.Integer), sa.column('tags', sa.String),
+        sa.column('likes', sa.String), sa.column('forwards', sa.String),
+    )
+    if bind.execute(sa.select(video.c.id).where(video.c.id == INFO_VIDEO_ID)).first() is None:
+        op.bulk_insert(video, [{
+            'id': INFO_VIDEO_ID,
+            'title': '信息茧房介绍视频',
+            'url': 'https://www.douyin.com/video/7277534527801576704',
+            'duration': 228,
+            'tags': 'info,education',
+            'likes': '0',
+            'forwards': '0',
+        }])
+
+
+def downgrade():
+    # The row may predate this revision (loaded by the data scripts), so it is kept
+    pass
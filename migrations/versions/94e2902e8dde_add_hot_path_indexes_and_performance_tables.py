@@ -0,0 +1,151 @@
+"""Add hot-path indexes and performance tables
+
+Adds the composite/unique indexes used by the hot query paths in utils.py and
+services.py, the playlist, participant-number sequence and reaction-state
+tables, and the unique (participant, round, video) key on watching_time.
+Duplicate watching_time rows are merged and current reactions are backfilled
+from video_interaction before the constraints are created.
+
+Revision ID: 94e2902e8dde
+Revises: 8a6dc0988b79
+Create Date: 2026-10-18 10:30:22.503701
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime
+
+
+# revision identifiers, used by Alembic.
+revision = '94e2902e8dde'
+down_revision = '8a6dc0988b79'
+branch_labels = None
+depends_on = None
+
+
+def _merge_duplicate_watching_time():
+    """Fold duplicate (participant, round, video) rows into the oldest one."""
+    bind = op.get_bind()
+    watching_time = sa.table(
+        'watching_time',
+        sa.column('id', sa.Integer), sa.column('participant_number', sa.String),
+        sa.column('round_number', sa.Integer), sa.column('video_id', sa.Integer),
+        sa.column('time_spent', sa.Float), sa.column('percentage_watched', sa.Float),
+    )
+    key = [watching_time.c.participant_number, watching_time.c.round_number, watching_time.c.video_id]
+    duplicates = bind.execute(
+        sa.select(*key, sa.func.min(watching_time.c.id), sa.func.sum(watching_time.c.time_spent),
+                  sa.func.max(watching_time.c.percentage_watched))
+        .group_by(*key).having(sa.func.count() > 1)
+    ).all()
+    for participant_number, round_number, video_id, keep_id, total, percentage in duplicates:
+        bind.execute(watching_time.update().where(watching_time.c.id == keep_id)
+                     .values(time_spent=total, percentage_watched=percentage))
+        bind.execute(watching_time.delete().where(
+            watching_time.c.participant_number == participant_number,
+            watching_time.c.round_number == round_number,
+            watching_time.c.video_id == video_id,
+            watching_time.c.id != keep_id
+        ))
+
+
+def _backfill_video_reaction(video_reaction):
+    """Derive current reaction state from video_interaction, which used to store only current actions."""
+    bind = op.get_bind()
+    interaction = sa.table(
+        'video_interaction',
+        sa.column('participant_number', sa.String), sa.column('video_id', sa.Integer),
+        sa.column('action', sa.String), sa.column('timestamp', sa.DateTime),
+    )
+
+    def has(action):
+        return sa.func.max(sa.case((interaction.c.action == action, 1), else_=0))
+
+    rows = bind.execute(
+        sa.select(interaction.c.participant_number, interaction.c.video_id,
+                  has('like'), has('dislike'), has('star'), sa.func.max(interaction.c.timestamp))
+        .where(interaction.c.action.in_(['like', 'dislike', 'star']))
+        .group_by(interaction.c.participant_number, interaction.c.video_id)
+    ).all()
+    if rows:
+        op.bulk_insert(video_reaction, [{
+            'participant_number': participant_number,
+            'video_id': video_id,
+            'liked': bool(liked),
+            'disliked': bool(disliked),
+            'starred': bool(starred),
+            'updated_at': updated_at or datetime.utcnow(),
+        } for participant_number, video_id, liked, disliked, starred, updated_at in rows])
+
+
+def upgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_table('participant_number_sequence',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('next_index', sa.Integer(), nullable=False),
+    sa.Column('check_existing', sa.Boolean(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('playlist_entry',
+    sa.Column('participant_number', sa.String(length=50), nullable=False),
+    sa.Column('round_number', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('video_id', sa.Integer(), nullable=False),
+    sa.Column('category_name', sa.String(length=100), nullable=False),
+    sa.ForeignKeyConstraint(['participant_number'], ['participant.participant_number'], ),
+    sa.ForeignKeyConstraint(['video_id'], ['video.id'], ),
+    sa.PrimaryKeyConstraint('participant_number', 'round_number', 'position')
+    )
+    video_reaction = op.create_table('video_reaction',
+    sa.Column('participant_number', sa.String(length=50), nullable=False),
+    sa.Column('video_id', sa.Integer(), nullable=False),
+    sa.Column('liked', sa.Boolean(), nullable=False),
+    sa.Column('disliked', sa.Boolean(), nullable=False),
+    sa.Column('starred', sa.Boolean(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['participant_number'], ['participant.participant_number'], ),
+    sa.ForeignKeyConstraint(['video_id'], ['video.id'], ),
+    sa.PrimaryKeyConstraint('participant_number', 'video_id')
+    )
+    _backfill_video_reaction(video_reaction)
+
+    with op.batch_alter_table('preference', schema=None) as batch_op:
+        batch_op.create_index('ix_preference_participant_round', ['participant_number', 'round_number'], unique=False)
+
+    with op.batch_alter_table('video', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_video_category_id'), ['category_id'], unique=False)
+
+    with op.batch_alter_table('video_category', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_video_category_name'), ['name'], unique=True)
+
+    with op.batch_alter_table('video_interaction', schema=None) as batch_op:
+        batch_op.create_index('ix_video_interaction_participant_video_action', ['participant_number', 'video_id', 'action'], unique=False)
+
+    _merge_duplicate_watching_time()
+    with op.batch_alter_table('watching_time', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_watching_time_participant_round_video', ['participant_number', 'round_number', 'video_id'])
+
+    # ### end Alembic commands ###
+
+
+def downgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('watching_time', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_watching_time_participant_round_video', type_='unique')
+
+    with op.batch_alter_table('video_interaction', schema=None) as batch_op:
+        batch_op.drop_index('ix_video_interaction_participant_video_action')
+
+    with op.batch_alter_table('video_category', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_video_category_name'))
+
+    with op.batch_alter_table('video', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_video_category_id'))
+
+    with op.batch_alter_table('preference', schema=None) as batch_op:
+        batch_op.drop_index('ix_preference_participant_round')
+
+    op.drop_table('video_reaction')
+    op.drop_table('playlist_entry')
+    op.drop_table('participant_number_sequence')
+    # ### end Alembic commands ###
@@ -0,0 +1,54 @@
+"""Add export watermarks and change tracking
+
+Adds watching_time.updated_at (backfilled from timestamp), indexes on the
+columns the incremental export filters on, and the export_watermark table.
+
+Revision ID: 9d724d7f327c
+Revises: 94e2902e8dde
+Create Date: 2026-10-18 14:05:41.318210
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d724d7f327c'
+down_revision = '94e2902e8dde'
+branch_labels = None
+depends_on = None
+
+TIMESTAMP_TABLES = ['participant', 'coping_strategy', 'video_interaction', 'message_time', 'consistency_answer']
+
+
+def upgrade():
+    op.create_table('export_watermark',
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('exported_until', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+
+    with op.batch_alter_table('watching_time', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+    watching_time = sa.table('watching_time', sa.column('timestamp', sa.DateTime),
+                             sa.column('updated_at', sa.DateTime))
+    op.execute(watching_time.update().values(updated_at=watching_time.c.timestamp))
+    with op.batch_alter_table('watching_time', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_watching_time_updated_at'), ['updated_at'], unique=False)
+
+    for table_name in TIMESTAMP_TABLES:
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.create_index(batch_op.f(f'ix_{table_name}_timestamp'), ['timestamp'], unique=False)
+
+
+def downgrade():
+    for table_name in reversed(TIMESTAMP_TABLES):
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.drop_index(batch_op.f(f'ix_{table_name}_timestamp'))
+
+    with op.batch_alter_table('watching_time', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_watching_time_updated_at'))
+        batch_op.drop_column('updated_at')
+
+    op.drop_table('export_watermark')
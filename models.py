@@ -11,7 +11,9 @@ import uuid
 class Participant(UserMixin, db.Model):
     participant_number = db.Column(db.String(5), primary_key=True, default=lambda: '00000')
     group_number = db.Column(db.Integer, nullable=False)  # Assigned group (1-7)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    completed_at = db.Column(db.DateTime, nullable=True)  # First visit to the end_study page
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     # Relationships
     preferences = db.relationship('Preference', backref='participant', lazy=True)
     interactions = db.relationship('VideoInteraction', backref='participant', lazy=True)
@@ -23,16 +25,23 @@ class Participant(UserMixin, db.Model):
     def get_id(self):
         return self.participant_number
 
+class ParticipantNumberSequence(db.Model):
+    """Single-row counter that participant numbers are allocated from."""
+    id = db.Column(db.Integer, primary_key=True)
+    next_index = db.Column(db.Integer, nullable=False, default=0)
+    # Set when participants with randomly generated numbers already existed at seeding time
+    check_existing = db.Column(db.Boolean, nullable=False, default=False)
+
 class VideoCategory(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, unique=True, index=True)
     name_cn = db.Column(db.String(100), nullable=True)
     # Relationships
     videos = db.relationship('Video', backref='category', lazy=True)
 
 class Video(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    category_id = db.Column(db.Integer, db.ForeignKey('video_category.id'), nullable=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('video_category.id'), nullable=True, index=True)
     title = db.Column(db.String(200), nullable=False)
     url = db.Column(db.String(500), nullable=False)
     duration = db.Column(db.Integer)
@@ -41,11 +50,15 @@ class Video(db.Model):
     forwards = db.Column(db.String(50))
 
 class Preference(db.Model):
+    __table_args__ = (
+        db.Index('ix_preference_participant_round', 'participant_number', 'round_number'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     participant_number = db.Column(db.String(50), db.ForeignKey('participant.participant_number'), nullable=False)
     round_number = db.Column(db.Integer, nullable=False)  # 1 or 2
     category_id = db.Column(db.Integer, db.ForeignKey('video_category.id'), nullable=False)
     rating = db.Column(db.Integer, nullable=False)  # Rating from 1 to 10
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     # Relationships
     category = db.relationship('VideoCategory')
 
@@ -53,24 +66,42 @@ class CopingStrategy(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     participant_number = db.Column(db.String(50), db.ForeignKey('participant.participant_number'), nullable=False)
     strategy = db.Column(db.String(50), nullable=False)  # Options: 'watch_other', 'learn_more', 'avoidance'
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
 class VideoInteraction(db.Model):
+    __table_args__ = (
+        db.Index('ix_video_interaction_participant_video_action', 'participant_number', 'video_id', 'action'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     participant_number = db.Column(db.String(50), db.ForeignKey('participant.participant_number'), nullable=False)
     video_id = db.Column(db.Integer, db.ForeignKey('video.id'), nullable=False)
     action = db.Column(db.String(50), nullable=False)  # 'like', 'dislike', 'collect', 'comment'
     content = db.Column(db.String(1024), nullable=True)  # For comments
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class VideoReaction(db.Model):
+    """Current reaction state of a participant for one video; VideoInteraction keeps the history."""
+    participant_number = db.Column(db.String(50), db.ForeignKey('participant.participant_number'), primary_key=True)
+    video_id = db.Column(db.Integer, db.ForeignKey('video.id'), primary_key=True)
+    liked = db.Column(db.Boolean, nullable=False, default=False)
+    disliked = db.Column(db.Boolean, nullable=False, default=False)
+    starred = db.Column(db.Boolean, nullable=False, default=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
 class MessageTime(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    participant_number = db.Column(db.String(50), db.ForeignKey('participant.participant_number'), nullable=False)
+    participant_number = db.Column(db.String(50), db.ForeignKey('participant.participant_number'),
+                                   nullable=False, index=True)
     time_spent = db.Column(db.Float, nullable=False)  # Time in seconds
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
 
 class WatchingTime(db.Model):
+    __table_args__ = (
+        # Column order also serves lookups by participant and round alone
+        db.UniqueConstraint('participant_number', 'round_number', 'video_id',
+                            name='uq_watching_time_participant_round_video'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     participant_number = db.Column(db.String(50), db.ForeignKey('participant.participant_number'), nullable=False)
     video_id = db.Column(db.Integer, db.ForeignKey('video.id'), nullable=False)  # Changed from round_number
@@ -78,17 +109,71 @@ class WatchingTime(db.Model):
     time_spent = db.Column(db.Float, nullable=False)  # Time in seconds
     percentage_watched = db.Column(db.Float, nullable=True)  # Percentage of video watched (0-100)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    # Set by every upsert, so the incremental export picks up rows that keep growing
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+class PlaylistEntry(db.Model):
+    """One video of a participant's pre-drawn playlist for a viewing round."""
+    participant_number = db.Column(db.String(50), db.ForeignKey('participant.participant_number'), primary_key=True)
+    round_number = db.Column(db.Integer, primary_key=True)  # 1 or 2
+    position = db.Column(db.Integer, primary_key=True)  # Display order within the round
+    video_id = db.Column(db.Integer, db.ForeignKey('video.id'), nullable=False)
+    category_name = db.Column(db.String(100), nullable=False)
 
 class ConsistencyAnswer(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     participant_number = db.Column(db.String(50), db.ForeignKey('participant.participant_number'), nullable=False)
     question_number = db.Column(db.Integer, nullable=False)  # To identify which question (1 or 2)
     answer = db.Column(db.Integer, nullable=False)  # Rating from 0 to 10
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
-
-
-
-
-
-
-
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+class ExportWatermark(db.Model):
+    """How far an incremental job has got: the export of one table, or the study summary refresh."""
+    table_name = db.Column(db.String(64), primary_key=True)
+    exported_until = db.Column(db.DateTime, nullable=False)  # Rows changed up to this time were exported
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SummaryTotals:
+    """Totals shared by the study summary and the per-participant contributions it is built from."""
+    preferences = db.Column(db.Integer, nullable=False, default=0)  # Category picks
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    videos_watched = db.Column(db.Integer, nullable=False, default=0)  # WatchingTime rows
+    watch_time_sum = db.Column(db.Float, nullable=False, default=0)
+    percentage_sum = db.Column(db.Float, nullable=False, default=0)
+    likes = db.Column(db.Integer, nullable=False, default=0)
+    dislikes = db.Column(db.Integer, nullable=False, default=0)
+    stars = db.Column(db.Integer, nullable=False, default=0)
+    comments = db.Column(db.Integer, nullable=False, default=0)
+    # On category 0 only. Round 0: enrolled. Round 1: reached video_viewing_1, and
+    # completed once past it (additional information, or round 2 for the control
+    # group). Round 2: reached round 2, and completed at the end_study page.
+    participants = db.Column(db.Integer, nullable=False, default=0)
+    participants_completed = db.Column(db.Integer, nullable=False, default=0)
+    completed_percentage_sum = db.Column(db.Float, nullable=False, default=0)  # Finishers' mean percentage in the round
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class StudySummary(SummaryTotals, db.Model):
+    """
+    Running totals per group, round and category, so dashboards read a few
+    hundred rows instead of the raw tables. Reaction state is per video rather
+    than per round, so likes, dislikes, stars and comments are kept on round 0.
+
+    The request paths do not write here. `flask refresh-summary`, run
+    periodically, recomputes the `ParticipantSummary` rows of participants whose
+    data changed and applies the difference; `flask rebuild-summary`
+    recomputes every row from the raw tables.
+    """
+    group_number = db.Column(db.Integer, primary_key=True)
+    round_number = db.Column(db.Integer, primary_key=True)  # 1 or 2; 0 for reactions and enrollment
+    category_id = db.Column(db.Integer, primary_key=True)  # 0 for videos without a category
+
+
+class ParticipantSummary(SummaryTotals, db.Model):
+    """One participant's contribution to each `StudySummary` row, as of their last refresh."""
+    participant_number = db.Column(db.String(50), db.ForeignKey('participant.participant_number'), primary_key=True)
+    group_number = db.Column(db.Integer, primary_key=True)
+    round_number = db.Column(db.Integer, primary_key=True)
+    category_id = db.Column(db.Integer, primary_key=True)
@@ -0,0 +1,148 @@
+"""
+Opt-in query inspection for development, staging and tests.
+
+With QUERY_INSPECTION enabled, every request tracks the statements it runs:
+statements repeated with the same shape (the usual sign of a lazy load in a
+loop) and statements slower than SLOW_QUERY_MS are logged with the line of
+application code that issued them. In strict mode, a request that issues
+more queries than its endpoint's budget raises `QueryBudgetExceeded`, which
+fails the test that made the request.
+"""
+import os
+import re
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import APP_CONFIG
+
+# Maximum queries per request for endpoints on the hot path. Endpoints not
+# listed here are only checked for repeated statements and slow queries.
+ENDPOINT_QUERY_BUDGETS: Dict[str, int] = {
+    'api.record_watch_time_endpoint': 2,  # Participant lookup, upsert
+    'api.record_watch_time_batch_endpoint': 2,
+    'api.user_interaction': 4,  # Participant lookup, reaction upsert, history insert
+    'api.get_videos': 3,
+    'api.get_videos_round2': 3,
+    'api.get_videos_after_info_cocoons_round2': 3,
+    'main.video_viewing_1': 2,
+    'round2.video_viewing_2': 2,
+    'round2.video_viewing_after_info_cocoons_2': 2,
+}
+
+# Execution option marking a statement that reads a whole table on purpose, such
+# as loading a per-worker cache. The query-plan tests do not flag its scans.
+FULL_SCAN_OPTION = 'intentional_full_scan'
+
+_APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+_IN_LIST = re.compile(r'\((?:\s*(?:\?|%s|:\w+)\s*,)+\s*(?:\?|%s|:\w+)\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+_exempt: ContextVar[bool] = ContextVar('query_budget_exempt', default=False)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A request issued more queries than its endpoint's budget allows."""
+
+
+@contextmanager
+def budget_exempt():
+    """
+    Leave the enclosed queries out of the request's count, for one-off work such
+    as warming a per-worker cache that later requests do not repeat.
+    """
+    token = _exempt.set(True)
+    try:
+        yield
+    finally:
+        _exempt.reset(token)
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so the same query with different IN-list sizes compares equal."""
+    return _IN_LIST.sub('(?)', _WHITESPACE.sub(' ', statement).strip())
+
+
+def call_site() -> Optional[str]:
+    """The innermost frame of application code (not libraries, not this module) on the stack."""
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith('<'):
+            continue  # Generated code, e.g. SQLAlchemy's deprecation wrappers
+        filename = os.path.abspath(frame.filename)
+        if (filename.startswith(_APP_ROOT) and filename != os.path.abspath(__file__)
+                and 'site-packages' not in filename):
+            return f"{os.path.relpath(filename, _APP_ROOT)}:{frame.lineno} in {frame.name}"
+    return None
+
+
+def _inspecting() -> bool:
+    return (APP_CONFIG.query_inspection != 'off' and not _exempt.get()
+            and has_request_context() and 'inspected_queries' in g)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _inspecting():
+        conn.info['inspection_started'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('inspection_started', None)
+    if started is None or not _inspecting():
+        return
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    shape = statement_shape(statement)
+    g.inspected_queries[shape] += 1
+    if shape not in g.query_call_sites:
+        g.query_call_sites[shape] = call_site()
+    if elapsed_ms >= APP_CONFIG.slow_query_ms:
+        current_app.logger.warning(
+            f"Slow query ({elapsed_ms:.1f} ms) in {request.endpoint} at {call_site()}: {shape[:300]}"
+        )
+
+
+def _start_request():
+    if APP_CONFIG.query_inspection != 'off':
+        g.inspected_queries = Counter()
+        g.query_call_sites = {}
+
+
+def _check_request(response):
+    queries = g.pop('inspected_queries', None)
+    if queries is None:
+        return response
+    call_sites = g.pop('query_call_sites', {})
+    endpoint = request.endpoint or 'unmatched'
+
+    for shape, count in queries.items():
+        if count >= APP_CONFIG.query_repeat_threshold:
+            current_app.logger.warning(
+                f"Possible N+1 in {endpoint}: same statement ran {count} times, "
+                f"first at {call_sites.get(shape)}: {shape[:300]}"
+            )
+
+    total = sum(queries.values())
+    budget = ENDPOINT_QUERY_BUDGETS.get(endpoint)
+    if budget is not None and total > budget:
+        message = f"{endpoint} issued {total} queries, over its budget of {budget}"
+        if APP_CONFIG.query_inspection == 'strict':
+            details = '\n'.join(f"  {count}x {call_sites.get(shape)}: {shape[:200]}"
+                                for shape, count in queries.most_common())
+            raise QueryBudgetExceeded(f"{message}:\n{details}")
+        current_app.logger.warning(message)
+    return response
+
+
+def init_query_inspector(flask_app) -> None:
+    """Install the hooks. They stay idle unless QUERY_INSPECTION is 'log' or 'strict'."""
+    flask_app.before_request(_start_request)
+    flask_app.after_request(_check_request)
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
@@ -0,0 +1,195 @@
+"""
+On-demand request profiling.
+
+A request is profiled with cProfile when it carries a valid signed
+X-Profile-Request header, or when an admin has switched sampling on for a
+fraction of requests. Profiles are written as pstats files to
+`<profile dir>/<endpoint>/group-<n>/`. With profiling off, each request only
+pays for a clock comparison; the shared toggle file is checked at most once
+per second.
+"""
+import cProfile
+import hashlib
+import hmac
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from flask import current_app, g, request, session
+
+from config import APP_CONFIG
+from query_inspector import budget_exempt
+
+PROFILE_HEADER = 'X-Profile-Request'
+MAX_SIGNATURE_TTL = 3600  # Signed headers may be valid for at most an hour
+TOGGLE_CHECK_INTERVAL = 1.0
+
+
+def sign_profile_request(secret: str, ttl_seconds: int = 300, now: Optional[float] = None) -> str:
+    """Header value that asks for the request to be profiled until `ttl_seconds` from now."""
+    expires = int((now if now is not None else time.time()) + ttl_seconds)
+    signature = hmac.new(secret.encode(), str(expires).encode(), hashlib.sha256).hexdigest()
+    return f"{expires}.{signature}"
+
+
+def verify_profile_request(value: str, secret: str, now: Optional[float] = None) -> bool:
+    """Check a header value produced by `sign_profile_request`."""
+    if not secret or not value:
+        return False
+    expires, _, signature = value.partition('.')
+    if not expires.isdigit():
+        return False
+    now = now if now is not None else time.time()
+    if not now <= int(expires) <= now + MAX_SIGNATURE_TTL:
+        return False
+    expected = hmac.new(secret.encode(), expires.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature, expected)
+
+
+class ProfilingToggle:
+    """
+    Admin switch for sampled profiling, shared by every worker through a small
+    JSON file. Each worker re-reads the file when its modification time changes.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = threading.Lock()
+        self._settings: Dict[str, Any] = {}
+        self._version = None
+        self._next_check = 0.0
+
+    def _file_version(self):
+        try:
+            stat = os.stat(self._path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def settings(self) -> Dict[str, Any]:
+        """Current settings, or {} when sampling is off or has expired."""
+        now = time.monotonic()
+        if now >= self._next_check:
+            with self._lock:
+                self._next_check = now + TOGGLE_CHECK_INTERVAL
+                version = self._file_version()
+                if version != self._version:
+                    self._version = version
+                    try:
+                        with open(self._path) as f:
+                            self._settings = json.load(f)
+                    except (OSError, ValueError):
+                        self._settings = {}
+        settings = self._settings
+        if settings and settings.get('expires_at', 0) < time.time():
+            return {}
+        return settings
+
+    def enable(self, sample_rate: float, minutes: float, endpoint: Optional[str] = None) -> Dict[str, Any]:
+        """Profile `sample_rate` of requests (optionally of one endpoint) for `minutes`."""
+        settings = {
+            'sample_rate': sample_rate,
+            'endpoint': endpoint,
+            'expires_at': time.time() + minutes * 60,
+        }
+        self._write(settings)
+        return settings
+
+    def disable(self) -> None:
+        self._write({})
+
+    def _write(self, settings: Dict[str, Any]) -> None:
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self._path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(settings, f)
+        os.replace(tmp_path, self._path)
+        self._next_check = 0.0
+
+
+profiling_toggle = ProfilingToggle(APP_CONFIG.profiling_toggle_file)
+
+# cProfile can only trace one request per process at a time
+_profiler_lock = threading.Lock()
+
+
+def _should_profile() -> bool:
+    header = request.headers.get(PROFILE_HEADER)
+    if header is not None:
+        return verify_profile_request(header, APP_CONFIG.admin_token)
+    settings = profiling_toggle.settings()
+    if not settings:
+        return False
+    if settings.get('endpoint') and settings['endpoint'] != request.endpoint:
+        return False
+    return random.random() < settings.get('sample_rate', 0)
+
+
+def _start_profile():
+    if not _should_profile() or not _profiler_lock.acquire(blocking=False):
+        return
+    profiler = cProfile.Profile()
+    g.request_profiler = profiler
+    g.profile_started = time.perf_counter()
+    profiler.enable()
+
+
+def _participant_group() -> str:
+    """Label for the profiled participant's group, looked up only for profiled requests."""
+    from config import db
+    from models import Participant
+    participant_number = session.get('participant_number')
+    if not participant_number:
+        return 'none'
+    with budget_exempt():  # Not part of the request being measured
+        participant = db.session.get(Participant, participant_number)
+    return str(participant.group_number) if participant else 'unknown'
+
+
+def _finish_profile(response):
+    profiler = g.pop('request_profiler', None)
+    if profiler is None:
+        return response
+    profiler.disable()
+    elapsed_ms = (time.perf_counter() - g.pop('profile_started')) * 1000
+    _profiler_lock.release()
+
+    try:
+        endpoint = request.endpoint or 'unmatched'
+        directory = os.path.join(APP_CONFIG.profile_dir, endpoint, f"group-{_participant_group()}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{time.strftime('%Y%m%dT%H%M%S')}-{elapsed_ms:.0f}ms-"
+                                       f"{os.getpid()}-{uuid.uuid4().hex[:8]}.prof")
+        profiler.dump_stats(path)
+        current_app.logger.info(f"Profiled {endpoint} ({elapsed_ms:.0f} ms) to {path}")
+    except Exception as e:
+        current_app.logger.error(f"Failed to write request profile: {str(e)}")
+    return response
+
+
+def _abandon_profile(exc):
+    """Stop a profiler left running by a request that failed before after_request."""
+    profiler = g.pop('request_profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        _profiler_lock.release()
+
+
+def init_request_profiler(flask_app) -> None:
+    """Install the profiling hooks and the `flask profile-token` command."""
+    flask_app.before_request(_start_profile)
+    flask_app.after_request(_finish_profile)
+    flask_app.teardown_request(_abandon_profile)
+
+    @flask_app.cli.command('profile-token')
+    def profile_token_command():
+        """Print a signed X-Profile-Request header value valid for five minutes."""
+        if not APP_CONFIG.admin_token:
+            raise SystemExit('ADMIN_TOKEN is not set')
+        print(f"{PROFILE_HEADER}: {sign_profile_request(APP_CONFIG.admin_token)}")
@@ -0,0 +1,88 @@
+# bench_dataset.py
+"""
+Time the wide-format participant dataset build on synthetic data.
+
+Generates source tables shaped like the study's (ratings for both rounds,
+watch-time rows, reactions, comments, consistency answers) directly as
+DataFrames, so the measurement covers the pandas pivots and joins only.
+
+Usage:
+    python scripts/benchmarks/bench_dataset.py [--participants 100000] [--videos 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from study_dataset import build_participant_dataset
+
+CATEGORIES = ['humor', 'food', 'travel', 'education', 'sports', 'music', 'beauty', 'tech']
+
+
+def synthetic_tables(participants, videos_per_round, seed=0):
+    """Source tables for `participants` participants who all finished both rounds."""
+    rng = np.random.default_rng(seed)
+    numbers = np.char.zfill(np.arange(participants).astype(str), 6)
+
+    per_round = np.repeat(numbers, 2 * len(CATEGORIES))
+    watch_numbers = np.repeat(numbers, 2 * videos_per_round)
+    watch_rows = len(watch_numbers)
+    return {
+        'participant': pd.DataFrame({
+            'participant_number': numbers,
+            'group_number': rng.integers(0, 10, participants),
+            'enrolled_at': pd.Timestamp('2025-01-01'),
+        }),
+        'preference': pd.DataFrame({
+            'participant_number': per_round,
+            'round_number': np.tile(np.repeat([1, 2], len(CATEGORIES)), participants),
+            'category': np.tile(CATEGORIES, 2 * participants),
+            'rating': rng.integers(1, 11, len(per_round)),
+        }),
+        'watching_time': pd.DataFrame({
+            'participant_number': watch_numbers,
+            'round_number': np.tile(np.repeat([1, 2], videos_per_round), participants),
+            'time_spent': rng.uniform(0, 120, watch_rows),
+            'percentage_watched': rng.uniform(0, 100, watch_rows),
+        }),
+        'reaction': pd.DataFrame({
+            'participant_number': watch_numbers,
+            'liked': rng.random(watch_rows) < 0.3,
+            'disliked': rng.random(watch_rows) < 0.1,
+            'starred': rng.random(watch_rows) < 0.05,
+        }),
+        'comment': pd.DataFrame({
+            'participant_number': rng.choice(numbers, participants),
+        }),
+        'consistency': pd.DataFrame({
+            'id': np.arange(2 * participants),
+            'participant_number': np.repeat(numbers, 2),
+            'question_number': np.tile([1, 2], participants),
+            'answer': rng.integers(1, 6, 2 * participants),
+        }),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--participants', type=int, default=100000)
+    parser.add_argument('--videos', type=int, default=20, help='Videos watched per round')
+    args = parser.parse_args()
+
+    tables = synthetic_tables(args.participants, args.videos)
+    rows = sum(len(frame) for frame in tables.values())
+    print(f"{args.participants} participants, {rows} source rows")
+
+    start = time.perf_counter()
+    dataset = build_participant_dataset(tables)
+    elapsed = time.perf_counter() - start
+    print(f"Built {len(dataset)} x {len(dataset.columns)} dataset in {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
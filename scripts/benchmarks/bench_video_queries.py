@@ -0,0 +1,105 @@
+# bench_video_queries.py
+"""
+Compare full ORM hydration against the column-projected video query.
+
+Builds a synthetic catalog in an in-memory SQLite database and times both ways
+of fetching the videos for three categories, the shape of a /api/videos call.
+
+Usage:
+    python scripts/benchmarks/bench_video_queries.py [--videos 100000] [--categories 15] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from config import db
+from models import Video, VideoCategory
+from catalog import VideoRecord, query_video_records
+
+
+def build_catalog(engine, video_count, category_count):
+    """Create the schema and fill it with synthetic videos."""
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.execute(insert(VideoCategory), [
+            {'id': i + 1, 'name': f'category_{i}'} for i in range(category_count)
+        ])
+        session.execute(insert(Video), [{
+            'id': i + 1,
+            'category_id': i % category_count + 1,
+            'title': f'Synthetic video {i}',
+            'url': f'https://www.douyin.com/video/{7000000000000000000 + i}',
+            'duration': 30 + i % 240,
+            'tags': 'tag_a,tag_b,tag_c,tag_d',
+            'likes': str(i * 7 % 100000),
+            'forwards': str(i * 3 % 10000),
+        } for i in range(video_count)])
+        session.commit()
+
+
+def fetch_entities(engine, category_names):
+    """The previous path: hydrate Video and VideoCategory entities."""
+    with Session(engine) as session:
+        rows = session.query(Video, VideoCategory).join(
+            VideoCategory, Video.category_id == VideoCategory.id
+        ).filter(VideoCategory.name.in_(category_names)).all()
+        return [(video.id, video.title, video.url, category.name) for video, category in rows]
+
+
+def fetch_projected(engine, category_names):
+    """The projected path: select only the VideoRecord columns."""
+    with Session(engine) as session:
+        rows = query_video_records(VideoCategory.name.in_(category_names), session=session)
+        return [VideoRecord._make(row) for row in rows]
+
+
+def measure(fn, engine, category_names, repeat):
+    """Return (best wall time in seconds, peak traced allocation in bytes, row count)."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(engine, category_names)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = fn(engine, category_names)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--videos', type=int, default=100000)
+    parser.add_argument('--categories', type=int, default=15)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine('sqlite://')
+    print(f"Building synthetic catalog: {args.videos} videos in {args.categories} categories...")
+    build_catalog(engine, args.videos, args.categories)
+    category_names = [f'category_{i}' for i in range(min(3, args.categories))]
+
+    results = {}
+    for label, fn in (('ORM entities', fetch_entities), ('Projected rows', fetch_projected)):
+        results[label] = measure(fn, engine, category_names, args.repeat)
+
+    print(f"\n{'Path':<16}{'Rows':>10}{'Best time (ms)':>18}{'Peak memory (MB)':>20}")
+    for label, (best, peak, rows) in results.items():
+        print(f"{label:<16}{rows:>10}{best * 1000:>18.1f}{peak / 1024 / 1024:>20.2f}")
+
+    orm_time, orm_peak, _ = results['ORM entities']
+    projected_time, projected_peak, _ = results['Projected rows']
+    print(f"\nSpeedup: {orm_time / projected_time:.1f}x, "
+          f"memory reduction: {orm_peak / projected_peak:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+# bench_write_queue.py
+"""
+Compare direct SQLite writes against the single-writer queue.
+
+Points the app at a scratch SQLite file, then has several threads record
+watch-time deltas concurrently, once with each thread committing its own
+transaction and once through the serialized writer.
+
+Usage:
+    python scripts/benchmarks/bench_write_queue.py [--threads 24] [--writes 200]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+scratch_dir = tempfile.mkdtemp(prefix='bench_write_queue_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(scratch_dir, 'bench.db')}"
+os.environ['WRITE_LOCK_FILE'] = os.path.join(scratch_dir, 'write.lock')
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from config import app, db
+from models import Participant, Video, VideoCategory
+from services import WatchTimeService
+from write_queue import serialized_writer
+
+
+def setup_schema(thread_count):
+    """Create the schema with one participant per thread and one video."""
+    with app.app_context():
+        db.create_all()
+        db.session.add(VideoCategory(id=1, name='humor'))
+        db.session.add(Video(id=1, title='Video', url='https://example.com/1', duration=60, category_id=1))
+        db.session.add_all(Participant(participant_number=str(10000 + i), group_number=1)
+                           for i in range(thread_count))
+        db.session.commit()
+
+
+def worker(participant_number, writes, errors):
+    """Record `writes` heartbeats the way the API does: one committed write each."""
+    with app.app_context():
+        for _ in range(writes):
+            try:
+                WatchTimeService.record([WatchTimeService.build_row(participant_number, 1, 1, 5, 60)])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                errors.append(participant_number)
+        db.session.remove()
+
+
+def measure(thread_count, writes):
+    """Return (writes per second, failed writes)."""
+    errors = []
+    threads = [threading.Thread(target=worker, args=(str(10000 + i), writes, errors))
+               for i in range(thread_count)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return thread_count * writes / elapsed, len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=24)
+    parser.add_argument('--writes', type=int, default=200)
+    args = parser.parse_args()
+
+    setup_schema(args.threads)
+    print(f"{args.threads} threads x {args.writes} watch-time writes on {scratch_dir}\n")
+    print(f"{'Mode':<18}{'Writes/s':>12}{'Failed':>10}")
+    for label, enabled in (('Direct', False), ('Serialized', True)):
+        serialized_writer.enabled = enabled
+        rate, failed = measure(args.threads, args.writes)
+        print(f"{label:<18}{rate:>12.0f}{failed:>10}")
+    serialized_writer.shutdown()
+    print(f"\nWriter stats: {serialized_writer.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from config import app, db
 from models import Video, VideoCategory
+from catalog import invalidate_video_catalog
 import pandas as pd
 
 def load_videos_from_excel(file_path):
@@ -61,6 +62,7 @@ def load_videos_from_excel(file_path):
 
         db.session.bulk_save_objects(videos_to_add)
         db.session.commit()
+        invalidate_video_catalog()
         print(f"Successfully added {len(videos_to_add)} videos to the database.")
 
 def add_info_video():
@@ -80,6 +82,7 @@ def add_info_video():
             )
             db.session.add(info)
             db.session.commit()
+            invalidate_video_catalog()
             print("Info video (9999) added.")
 
 if __name__ == '__main__':
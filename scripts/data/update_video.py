@@ -5,6 +5,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from config import app, db
 from models import Video
+from catalog import invalidate_video_catalog
 import os
 import sys
 
@@ -75,6 +76,9 @@ def update_videos_from_excel():
                     db.session.rollback()
                     error_count += 1
         
+        if updated_count:
+            invalidate_video_catalog()
+        
         # Print summary
         print("\nUpdate Summary:")
         print(f"Total records in Excel: {len(df)}")
@@ -0,0 +1,67 @@
+# snapshot_replica.py
+"""
+Refresh the read-only SQLite snapshot used as the read replica.
+
+Copies the primary SQLite database with the online backup API (safe while the
+app is writing), switches the copy to a rollback journal so it can be opened
+read-only, swaps it into place atomically and invalidates the catalog caches.
+
+Usage:
+    REPLICA_DATABASE_URL=sqlite:////path/to/replica.db python scripts/deployment/snapshot_replica.py
+    python scripts/deployment/snapshot_replica.py /path/to/replica.db
+"""
+import os
+import sqlite3
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from sqlalchemy.engine import make_url
+
+from config import DB_CONFIG, app
+from catalog import invalidate_video_catalog
+
+
+def snapshot(primary_path, replica_path):
+    """Write a consistent copy of `primary_path` to `replica_path`."""
+    tmp_path = f"{replica_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    source = sqlite3.connect(primary_path)
+    target = sqlite3.connect(tmp_path)
+    try:
+        source.backup(target)
+        # Readers of a WAL database need write access for the shared-memory file
+        target.execute('PRAGMA journal_mode=DELETE')
+    finally:
+        target.close()
+        source.close()
+    os.replace(tmp_path, replica_path)
+
+
+def main():
+    primary = make_url(DB_CONFIG.uri)
+    if primary.get_backend_name() != 'sqlite' or not primary.database:
+        print("The primary database is not a SQLite file; use the server's own replication instead.")
+        return 1
+
+    if len(sys.argv) > 1:
+        replica_path = sys.argv[1]
+    elif DB_CONFIG.replica_uri:
+        replica_path = make_url(DB_CONFIG.replica_uri).database
+        if replica_path.startswith('file:'):
+            replica_path = replica_path[len('file:'):]
+    else:
+        print("Pass the snapshot path or set REPLICA_DATABASE_URL.")
+        return 1
+
+    snapshot(primary.database, replica_path)
+    with app.app_context():
+        invalidate_video_catalog()
+    print(f"Replica snapshot written to {replica_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,67 +5,412 @@ Contains business logic separated from route handlers.
 from typing import List, Dict, Tuple, Optional, Any
 from models import (
     Participant, Video, VideoCategory, VideoInteraction, 
-    WatchingTime, Preference, CopingStrategy, ConsistencyAnswer, MessageTime
+    WatchingTime, Preference, CopingStrategy, ConsistencyAnswer, MessageTime,
+    PlaylistEntry, ParticipantNumberSequence, VideoReaction, StudySummary, ParticipantSummary, ExportWatermark
 )
-from config import db
+from catalog import VideoRecord, query_video_records, video_catalog, video_durations
+from config import APP_CONFIG, db
+from watch_time_buffer import watch_time_buffer
+from write_queue import serialized_writer
+from query_inspector import FULL_SCAN_OPTION
+from db_routing import read_replica
 from flask import current_app
+from sqlalchemy import and_, bindparam, case, delete, func, insert, literal, literal_column, or_, select, true, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta
 import random
 
 
+def _dialect_insert(table, dialect=None):
+    """Return (INSERT statement, proxy for the values being inserted) for the current dialect."""
+    dialect = dialect or db.engine.dialect.name
+    if dialect in ('mysql', 'mariadb'):
+        stmt = mysql_insert(table)
+        return stmt, stmt.inserted
+    stmt = (postgresql_insert if dialect == 'postgresql' else sqlite_insert)(table)
+    return stmt, stmt.excluded
+
+
+def _on_conflict_update(stmt, index_elements, assignments, dialect=None):
+    """
+    Turn an INSERT from `_dialect_insert` into an upsert.
+    `assignments` is an ordered list of (column, expression) pairs; MySQL applies
+    them left to right, so expressions must come before the columns they read.
+    """
+    if (dialect or db.engine.dialect.name) in ('mysql', 'mariadb'):
+        return stmt.on_duplicate_key_update(assignments)
+    return stmt.on_conflict_do_update(index_elements=index_elements, set_=dict(assignments))
+
+
+class StudySummaryService:
+    """
+    Keeps `StudySummary` in step with the raw tables, outside the request paths.
+
+    Each participant's contribution to the summary rows is stored in
+    `ParticipantSummary`. `refresh()` finds the participants whose raw rows
+    changed since its watermark, recomputes their contributions from the raw
+    tables and adds the difference to the summary rows. Because contributions
+    are recomputed rather than accumulated, a refresh is idempotent: windows
+    may overlap and concurrent writes cannot be double counted. The summary
+    lags the raw tables by up to one refresh interval plus
+    SUMMARY_REFRESH_LAG_SECONDS. Run one refresh at a time.
+    """
+
+    KEY_COLUMNS = ['group_number', 'round_number', 'category_id']
+    PARTICIPANT_KEY_COLUMNS = ['participant_number'] + KEY_COLUMNS
+    TOTAL_COLUMNS = ['preferences', 'rating_sum', 'videos_watched', 'watch_time_sum', 'percentage_sum',
+                     'likes', 'dislikes', 'stars', 'comments',
+                     'participants', 'participants_completed', 'completed_percentage_sum']
+    REACTION_COLUMNS = [('liked', 'likes'), ('disliked', 'dislikes'), ('starred', 'stars')]
+    WATERMARK = 'study_summary'
+    REFRESH_CHUNK_SIZE = 500
+    # (participant column, change column) of every raw table the summary reads
+    CHANGE_COLUMNS = [
+        (Participant.participant_number, Participant.updated_at),
+        (Preference.participant_number, Preference.timestamp),
+        (WatchingTime.participant_number, WatchingTime.updated_at),
+        (VideoReaction.participant_number, VideoReaction.updated_at),
+        (VideoInteraction.participant_number, VideoInteraction.timestamp),
+        (MessageTime.participant_number, MessageTime.timestamp),
+    ]
+
+    @staticmethod
+    def _add(model, key_columns: List[str], query, totals: List[str]):
+        """
+        Upsert that adds the `totals` selected by `query` to the rows of `model`.
+        `query` selects the key columns followed by the totals, in order.
+        """
+        table = model.__table__
+        stmt, inserted = _dialect_insert(table)
+        # The WHERE keeps SQLite from reading ON CONFLICT as a join constraint
+        query = query.add_columns(literal(datetime.utcnow()).label('updated_at')).where(true())
+        stmt = stmt.from_select(key_columns + totals + ['updated_at'], query)
+        return _on_conflict_update(stmt, key_columns, [
+            (name, table.c[name] + inserted[name]) for name in totals
+        ] + [('updated_at', inserted.updated_at)])
+
+    @staticmethod
+    def _video_category():
+        return func.coalesce(Video.category_id, 0)
+
+    @staticmethod
+    def _completions(round_number: int, finished, *criteria):
+        """
+        Participants matching `finished` as completing `round_number`, with
+        their mean percentage watched in that round (0% without watch time).
+        """
+        return (
+            select(Participant.participant_number, Participant.group_number, literal(round_number), literal(0),
+                   literal(1), func.coalesce(func.avg(func.coalesce(WatchingTime.percentage_watched, 0)), 0))
+            .outerjoin(WatchingTime, and_(WatchingTime.participant_number == Participant.participant_number,
+                                          WatchingTime.round_number == round_number))
+            .where(finished, *criteria)
+            .group_by(Participant.participant_number, Participant.group_number)
+        )
+
+    @staticmethod
+    def _contributions(*criteria) -> List[Tuple[Any, List[str]]]:
+        """
+        (query, totals) pairs computing the `ParticipantSummary` rows of the
+        participants matching `criteria` from the raw tables.
+        """
+        category = StudySummaryService._video_category()
+        reaction = VideoReaction.__table__
+        participant = [Participant.participant_number, Participant.group_number]
+        past_round_1 = or_(
+            select(MessageTime.id).where(MessageTime.participant_number == Participant.participant_number).exists(),
+            select(Preference.id).where(Preference.participant_number == Participant.participant_number,
+                                        Preference.round_number == 2).exists(),
+        )
+        return [
+            (select(*participant, Preference.round_number, Preference.category_id,
+                    func.count(), func.sum(Preference.rating))
+             .join(Participant, Participant.participant_number == Preference.participant_number)
+             .where(*criteria)
+             .group_by(*participant, Preference.round_number, Preference.category_id),
+             ['preferences', 'rating_sum']),
+            (select(*participant, WatchingTime.round_number, category, func.count(),
+                    func.sum(WatchingTime.time_spent), func.sum(func.coalesce(WatchingTime.percentage_watched, 0)))
+             .join(Participant, Participant.participant_number == WatchingTime.participant_number)
+             .join(Video, Video.id == WatchingTime.video_id)
+             .where(*criteria)
+             .group_by(*participant, WatchingTime.round_number, category),
+             ['videos_watched', 'watch_time_sum', 'percentage_sum']),
+            (select(*participant, literal(0), category,
+                    *[func.sum(case((reaction.c[column] == True, 1), else_=0))  # noqa: E712
+                      for column, _ in StudySummaryService.REACTION_COLUMNS])
+             .select_from(reaction)
+             .join(Participant, Participant.participant_number == reaction.c.participant_number)
+             .join(Video, Video.id == reaction.c.video_id)
+             .where(*criteria)
+             .group_by(*participant, category),
+             [total for _, total in StudySummaryService.REACTION_COLUMNS]),
+            (select(*participant, literal(0), category, func.count())
+             .select_from(VideoInteraction)
+             .join(Participant, Participant.participant_number == VideoInteraction.participant_number)
+             .join(Video, Video.id == VideoInteraction.video_id)
+             .where(VideoInteraction.action == 'comment', *criteria)
+             .group_by(*participant, category),
+             ['comments']),
+            # Enrollment on round 0, then each round the participant chose categories for
+            (select(*participant, literal(0), literal(0), literal(1)).where(*criteria),
+             ['participants']),
+            (select(*participant, Preference.round_number, literal(0), literal(1))
+             .join(Participant, Participant.participant_number == Preference.participant_number)
+             .where(*criteria)
+             .group_by(*participant, Preference.round_number),
+             ['participants']),
+            (StudySummaryService._completions(1, past_round_1, *criteria),
+             ['participants_completed', 'completed_percentage_sum']),
+            (StudySummaryService._completions(2, Participant.completed_at.isnot(None), *criteria),
+             ['participants_completed', 'completed_percentage_sum']),
+        ]
+
+    @staticmethod
+    def _recompute(participant_numbers: Optional[List[str]] = None) -> None:
+        """
+        Replace the contributions of the given participants (everyone if None)
+        and move the summary rows by the difference.
+        """
+        stored = ParticipantSummary.__table__
+        key = [stored.c[name] for name in StudySummaryService.KEY_COLUMNS]
+        if participant_numbers is None:
+            stored_criteria, raw_criteria = [], []
+            options = {FULL_SCAN_OPTION: True}  # Reads every raw row by design
+        else:
+            stored_criteria = [stored.c.participant_number.in_(participant_numbers)]
+            raw_criteria = [Participant.participant_number.in_(participant_numbers)]
+            options = {}
+
+        def summed(sign):
+            return (select(*key, *[func.sum(stored.c[name]) * sign for name in StudySummaryService.TOTAL_COLUMNS])
+                    .where(*stored_criteria)
+                    .group_by(*key))
+
+        def add_to_summary(query):
+            db.session.execute(StudySummaryService._add(
+                StudySummary, StudySummaryService.KEY_COLUMNS, query, StudySummaryService.TOTAL_COLUMNS
+            ), execution_options=options)
+
+        add_to_summary(summed(-1))
+        db.session.execute(delete(ParticipantSummary).where(*stored_criteria), execution_options=options)
+        for query, totals in StudySummaryService._contributions(*raw_criteria):
+            db.session.execute(StudySummaryService._add(
+                ParticipantSummary, StudySummaryService.PARTICIPANT_KEY_COLUMNS, query, totals
+            ), execution_options=options)
+        add_to_summary(summed(1))
+
+    @staticmethod
+    def changed_participants(after: Optional[datetime], until: datetime) -> List[str]:
+        """Participants with a raw row changed in (`after`, `until`]."""
+        changed = set()
+        for participant_column, change_column in StudySummaryService.CHANGE_COLUMNS:
+            query = db.session.query(participant_column).filter(change_column <= until)
+            if after is not None:
+                query = query.filter(change_column > after)
+            changed.update(participant_number for (participant_number,) in query.distinct())
+        return sorted(changed)
+
+    @staticmethod
+    def refresh(now: Optional[datetime] = None) -> int:
+        """
+        Recompute the contributions of participants whose data changed since
+        the last refresh and advance the watermark. The first refresh rebuilds
+        the table. Returns the number of participants recomputed. The caller commits.
+        """
+        until = (now or datetime.utcnow()) - timedelta(seconds=APP_CONFIG.summary_refresh_lag_seconds)
+        watermark = db.session.get(ExportWatermark, StudySummaryService.WATERMARK)
+        if watermark is None:
+            StudySummaryService.rebuild()
+            refreshed = db.session.query(func.count()).select_from(Participant).scalar()
+            db.session.add(ExportWatermark(table_name=StudySummaryService.WATERMARK, exported_until=until))
+            return refreshed
+
+        changed = StudySummaryService.changed_participants(watermark.exported_until, until)
+        for start in range(0, len(changed), StudySummaryService.REFRESH_CHUNK_SIZE):
+            StudySummaryService._recompute(changed[start:start + StudySummaryService.REFRESH_CHUNK_SIZE])
+        watermark.exported_until = until
+        return len(changed)
+
+    @staticmethod
+    def rebuild() -> int:
+        """
+        Recompute every summary row and contribution from the raw tables, e.g.
+        after a repair. Returns the number of summary rows. The caller commits.
+        """
+        full_scan = {FULL_SCAN_OPTION: True}
+        db.session.execute(delete(StudySummary), execution_options=full_scan)
+        db.session.execute(delete(ParticipantSummary), execution_options=full_scan)
+        StudySummaryService._recompute()
+        return db.session.query(func.count()).select_from(StudySummary).execution_options(**full_scan).scalar()
+
+    @staticmethod
+    def get_rows() -> List[Dict[str, Any]]:
+        """Every summary row with its means, read from the replica when one is configured."""
+        with read_replica():
+            rows = (db.session.query(StudySummary, VideoCategory.name)
+                    .outerjoin(VideoCategory, VideoCategory.id == StudySummary.category_id)
+                    .order_by(StudySummary.group_number, StudySummary.round_number, StudySummary.category_id)
+                    .execution_options(**{FULL_SCAN_OPTION: True})
+                    .all())
+
+        def mean(total, count):
+            return round(total / count, 2) if count else None
+
+        return [{
+            'group_number': summary.group_number,
+            'round_number': summary.round_number,
+            'category_id': summary.category_id,
+            'category': category_name,
+            'preferences': summary.preferences,
+            'mean_rating': mean(summary.rating_sum, summary.preferences),
+            'videos_watched': summary.videos_watched,
+            'watch_time_sum': summary.watch_time_sum,
+            'mean_percentage_watched': mean(summary.percentage_sum, summary.videos_watched),
+            'likes': summary.likes,
+            'dislikes': summary.dislikes,
+            'stars': summary.stars,
+            'comments': summary.comments,
+            'participants': summary.participants,
+            'participants_completed': summary.participants_completed,
+            'mean_completed_percentage_watched': mean(summary.completed_percentage_sum,
+                                                      summary.participants_completed),
+        } for summary, category_name in rows]
+
+
 class VideoInteractionService:
-    """Service for handling video interactions (like, dislike, star, comment)."""
-    
+    """
+    Service for handling video interactions (like, dislike, star, comment).
+
+    The current reaction state lives in `VideoReaction`, one row per
+    participant and video, and each action changes it with a single upsert.
+    Every action is also appended to the `VideoInteraction` history, which is
+    never updated or deleted.
+    """
+
+    # Reaction state columns set by each action
+    REACTION_UPDATES = {
+        'like': {'liked': True, 'disliked': False},
+        'dislike': {'liked': False, 'disliked': True},
+        'remove_like': {'liked': False},
+        'remove_dislike': {'disliked': False},
+        'star': {'starred': True},
+        'star_remove': {'starred': False},
+    }
+
     @staticmethod
-    def handle_like_dislike(participant_number: str, video_id: int, action: str) -> None:
-        """Handle like/dislike interactions, removing previous conflicting actions."""
-        # Remove existing like/dislike for this video
-        VideoInteraction.query.filter_by(
-            participant_number=participant_number,
-            video_id=video_id
-        ).filter(VideoInteraction.action.in_(['like', 'dislike'])).delete(synchronize_session=False)
-        
-        # Add new interaction
-        new_interaction = VideoInteraction(
+    def _log_interaction(participant_number: str, video_id: int, action: str, content: str = '') -> None:
+        """Append an action to the interaction history."""
+        db.session.add(VideoInteraction(
             participant_number=participant_number,
             video_id=video_id,
             action=action,
-            content=''
-        )
-        db.session.add(new_interaction)
+            content=content
+        ))
 
     @staticmethod
-    def handle_remove_action(participant_number: str, video_id: int, action: str) -> None:
-        """Handle removal of like/dislike actions."""
-        target_action = action.split('_')[1]  # 'remove_like' -> 'like'
-        VideoInteraction.query.filter_by(
+    def _upsert_reaction(participant_number: str, video_id: int, changes: Dict[str, bool]) -> None:
+        """Apply reaction state changes for one video with a single upsert."""
+        table = VideoReaction.__table__
+        now = datetime.utcnow()
+        stmt, _ = _dialect_insert(table)
+        stmt = stmt.values(
             participant_number=participant_number,
             video_id=video_id,
-            action=target_action
-        ).delete(synchronize_session=False)
+            liked=changes.get('liked', False),
+            disliked=changes.get('disliked', False),
+            starred=changes.get('starred', False),
+            updated_at=now
+        )
+        stmt = _on_conflict_update(
+            stmt,
+            ['participant_number', 'video_id'],
+            list(changes.items()) + [('updated_at', now)]
+        )
+        db.session.execute(stmt)
 
     @staticmethod
-    def handle_star_action(participant_number: str, video_id: int, action: str) -> None:
-        """Handle star/unstar interactions."""
-        if action == 'star':
-            # Check if already starred to avoid duplicates
-            existing = VideoInteraction.query.filter_by(
-                participant_number=participant_number,
-                video_id=video_id,
-                action='star'
-            ).first()
-            if not existing:
-                db.session.add(VideoInteraction(
-                    participant_number=participant_number,
-                    video_id=video_id,
-                    action='star',
-                    content=''
-                ))
-        else:  # star_remove
-            VideoInteraction.query.filter_by(
-                participant_number=participant_number,
-                video_id=video_id,
-                action='star'
-            ).delete(synchronize_session=False)
+    def apply_reaction(participant_number: str, video_id: int, action: str) -> None:
+        """Update the reaction state with one upsert and log the action."""
+        changes = VideoInteractionService.REACTION_UPDATES[action]
+        VideoInteractionService._upsert_reaction(participant_number, video_id, changes)
+        VideoInteractionService._log_interaction(participant_number, video_id, action)
+
+    @staticmethod
+    def known_video_id(value: Any) -> Optional[int]:
+        """
+        The integer id of an existing video, or None. Checked against the cached
+        duration index, so writes that would break the video foreign key are
+        rejected without a query.
+        """
+        try:
+            video_id = int(value)
+        except (TypeError, ValueError):
+            return None
+        return video_id if video_durations.get(video_id) is not None else None
+
+    @staticmethod
+    def validate_actions(actions: Any, max_actions: int) -> Tuple[Optional[str], Optional[List[Dict]]]:
+        """
+        Validate an ordered list of interaction actions.
+        Returns (error_message, None) on failure, and (None, cleaned_actions) on success.
+        """
+        if not isinstance(actions, list) or not actions:
+            return "actions must be a non-empty list", None
+        if len(actions) > max_actions:
+            return f"At most {max_actions} actions are allowed per batch", None
+
+        cleaned = []
+        for index, item in enumerate(actions):
+            if not isinstance(item, dict):
+                return f"Action {index} must be an object", None
+            video_id = VideoInteractionService.known_video_id(item.get('video_id'))
+            if video_id is None:
+                return f"Action {index} needs the video_id of an existing video", None
+            action = item.get('action')
+            content = ''
+            if action == 'comment':
+                content = (item.get('comment') or '').strip()
+                if not content:
+                    return f"Action {index} is a comment without text", None
+            elif action not in VideoInteractionService.REACTION_UPDATES:
+                return f"Action {index} has an invalid action", None
+            cleaned.append({'video_id': video_id, 'action': action, 'content': content})
+        return None, cleaned
+
+    @staticmethod
+    def apply_actions(participant_number: str, actions: List[Dict]) -> int:
+        """
+        Apply a validated, ordered batch of actions.
+
+        Reaction changes are folded per video into their final state first, so
+        a burst of toggles costs one upsert per video. The history receives
+        every action in one bulk insert. Returns the number of videos whose
+        reaction state was written.
+        """
+        final_changes: Dict[int, Dict[str, bool]] = {}
+        now = datetime.utcnow()
+        history = []
+        for item in actions:
+            if item['action'] in VideoInteractionService.REACTION_UPDATES:
+                final_changes.setdefault(item['video_id'], {}).update(
+                    VideoInteractionService.REACTION_UPDATES[item['action']]
+                )
+            history.append({
+                'participant_number': participant_number,
+                'video_id': item['video_id'],
+                'action': item['action'],
+                'content': item['content'],
+                'timestamp': now
+            })
+
+        for video_id, changes in final_changes.items():
+            VideoInteractionService._upsert_reaction(participant_number, video_id, changes)
+        db.session.execute(insert(VideoInteraction), history)
+        return len(final_changes)
 
     @staticmethod
     def handle_comment(participant_number: str, video_id: int, comment_text: str) -> bool:
@@ -73,47 +418,174 @@ class VideoInteractionService:
         if not comment_text or not comment_text.strip():
             return False
         
-        db.session.add(VideoInteraction(
-            participant_number=participant_number,
-            video_id=video_id,
-            action='comment',
-            content=comment_text.strip()
-        ))
+        VideoInteractionService._log_interaction(participant_number, video_id, 'comment', comment_text.strip())
         return True
 
+    @staticmethod
+    def get_reaction_state(participant_number: str, video_id: int) -> Dict[str, bool]:
+        """Current like/dislike/star state, read from the state table rather than the history."""
+        reaction = db.session.get(VideoReaction, (participant_number, video_id))
+        if reaction is None:
+            return {'liked': False, 'disliked': False, 'starred': False}
+        return {'liked': reaction.liked, 'disliked': reaction.disliked, 'starred': reaction.starred}
+
 
 class VideoSelectionService:
     """Service for video selection and categorization logic."""
     
+    @staticmethod
+    def _random_order():
+        """Dialect-appropriate random ordering expression for sampling."""
+        if db.engine.dialect.name == 'mysql':
+            return func.rand()
+        return func.random()
+
+    @staticmethod
+    def sample_unwatched_videos(
+        participant_number: str,
+        category_filter: Any,
+        exclude_round: int = 1,
+        limit_per_category: Optional[int] = None
+    ) -> List[VideoRecord]:
+        """
+        Select videos the participant has not watched in `exclude_round`.
+
+        Watched videos are removed with a NOT EXISTS anti-join against
+        WatchingTime, and when `limit_per_category` is given the random
+        per-category sample is taken in the database with ROW_NUMBER(), so only
+        the chosen rows are returned.
+        """
+        watched = db.session.query(WatchingTime.id).filter(
+            WatchingTime.participant_number == participant_number,
+            WatchingTime.round_number == exclude_round,
+            WatchingTime.video_id == Video.id
+        ).exists()
+
+        candidates = query_video_records(category_filter, ~watched)
+
+        if limit_per_category:
+            ranked = candidates.add_columns(func.row_number().over(
+                partition_by=Video.category_id,
+                order_by=VideoSelectionService._random_order()
+            ).label('pick')).subquery()
+            rows = db.session.query(
+                *[ranked.c[field] for field in VideoRecord._fields]
+            ).filter(ranked.c.pick <= limit_per_category).all()
+        else:
+            rows = candidates.all()
+
+        return [VideoRecord._make(row) for row in rows]
+
     @staticmethod
     def get_unwatched_videos_for_categories(
         participant_number: str, 
         category_ids: List[int], 
-        exclude_round: int = 1
-    ) -> Dict[int, List[Video]]:
+        exclude_round: int = 1,
+        limit_per_category: Optional[int] = None
+    ) -> Dict[int, List[VideoRecord]]:
         """Get unwatched videos grouped by category for a participant."""
-        watched_video_ids = db.session.query(WatchingTime.video_id).filter(
-            WatchingTime.participant_number == participant_number,
-            WatchingTime.round_number == exclude_round,
-            Video.category_id.in_(category_ids)
-        ).join(Video, Video.id == WatchingTime.video_id).all()
-        
-        watched_ids = [row[0] for row in watched_video_ids]
-        
-        available_videos = Video.query.filter(
+        available_videos = VideoSelectionService.sample_unwatched_videos(
+            participant_number,
             Video.category_id.in_(category_ids),
-            ~Video.id.in_(watched_ids) if watched_ids else True
-        ).all()
+            exclude_round,
+            limit_per_category
+        )
         
         # Group by category
         videos_by_category = {}
         for video in available_videos:
-            if video.category_id not in videos_by_category:
-                videos_by_category[video.category_id] = []
-            videos_by_category[video.category_id].append(video)
+            videos_by_category.setdefault(video.category_id, []).append(video)
         
         return videos_by_category
 
+    @staticmethod
+    def _sample_per_category(
+        videos_by_category: Dict[str, Tuple[VideoRecord, ...]],
+        category_names: List[str],
+        limit_per_category: Optional[int]
+    ) -> List[VideoRecord]:
+        """For each category, select up to limit_per_category videos (randomly if needed)."""
+        selected = []
+        for category_name in category_names:
+            videos = videos_by_category.get(category_name, ())
+            if limit_per_category:
+                selected.extend(random.sample(videos, min(limit_per_category, len(videos))))
+            else:
+                selected.extend(videos)
+        return selected
+
+    @staticmethod
+    def select_videos(
+        category_names: List[str],
+        participant_number: Optional[str] = None,
+        exclude_watched_round: Optional[int] = None,
+        limit_per_category: Optional[int] = None
+    ) -> List[VideoRecord]:
+        """
+        Pick videos for the given category names in random display order.
+        Without exclusion the per-worker catalog cache is sampled; with exclusion
+        the database does both the anti-join and the per-category sampling.
+        """
+        if participant_number and exclude_watched_round:
+            selected = VideoSelectionService.sample_unwatched_videos(
+                participant_number,
+                VideoCategory.name.in_(category_names),
+                exclude_watched_round,
+                limit_per_category
+            )
+        else:
+            selected = VideoSelectionService._sample_per_category(
+                video_catalog.get_videos_by_category(category_names),
+                category_names,
+                limit_per_category
+            )
+        random.shuffle(selected)
+        return selected
+
+    @staticmethod
+    def serialize_videos(videos: List[VideoRecord]) -> List[Dict]:
+        """Convert selected videos to the payload returned by the video APIs."""
+        return [{
+            'id': video.id,
+            'title': video.title,  # Add title field for backward compatibility
+            'link': video.url,
+            'category': video.category_name
+        } for video in videos]
+
+    @staticmethod
+    def get_category_names(category_ids: List[int]) -> Dict[int, str]:
+        """Look up the names of several categories in one query, on the read replica if configured."""
+        with read_replica():
+            return dict(db.session.query(VideoCategory.id, VideoCategory.name).filter(
+                VideoCategory.id.in_(category_ids)
+            ).all())
+
+    @staticmethod
+    def get_selection_candidates(
+        participant_number: str,
+        category_ids: List[int],
+        exclude_round: int = 1
+    ) -> Tuple[Dict[int, str], Dict[int, List[VideoRecord]], Dict[int, Tuple[VideoRecord, ...]]]:
+        """
+        Gather everything needed to pick one video per category in a fixed number of queries.
+
+        Returns (category names, one sampled unwatched video per category, and the
+        full catalog of every category with no unwatched videos left). Names and
+        unwatched samples are one query each; fallback candidates come from the
+        catalog cache, whatever the number of categories.
+        """
+        names_by_id = VideoSelectionService.get_category_names(category_ids)
+        unwatched_by_id = VideoSelectionService.get_unwatched_videos_for_categories(
+            participant_number, category_ids, exclude_round, limit_per_category=1
+        )
+
+        exhausted = {cid: names_by_id[cid] for cid in category_ids
+                     if cid in names_by_id and cid not in unwatched_by_id}
+        fallback_by_name = video_catalog.get_videos_by_category(exhausted.values()) if exhausted else {}
+        fallback_by_id = {cid: fallback_by_name.get(name, ()) for cid, name in exhausted.items()}
+
+        return names_by_id, unwatched_by_id, fallback_by_id
+
     @staticmethod
     def select_videos_for_preferences(
         participant_number: str, 
@@ -124,19 +596,16 @@ class VideoSelectionService:
             raise ValueError("Exactly 3 preferences required")
 
         category_ids = [pref.category_id for pref in preferences]
-        videos_by_category = VideoSelectionService.get_unwatched_videos_for_categories(
+        names_by_id, unwatched_by_id, fallback_by_id = VideoSelectionService.get_selection_candidates(
             participant_number, category_ids
         )
         
         chosen_videos = []
         selected_categories = []
         
-        for pref in preferences:
-            category_videos = videos_by_category.get(pref.category_id, [])
-            
-            # Fallback: get any video from this category if no unwatched ones
-            if not category_videos:
-                category_videos = Video.query.filter_by(category_id=pref.category_id).all()
+        for category_id in category_ids:
+            # Fallback: any video from this category if no unwatched ones are left
+            category_videos = unwatched_by_id.get(category_id) or fallback_by_id.get(category_id, ())
             
             if category_videos:
                 video = random.choice(category_videos)
@@ -145,11 +614,248 @@ class VideoSelectionService:
                     'title': video.title,
                     'link': video.url,
                 })
-                selected_categories.append(pref.category.name)
+                selected_categories.append(names_by_id[category_id])
         
         return chosen_videos, selected_categories
 
 
+class PlaylistService:
+    """Service for materializing and reading per-participant playlists."""
+    
+    # How many videos each round shows per category, and which round's watched
+    # videos are excluded when the playlist is drawn.
+    ROUND_SETTINGS = {
+        1: {'limit_per_category': 3, 'exclude_watched_round': None},
+        2: {'limit_per_category': 1, 'exclude_watched_round': 1},
+    }
+
+    @staticmethod
+    def assign_playlist(participant_number: str, round_number: int, category_ids: List[int]) -> int:
+        """
+        Draw the participant's videos for a round and store them in display order.
+        Replaces any earlier playlist for the round and writes the new one with a
+        single bulk insert. The caller is responsible for committing.
+        """
+        settings = PlaylistService.ROUND_SETTINGS[round_number]
+        names_by_id = VideoSelectionService.get_category_names(category_ids)
+        category_names = [names_by_id[cid] for cid in category_ids if cid in names_by_id]
+
+        videos = VideoSelectionService.select_videos(
+            category_names,
+            participant_number=participant_number,
+            exclude_watched_round=settings['exclude_watched_round'],
+            limit_per_category=settings['limit_per_category']
+        )
+
+        PlaylistEntry.query.filter_by(
+            participant_number=participant_number,
+            round_number=round_number
+        ).delete(synchronize_session=False)
+        if videos:
+            db.session.execute(insert(PlaylistEntry), [{
+                'participant_number': participant_number,
+                'round_number': round_number,
+                'position': position,
+                'video_id': video.id,
+                'category_name': video.category_name
+            } for position, video in enumerate(videos)])
+        return len(videos)
+
+    @staticmethod
+    def get_playlist(participant_number: str, round_number: int) -> List[VideoRecord]:
+        """Read a stored playlist in display order with one primary-key range lookup."""
+        rows = db.session.query(
+            Video.id, Video.title, Video.url, Video.category_id, PlaylistEntry.category_name
+        ).select_from(PlaylistEntry).join(Video, Video.id == PlaylistEntry.video_id).filter(
+            PlaylistEntry.participant_number == participant_number,
+            PlaylistEntry.round_number == round_number
+        ).order_by(PlaylistEntry.position).all()
+        return [VideoRecord._make(row) for row in rows]
+
+    @staticmethod
+    def get_playlist_videos(participant_number: str, round_number: int, category_names: List[str]) -> List[Dict]:
+        """
+        Return the API payload for a round's videos.
+        Uses the stored playlist when it matches the requested categories and
+        falls back to drawing videos on the fly for participants without one.
+        """
+        playlist = PlaylistService.get_playlist(participant_number, round_number)
+        if playlist and {video.category_name for video in playlist} <= set(category_names):
+            return VideoSelectionService.serialize_videos(playlist)
+
+        settings = PlaylistService.ROUND_SETTINGS[round_number]
+        return VideoSelectionService.serialize_videos(VideoSelectionService.select_videos(
+            category_names,
+            participant_number=participant_number,
+            exclude_watched_round=settings['exclude_watched_round'],
+            limit_per_category=settings['limit_per_category']
+        ))
+
+
+class ParticipantNumberAllocator:
+    """
+    Allocates unique 5-digit participant numbers from a database sequence.
+
+    Each allocation atomically bumps a single counter row and maps the claimed
+    index onto 10000-99999 with a fixed permutation, so numbers still look
+    random but never collide, even across workers, and cost the same at any
+    enrollment level.
+    """
+
+    SEQUENCE_ID = 1
+    NUMBER_MIN = 10000
+    NUMBER_SPACE = 90000
+    # Coprime with NUMBER_SPACE, so index -> number is a permutation of the space
+    MULTIPLIER = 7919
+    OFFSET = 48271
+
+    @staticmethod
+    def number_for_index(index: int) -> str:
+        """Map a sequence index onto a 5-digit participant number."""
+        allocator = ParticipantNumberAllocator
+        return str(allocator.NUMBER_MIN + (index * allocator.MULTIPLIER + allocator.OFFSET) % allocator.NUMBER_SPACE)
+
+    @staticmethod
+    def _seed_sequence() -> None:
+        """Create the counter row, tolerating a concurrent worker doing the same."""
+        try:
+            with db.session.begin_nested():
+                db.session.add(ParticipantNumberSequence(
+                    id=ParticipantNumberAllocator.SEQUENCE_ID,
+                    next_index=0,
+                    check_existing=db.session.query(Participant.participant_number).first() is not None
+                ))
+        except IntegrityError:
+            pass  # Another worker seeded it first
+
+    @staticmethod
+    def _claim_index() -> Tuple[int, bool]:
+        """Atomically claim the next index. Returns (index, check_existing)."""
+        bump = update(ParticipantNumberSequence).where(
+            ParticipantNumberSequence.id == ParticipantNumberAllocator.SEQUENCE_ID
+        ).values(next_index=ParticipantNumberSequence.next_index + 1)
+
+        for _ in range(2):
+            if db.engine.dialect.update_returning:
+                row = db.session.execute(bump.returning(
+                    ParticipantNumberSequence.next_index, ParticipantNumberSequence.check_existing
+                )).first()
+            else:
+                # The UPDATE holds the row lock until commit, so the read below is ours
+                if db.session.execute(bump).rowcount:
+                    row = db.session.query(
+                        ParticipantNumberSequence.next_index, ParticipantNumberSequence.check_existing
+                    ).filter_by(id=ParticipantNumberAllocator.SEQUENCE_ID).first()
+                else:
+                    row = None
+            if row is not None:
+                return row[0] - 1, row[1]
+            ParticipantNumberAllocator._seed_sequence()
+        raise RuntimeError("Participant number sequence could not be initialized")
+
+    @staticmethod
+    def allocate() -> Tuple[str, int]:
+        """
+        Claim a participant number. Returns (number, numbers remaining).
+        Raises ValueError once the number space is exhausted. The claim becomes
+        permanent when the caller commits the session.
+        """
+        allocator = ParticipantNumberAllocator
+        while True:
+            index, check_existing = allocator._claim_index()
+            if index >= allocator.NUMBER_SPACE:
+                raise ValueError("无法生成唯一的参与者编号。请稍后再试。")
+            number = allocator.number_for_index(index)
+            # Only databases that predate the sequence can hold a clashing number
+            if not check_existing or db.session.get(Participant, number) is None:
+                return number, allocator.NUMBER_SPACE - index - 1
+
+    @staticmethod
+    def remaining() -> int:
+        """How many participant numbers can still be allocated."""
+        next_index = db.session.query(ParticipantNumberSequence.next_index).filter_by(
+            id=ParticipantNumberAllocator.SEQUENCE_ID
+        ).scalar()
+        return max(ParticipantNumberAllocator.NUMBER_SPACE - (next_index or 0), 0)
+
+
+class WatchTimeService:
+    """Service for recording watch time with atomic, dialect-aware upserts."""
+
+    UNIQUE_COLUMNS = ['participant_number', 'round_number', 'video_id']
+
+    @staticmethod
+    def compute_percentage(time_spent: float, duration: Optional[float]) -> Optional[float]:
+        """Percentage of a video watched, capped at 100, or None if the duration is unknown."""
+        if duration and duration > 0 and time_spent > 0:
+            return min((time_spent / duration) * 100, 100)
+        return None
+
+    @staticmethod
+    def _build_upsert(dialect=None):
+        """
+        Build an INSERT that adds to `time_spent` on conflict instead of failing.
+
+        The conflict branch adds the delta's own percentage to the stored one,
+        capping the sum at 100. Below the cap the stored percentage is exact, so
+        this equals recomputing it from the new total, without reading the
+        video's duration. The branch has no bound parameters of its own: with
+        PyMySQL, executemany rewrites the VALUES clause per row and appends the
+        ON DUPLICATE KEY UPDATE clause as is.
+        """
+        table = WatchingTime.__table__
+        stmt, inserted = _dialect_insert(table, dialect)
+        zero, cap = literal_column('0'), literal_column('100')
+
+        new_percentage = func.coalesce(table.c.percentage_watched, zero) + inserted.percentage_watched
+        percentage = case(
+            (inserted.percentage_watched.is_(None), table.c.percentage_watched),
+            (new_percentage > cap, cap),
+            else_=new_percentage
+        )
+
+        return _on_conflict_update(stmt, WatchTimeService.UNIQUE_COLUMNS, [
+            ('percentage_watched', percentage),
+            ('time_spent', table.c.time_spent + inserted.time_spent),
+            ('updated_at', inserted.updated_at),
+        ], dialect)
+
+    @staticmethod
+    def build_row(participant_number: str, video_id: int, round_number: int,
+                  watch_duration: float, video_duration: Optional[float]) -> Dict[str, Any]:
+        """Parameters for one upserted watch-time delta."""
+        return {
+            'participant_number': participant_number,
+            'video_id': video_id,
+            'round_number': round_number,
+            'time_spent': watch_duration,
+            'percentage_watched': WatchTimeService.compute_percentage(watch_duration, video_duration),
+            'timestamp': datetime.utcnow(),
+            'video_duration': video_duration,
+        }
+
+    @staticmethod
+    def upsert(rows: List[Dict[str, Any]]) -> None:
+        """
+        Apply watch-time deltas built with `build_row`. The caller commits.
+
+        `updated_at` is stamped here rather than when the rows were built, so a
+        buffered delta that is retried after a failed flush still lands after
+        the incremental export's watermark.
+        """
+        if rows:
+            now = datetime.utcnow()
+            db.session.execute(WatchTimeService._build_upsert(), [dict(row, updated_at=now) for row in rows])
+
+    @staticmethod
+    def record(rows: List[Dict[str, Any]]) -> None:
+        """Upsert watch-time deltas now, or hand them to the write-behind buffer when it is enabled."""
+        if APP_CONFIG.watch_time_write_behind:
+            watch_time_buffer.add(rows)
+        else:
+            serialized_writer.run(WatchTimeService.upsert, rows)
+
+
 class ParticipantService:
     """Service for participant-related operations."""
     
@@ -161,16 +867,37 @@ class ParticipantService:
             round_number=round_number
         ).all()
 
+    @staticmethod
+    def get_selected_category_names(participant_number: str, round_number: int) -> List[str]:
+        """Names of the categories a participant chose for a round, in one joined query."""
+        return [name for (name,) in db.session.query(VideoCategory.name).join(
+            Preference, Preference.category_id == VideoCategory.id
+        ).filter(
+            Preference.participant_number == participant_number,
+            Preference.round_number == round_number
+        ).order_by(Preference.id).all()]
+
+    @staticmethod
+    def mark_completed(participant_number: str) -> None:
+        """Record when the participant first reached the end of the study. The caller commits."""
+        now = datetime.utcnow()
+        db.session.execute(
+            update(Participant)
+            .where(Participant.participant_number == participant_number, Participant.completed_at.is_(None))
+            .values(completed_at=now, updated_at=now)
+        )
+
     @staticmethod
     def get_remaining_categories(participant_number: str, round_number: int = 1) -> List[VideoCategory]:
         """Get categories not selected in a previous round."""
         selected_categories = ParticipantService.get_participant_preferences(participant_number, round_number)
         selected_category_ids = [pref.category_id for pref in selected_categories]
         
+        # Lists nearly every category, so reading the small table in full is intended
         return VideoCategory.query.filter(
             VideoCategory.name != 'info',
             ~VideoCategory.id.in_(selected_category_ids) if selected_category_ids else True
-        ).all()
+        ).execution_options(**{FULL_SCAN_OPTION: True}).all()
 
 
 class AdditionalInfoService:
@@ -31,6 +31,23 @@ function initVideoPlayer(options) {
     let currentPosition = 0;  // Track current playback position for better seek handling
     let lastRecordedPosition = 0;  // Track the last recorded position for seek detection
 
+    // Watch-time deltas are queued and sent to the batch endpoint together
+    const WATCH_TIME_BATCH_ENDPOINT = '/api/record_watch_time/batch';
+    const WATCH_TIME_FLUSH_INTERVAL_MS = 15000;  // Flush at least this often
+    const WATCH_TIME_MAX_QUEUE = 10;             // Flush early once this many deltas are queued
+    const WATCH_TIME_MAX_BATCH = 100;            // Entries the batch endpoint accepts per request
+    let watchTimeQueue = [];
+
+    // Reaction clicks are debounced and sent to /api/user_interaction as one batch
+    const INTERACTION_DEBOUNCE_MS = 800;
+    const INVERSE_ACTIONS = {
+        like: 'remove_like', remove_like: 'like',
+        dislike: 'remove_dislike', remove_dislike: 'dislike',
+        star: 'star_remove', star_remove: 'star'
+    };
+    let pendingInteractions = [];
+    let interactionFlushTimer = null;
+
     // Initialize the page
     document.addEventListener('DOMContentLoaded', function() {
         // Get UI elements
@@ -55,6 +72,9 @@ function initVideoPlayer(options) {
         
         // Set up page unload handler
         window.addEventListener('beforeunload', saveWatchTimeBeforeUnload);
+
+        // Periodically send queued watch time
+        setInterval(flushWatchTimeQueue, WATCH_TIME_FLUSH_INTERVAL_MS);
     });
 
     // Fetch videos from server
@@ -103,8 +123,9 @@ function initVideoPlayer(options) {
 
     // Main function to display a video
     async function showVideo(index) {
-        // 1. Record any current watch time before switching
+        // 1. Record any current watch time and pending reactions before switching
         await recordCurrentWatchTime();
+        flushInteractions();
         // 2. Clean up existing video element
         cleanupVideoElement();
         
@@ -158,27 +179,13 @@ function initVideoPlayer(options) {
             
             // Only record if there is actual watch time
             if (watchTime > 0) {
-                try {
-                    const response = await fetch('/api/record_watch_time', {
-                        method: 'POST',
-                        headers: { 'Content-Type': 'application/json' },
-                        body: JSON.stringify({
-                            video_id: currentVideoId,
-                            watch_duration: watchTime,
-                            round_number: config.roundNumber,
-                            current_position: currentPosition
-                        })
-                    });
-                    const data = await response.json();
-                    console.log('Watch time recorded for video ID:', currentVideoId, 
-                                'Duration:', watchTime, 
-                                'Position:', currentPosition);
-                    
-                    // Update last recorded position
-                    lastRecordedPosition = currentPosition;
-                } catch (error) {
-                    console.error('Error recording watch time:', error);
-                }
+                queueWatchTime(currentVideoId, watchTime, currentPosition);
+                console.log('Watch time queued for video ID:', currentVideoId, 
+                            'Duration:', watchTime, 
+                            'Position:', currentPosition);
+                
+                // Update last recorded position
+                lastRecordedPosition = currentPosition;
             }
             
             // Reset tracking variables
@@ -187,6 +194,51 @@ function initVideoPlayer(options) {
         }
     }
 
+    // Add a watch-time delta to the queue, flushing early if the queue is full
+    function queueWatchTime(videoId, duration, position) {
+        watchTimeQueue.push({
+            video_id: videoId,
+            watch_duration: duration,
+            round_number: config.roundNumber,
+            current_position: position
+        });
+        if (watchTimeQueue.length >= WATCH_TIME_MAX_QUEUE) {
+            flushWatchTimeQueue();
+        }
+    }
+
+    // Send all queued watch-time deltas in one request
+    async function flushWatchTimeQueue() {
+        if (watchTimeQueue.length === 0) {
+            return;
+        }
+        const entries = watchTimeQueue.splice(0, WATCH_TIME_MAX_BATCH);
+        
+        try {
+            const response = await fetch(WATCH_TIME_BATCH_ENDPOINT, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ entries: entries })
+            });
+            if (response.status >= 500) {
+                throw new Error(`Server error ${response.status}`);
+            }
+            if (!response.ok) {
+                // Drop only the entries the server can never accept and retry the rest
+                const result = await response.json().catch(() => ({}));
+                const rejected = new Set(result.rejected || []);
+                console.warn('Watch time batch rejected:', result.message, 'dropping', rejected.size, 'entries');
+                watchTimeQueue = entries.filter((entry, index) => !rejected.has(index)).concat(watchTimeQueue);
+                return;
+            }
+            console.log('Watch time batch recorded:', entries.length, 'entries');
+        } catch (error) {
+            // Keep the deltas for the next flush
+            console.error('Error recording watch time batch:', error);
+            watchTimeQueue = entries.concat(watchTimeQueue);
+        }
+    }
+
     // Clean up the current video element
     function cleanupVideoElement() {
         if (videoElement) {
@@ -384,20 +436,8 @@ function initVideoPlayer(options) {
                     currentPosition = Math.round(videoElement.currentTime);
                 }
                 
-                // Send watch time data
-                const response = await fetch('/api/record_watch_time', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({
-                        video_id: finalVideoId,
-                        watch_duration: watchTime,
-                        round_number: config.roundNumber,
-                        current_position: currentPosition
-                    })
-                });
-                
-                const data = await response.json();
-                console.log('Final watch time recorded for video ID:', finalVideoId);
+                queueWatchTime(finalVideoId, watchTime, currentPosition);
+                console.log('Final watch time queued for video ID:', finalVideoId);
                 
                 // Reset tracking variables
                 watchStartTime = null;
@@ -407,6 +447,9 @@ function initVideoPlayer(options) {
             }
         }
         
+        // Send everything still queued before leaving the page
+        await Promise.all([flushWatchTimeQueue(), flushInteractions()]);
+        
         // Stop all media elements on the page
         document.querySelectorAll('video, audio').forEach(media => {
             media.pause();
@@ -431,13 +474,23 @@ function initVideoPlayer(options) {
                 finalPosition = Math.round(videoElement.currentTime);
             }
             
-            // Use sendBeacon for reliable data transmission during page unload
-            navigator.sendBeacon('/api/record_watch_time', JSON.stringify({
+            watchTimeQueue.push({
                 video_id: videoId,
                 watch_duration: duration,
                 round_number: config.roundNumber,
                 current_position: finalPosition
-            }));
+            });
+        }
+        
+        // Use sendBeacon for reliable data transmission during page unload
+        if (watchTimeQueue.length > 0) {
+            navigator.sendBeacon(WATCH_TIME_BATCH_ENDPOINT, JSON.stringify({ entries: watchTimeQueue }));
+            watchTimeQueue = [];
+        }
+        if (pendingInteractions.length > 0) {
+            clearTimeout(interactionFlushTimer);
+            navigator.sendBeacon('/api/user_interaction', JSON.stringify({ actions: pendingInteractions }));
+            pendingInteractions = [];
         }
     }
 
@@ -466,7 +519,7 @@ function initVideoPlayer(options) {
                 if (button.classList.contains('like')) {
                     button.classList.remove('like');
                     iconElement.textContent = 'thumb_up_off_alt';
-                    sendInteraction(videoId, 'remove_like');
+                    queueInteraction(videoId, 'remove_like');
                 } else {
                     button.classList.add('like');
                     iconElement.textContent = 'thumb_up';
@@ -476,10 +529,10 @@ function initVideoPlayer(options) {
                     if (dislikeBtn.classList.contains('dislike')) {
                         dislikeBtn.classList.remove('dislike');
                         dislikeBtn.querySelector('.material-icons-outlined').textContent = 'thumb_down_off_alt';
-                        sendInteraction(videoId, 'remove_dislike');
+                        queueInteraction(videoId, 'remove_dislike');
                     }
                     
-                    sendInteraction(videoId, 'like');
+                    queueInteraction(videoId, 'like');
                 }
                 break;
                 
@@ -487,7 +540,7 @@ function initVideoPlayer(options) {
                 if (button.classList.contains('dislike')) {
                     button.classList.remove('dislike');
                     iconElement.textContent = 'thumb_down_off_alt';
-                    sendInteraction(videoId, 'remove_dislike');
+                    queueInteraction(videoId, 'remove_dislike');
                 } else {
                     button.classList.add('dislike');
                     iconElement.textContent = 'thumb_down';
@@ -497,10 +550,10 @@ function initVideoPlayer(options) {
                     if (likeBtn.classList.contains('like')) {
                         likeBtn.classList.remove('like');
                         likeBtn.querySelector('.material-icons-outlined').textContent = 'thumb_up_off_alt';
-                        sendInteraction(videoId, 'remove_like');
+                        queueInteraction(videoId, 'remove_like');
                     }
                     
-                    sendInteraction(videoId, 'dislike');
+                    queueInteraction(videoId, 'dislike');
                 }
                 break;
                 
@@ -508,11 +561,11 @@ function initVideoPlayer(options) {
                 if (button.classList.contains('star')) {
                     button.classList.remove('star');
                     iconElement.textContent = 'star_border';
-                    sendInteraction(videoId, 'star_remove');
+                    queueInteraction(videoId, 'star_remove');
                 } else {
                     button.classList.add('star');
                     iconElement.textContent = 'star';
-                    sendInteraction(videoId, 'star');
+                    queueInteraction(videoId, 'star');
                 }
                 break;
         }
@@ -538,6 +591,40 @@ function initVideoPlayer(options) {
             });
     }
 
+    // Queue a reaction, cancelling it against a pending inverse toggle of the same video
+    function queueInteraction(videoId, action) {
+        const last = pendingInteractions[pendingInteractions.length - 1];
+        if (last && last.video_id === videoId && INVERSE_ACTIONS[last.action] === action) {
+            pendingInteractions.pop();
+        } else {
+            pendingInteractions.push({ video_id: videoId, action: action });
+        }
+        
+        clearTimeout(interactionFlushTimer);
+        interactionFlushTimer = setTimeout(flushInteractions, INTERACTION_DEBOUNCE_MS);
+    }
+
+    // Send all pending reactions in one request
+    function flushInteractions() {
+        clearTimeout(interactionFlushTimer);
+        if (pendingInteractions.length === 0) {
+            return Promise.resolve();
+        }
+        const actions = pendingInteractions;
+        pendingInteractions = [];
+        console.log('Sending Interactions:', actions);
+        
+        return fetch('/api/user_interaction', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ actions: actions })
+        })
+        .then(res => res.json())
+        .catch(error => {
+            console.error('Error sending interactions:', error);
+        });
+    }
+
     // Send interaction to server
     function sendInteraction(videoId, action, commentText = '') {
         console.log('Sending Interaction:', { video_id: videoId, action, comment: commentText });
@@ -0,0 +1,128 @@
+"""
+Wide-format participant dataset for analysis: one row per participant.
+
+Each source table is read once with a single query and the per-participant
+columns are built with pandas group-bys and pivots, instead of walking the
+lazy relationships on `Participant` (one query per participant and table).
+"""
+import os
+from typing import Dict, Optional
+
+import click
+import pandas as pd
+from sqlalchemy import select
+
+from models import (ConsistencyAnswer, Participant, Preference, VideoCategory, VideoInteraction,
+                    VideoReaction, WatchingTime)
+from study_export import reporting_engine
+
+ROUNDS = (1, 2)
+WATCH_SUMMARIES = ('watch_time', 'videos_watched', 'mean_percentage_watched')
+DATASET_FORMATS = ('csv', 'parquet')
+
+DATASET_QUERIES = {
+    'participant': select(Participant.participant_number, Participant.group_number,
+                          Participant.timestamp.label('enrolled_at')),
+    'preference': select(Preference.participant_number, Preference.round_number,
+                         VideoCategory.name.label('category'), Preference.rating)
+                  .join(VideoCategory, Preference.category_id == VideoCategory.id),
+    'watching_time': select(WatchingTime.participant_number, WatchingTime.round_number,
+                            WatchingTime.time_spent, WatchingTime.percentage_watched),
+    'reaction': select(VideoReaction.participant_number, VideoReaction.liked,
+                       VideoReaction.disliked, VideoReaction.starred),
+    'comment': select(VideoInteraction.participant_number).where(VideoInteraction.action == 'comment'),
+    'consistency': select(ConsistencyAnswer.id, ConsistencyAnswer.participant_number,
+                          ConsistencyAnswer.question_number, ConsistencyAnswer.answer),
+}
+
+
+def load_tables(engine=None) -> Dict[str, pd.DataFrame]:
+    """Read every source table with one query each into a DataFrame."""
+    tables = {}
+    with (engine or reporting_engine()).connect() as conn:
+        for name, statement in DATASET_QUERIES.items():
+            result = conn.execute(statement)
+            tables[name] = pd.DataFrame.from_records(result.all(), columns=list(result.keys()))
+    return tables
+
+
+def _ratings(preferences: pd.DataFrame) -> Optional[pd.DataFrame]:
+    if preferences.empty:
+        return None
+    ratings = preferences.pivot_table(index='participant_number', columns=['round_number', 'category'],
+                                      values='rating', aggfunc='last')
+    ratings.columns = [f"rating_r{round_number}_{category}" for round_number, category in ratings.columns]
+    return ratings
+
+
+def _watching(watching_time: pd.DataFrame) -> pd.DataFrame:
+    summary = (watching_time.groupby(['participant_number', 'round_number'])
+               .agg(watch_time=('time_spent', 'sum'),
+                    videos_watched=('time_spent', 'size'),
+                    mean_percentage_watched=('percentage_watched', 'mean'))
+               .unstack('round_number'))
+    summary = summary.reindex(columns=pd.MultiIndex.from_product([WATCH_SUMMARIES, ROUNDS]))
+    summary.columns = [f"{name}_r{round_number}" for name, round_number in summary.columns]
+    return summary
+
+
+def _reactions(reactions: pd.DataFrame, comments: pd.DataFrame) -> pd.DataFrame:
+    counts = (reactions.astype({'liked': int, 'disliked': int, 'starred': int})
+              .groupby('participant_number')[['liked', 'disliked', 'starred']].sum()
+              .rename(columns={'liked': 'likes', 'disliked': 'dislikes', 'starred': 'stars'}))
+    return counts.join(comments.groupby('participant_number').size().rename('comments'), how='outer')
+
+
+def _consistency(answers: pd.DataFrame) -> Optional[pd.DataFrame]:
+    if answers.empty:
+        return None
+    latest = answers.sort_values('id').drop_duplicates(['participant_number', 'question_number'], keep='last')
+    wide = latest.pivot(index='participant_number', columns='question_number', values='answer')
+    wide.columns = [f"consistency_q{question}" for question in wide.columns]
+    return wide
+
+
+def build_participant_dataset(tables: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Join the per-participant summaries of each table onto the participant list."""
+    dataset = tables['participant'].set_index('participant_number')
+    parts = [
+        _ratings(tables['preference']),
+        _watching(tables['watching_time']),
+        _reactions(tables['reaction'], tables['comment']),
+        _consistency(tables['consistency']),
+    ]
+    dataset = dataset.join([part for part in parts if part is not None], how='left')
+
+    # Participants without rows in a table watched or reacted to nothing
+    count_columns = [column for column in dataset.columns
+                     if column.startswith(('watch_time_', 'videos_watched_'))
+                     or column in ('likes', 'dislikes', 'stars', 'comments')]
+    dataset[count_columns] = dataset[count_columns].fillna(0)
+    int_columns = [column for column in count_columns if not column.startswith('watch_time_')]
+    dataset[int_columns] = dataset[int_columns].astype(int)
+    return dataset.sort_index().reset_index()
+
+
+def write_dataset(dataset: pd.DataFrame, path: str, dataset_format: str) -> None:
+    """Write the dataset as CSV or Parquet (Parquet needs pyarrow installed)."""
+    tmp_path = f"{path}.tmp"
+    if dataset_format == 'parquet':
+        dataset.to_parquet(tmp_path, index=False)
+    else:
+        dataset.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+@click.command('build-dataset')
+@click.argument('output', type=click.Path(dir_okay=False))
+@click.option('--format', 'dataset_format', type=click.Choice(DATASET_FORMATS),
+              help='Defaults to the extension of OUTPUT, else csv.')
+def build_dataset_command(output: str, dataset_format: Optional[str]):
+    """Build the one-row-per-participant dataset and write it to OUTPUT."""
+    dataset_format = dataset_format or ('parquet' if output.endswith('.parquet') else 'csv')
+    dataset = build_participant_dataset(load_tables())
+    try:
+        write_dataset(dataset, output, dataset_format)
+    except ImportError as e:
+        raise click.ClickException(f"Parquet output needs pyarrow: {str(e)}")
+    click.echo(f"Wrote {len(dataset)} participants x {len(dataset.columns)} columns to {output}")
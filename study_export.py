@@ -0,0 +1,191 @@
+"""
+Streaming export of study data as CSV or JSONL.
+
+Rows are read in chunks with `yield_per` (a server-side cursor on MySQL and
+Postgres) and written out chunk by chunk, so memory use does not grow with
+the size of the study. Used by the `flask export-data` command and the
+/admin/export endpoint.
+
+The incremental mode keeps a watermark per table in `ExportWatermark` and
+only exports rows whose change column is past it, so a nightly run costs as
+much as the day's activity. `WatchingTime` rows grow after they are first
+written, so they are tracked by `updated_at` and may be exported again;
+consumers should upsert by `id`.
+"""
+import csv
+import io
+import json
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, Optional
+
+import click
+from sqlalchemy import select
+
+from config import APP_CONFIG, db
+from db_routing import REPLICA_BIND
+from models import (ConsistencyAnswer, CopingStrategy, ExportWatermark, MessageTime, Participant,
+                    Preference, VideoInteraction, WatchingTime)
+from query_inspector import FULL_SCAN_OPTION
+
+EXPORT_TABLES = {
+    model.__tablename__: model.__table__
+    for model in (Participant, Preference, WatchingTime, VideoInteraction,
+                  MessageTime, ConsistencyAnswer, CopingStrategy)
+}
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+DEFAULT_CHUNK_SIZE = 1000
+
+# Column recording when a row last changed. Preferences have none (they are
+# replaced wholesale when a participant re-rates), so they are always exported in full.
+CHANGE_COLUMNS = {
+    'participant': 'updated_at',
+    'watching_time': 'updated_at',
+    'video_interaction': 'timestamp',
+    'message_time': 'timestamp',
+    'consistency_answer': 'timestamp',
+    'coping_strategy': 'timestamp',
+}
+
+
+def reporting_engine():
+    """Exports read from the replica when one is configured."""
+    return db.engines.get(REPLICA_BIND) or db.engine
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def iter_chunks(table_name: str, chunk_size: int = DEFAULT_CHUNK_SIZE, engine=None,
+                changed_after: Optional[datetime] = None,
+                changed_until: Optional[datetime] = None) -> Iterator[list]:
+    """
+    Yield the rows of an export table, `chunk_size` rows at a time. With a
+    change window (`changed_after`, `changed_until`], only rows changed in it
+    are read, in change order so the range is served by the column's index;
+    otherwise the whole table is read in primary-key order.
+    """
+    table = EXPORT_TABLES[table_name]
+    statement = select(table)
+    full_scan = True
+    if table_name in CHANGE_COLUMNS and (changed_after is not None or changed_until is not None):
+        changed = table.c[CHANGE_COLUMNS[table_name]]
+        if changed_after is not None:
+            statement = statement.where(changed > changed_after)
+        if changed_until is not None:
+            statement = statement.where(changed <= changed_until)
+        statement = statement.order_by(changed, *table.primary_key.columns)
+        full_scan = False
+    else:
+        statement = statement.order_by(*table.primary_key.columns)
+    with (engine or reporting_engine()).connect() as conn:
+        result = conn.execution_options(yield_per=chunk_size, **{FULL_SCAN_OPTION: full_scan}).execute(statement)
+        for partition in result.partitions():
+            yield partition
+
+
+def stream_export(table_name: str, export_format: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  **window) -> Iterator[str]:
+    """
+    Yield an export table as CSV or JSONL text, one chunk of rows per piece.
+    `window` takes the `engine`, `changed_after` and `changed_until` arguments of `iter_chunks`.
+    """
+    if table_name not in EXPORT_TABLES:
+        raise ValueError(f"Unknown table {table_name!r}; choose from {', '.join(EXPORT_TABLES)}")
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format {export_format!r}; choose from {', '.join(EXPORT_FORMATS)}")
+
+    columns = [column.name for column in EXPORT_TABLES[table_name].columns]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == 'csv' else None
+    if writer:
+        writer.writerow(columns)
+
+    for rows in iter_chunks(table_name, chunk_size, **window):
+        for row in rows:
+            if writer:
+                writer.writerow([_plain(value) for value in row])
+            else:
+                buffer.write(json.dumps({name: _plain(value) for name, value in zip(columns, row)},
+                                        ensure_ascii=False))
+                buffer.write('\n')
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_to_file(table_name: str, export_format: str, path: str,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE, **window) -> int:
+    """Write one export table to `path`. Returns the number of bytes written."""
+    written = 0
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        for piece in stream_export(table_name, export_format, chunk_size, **window):
+            f.write(piece)
+            written += len(piece)
+    os.replace(tmp_path, path)
+    return written
+
+
+def export_incremental(output_dir: str, export_format: str, tables=None,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE, now: Optional[datetime] = None) -> Dict[str, str]:
+    """
+    Export the rows changed since each table's watermark to
+    `<table>-<until>.<format>` files and advance the watermarks.
+
+    The window ends `export_watermark_lag_seconds` before `now` so that rows
+    committed late with an earlier timestamp are not skipped. Reads go to the
+    primary: a lagging replica could miss rows below the new watermark.
+    Returns {table: path} for the files written.
+    """
+    until = (now or datetime.utcnow()) - timedelta(seconds=APP_CONFIG.export_watermark_lag_seconds)
+    os.makedirs(output_dir, exist_ok=True)
+    written = {}
+    for table_name in tables or EXPORT_TABLES:
+        watermark = db.session.get(ExportWatermark, table_name)
+        changed_after = watermark.exported_until if watermark else None
+        if changed_after is not None and changed_after >= until:
+            continue
+        path = os.path.join(output_dir, f"{table_name}-{until.strftime('%Y%m%dT%H%M%S')}.{export_format}")
+        export_to_file(table_name, export_format, path, chunk_size, engine=db.engine,
+                       changed_after=changed_after, changed_until=until)
+        written[table_name] = path
+
+        # Advance only once the file is in place, so a failed run is retried in full
+        if table_name in CHANGE_COLUMNS:
+            if watermark is None:
+                db.session.add(ExportWatermark(table_name=table_name, exported_until=until))
+            else:
+                watermark.exported_until = until
+            db.session.commit()
+    return written
+
+
+@click.command('export-data')
+@click.argument('output_dir', type=click.Path(file_okay=False))
+@click.option('--format', 'export_format', type=click.Choice(list(EXPORT_FORMATS)), default='csv')
+@click.option('--table', 'tables', multiple=True, type=click.Choice(list(EXPORT_TABLES)),
+              help='Table to export; repeat for several. Defaults to every study table.')
+@click.option('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, show_default=True)
+@click.option('--incremental', is_flag=True,
+              help='Only export rows changed since the last incremental run.')
+def export_data_command(output_dir: str, export_format: str, tables, chunk_size: int, incremental: bool):
+    """Stream study tables to OUTPUT_DIR as one CSV or JSONL file per table."""
+    if incremental:
+        for table_name, path in export_incremental(output_dir, export_format, tables, chunk_size).items():
+            click.echo(f"Exported {table_name} changes to {path}")
+        return
+    os.makedirs(output_dir, exist_ok=True)
+    for table_name in tables or EXPORT_TABLES:
+        path = os.path.join(output_dir, f"{table_name}.{export_format}")
+        export_to_file(table_name, export_format, path, chunk_size)
+        click.echo(f"Exported {table_name} to {path}")
@@ -12,6 +12,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # add db= [sq]
 from config import app as flask_app, db
 from models import Participant, Video, VideoCategory, Preference, WatchingTime
+from catalog import video_catalog, video_durations
 
 os.environ['DATABASE_URL'] = 'sqlite:///:memory:' 
 
@@ -41,6 +42,9 @@ def app():
         db.create_all()
         # Set up basic test data
         _setup_test_data()
+        # Every test starts from a fresh catalog, so drop any cached copy
+        video_catalog.clear()
+        video_durations.clear()
         yield flask_app
         # Clean up
         db.session.remove()
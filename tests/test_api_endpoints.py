@@ -216,15 +216,32 @@ def test_api_user_interaction_remove_actions(authenticated_client, app):
     data = json.loads(response.data)
     assert data['success'] is True
     
-    # Check that it was removed from database
+    # Check that the like was removed from the current state
     with app.app_context():
-        interaction = VideoInteraction.query.filter_by(
-            participant_number='10001',
-            video_id=10102,
-            action='like'
-        ).first()
+        from services import VideoInteractionService
+        state = VideoInteractionService.get_reaction_state('10001', 10102)
+        assert state['liked'] is False
         
-        assert interaction is None
+        # The history keeps both actions
+        actions = [i.action for i in VideoInteraction.query.filter_by(
+            participant_number='10001',
+            video_id=10102
+        ).order_by(VideoInteraction.id).all()]
+        assert actions == ['like', 'remove_like']
+
+def test_api_user_interaction_reaction_state(authenticated_client, app):
+    """Test that reaction clicks keep exactly one state row per video"""
+    for action in ['like', 'dislike', 'star', 'star', 'remove_dislike']:
+        response = authenticated_client.post('/api/user_interaction',
+            json={'video_id': 10103, 'action': action})
+        assert response.status_code == 200
+
+    with app.app_context():
+        from models import VideoReaction
+        reactions = VideoReaction.query.filter_by(participant_number='10001', video_id=10103).all()
+        assert len(reactions) == 1
+        assert (reactions[0].liked, reactions[0].disliked, reactions[0].starred) == (False, False, True)
+        assert VideoInteraction.query.filter_by(video_id=10103).count() == 5
 
 def test_api_user_interaction_invalid_action(authenticated_client):
     """Test user interaction API with invalid action"""
@@ -236,6 +253,35 @@ def test_api_user_interaction_invalid_action(authenticated_client):
     
     assert response.status_code == 400
 
+def test_api_user_interaction_plain_text_beacon(authenticated_client, app):
+    """Test that the unload beacon's JSON is accepted without a JSON content type"""
+    response = authenticated_client.post('/api/user_interaction',
+        data=json.dumps({'actions': [{'video_id': 10101, 'action': 'like'}]}),
+        content_type='text/plain;charset=UTF-8')
+    assert response.status_code == 200
+    assert response.get_json()['recorded'] == 1
+
+    response = authenticated_client.post('/api/user_interaction', data='not json', content_type='text/plain')
+    assert response.status_code == 400
+
+def test_api_user_interaction_unknown_video(authenticated_client, app):
+    """Test that interactions with a video that does not exist are rejected before writing"""
+    response = authenticated_client.post('/api/user_interaction', json={'video_id': 999999, 'action': 'like'})
+    assert response.status_code == 400
+
+    response = authenticated_client.post('/api/user_interaction', json={'video_id': 'abc', 'action': 'like'})
+    assert response.status_code == 400
+
+    response = authenticated_client.post('/api/user_interaction',
+        json={'actions': [
+            {'video_id': 10101, 'action': 'like'},
+            {'video_id': 999999, 'action': 'comment', 'comment': 'hi'},
+        ]})
+    assert response.status_code == 400
+
+    with app.app_context():
+        assert VideoInteraction.query.count() == 0
+
 def test_api_user_interaction_empty_comment(authenticated_client):
     """Test user interaction API with empty comment"""
     response = authenticated_client.post('/api/user_interaction',
@@ -246,3 +292,110 @@ def test_api_user_interaction_empty_comment(authenticated_client):
         })
     
     assert response.status_code == 400
+
+def test_api_record_watch_time_batch(app, authenticated_client):
+    """Test that a batch of deltas is merged and recorded in one request"""
+    response = authenticated_client.post('/api/record_watch_time/batch',
+        data=json.dumps({'entries': [
+            {'video_id': 10101, 'watch_duration': 5, 'round_number': 1, 'current_position': 5},
+            {'video_id': 10102, 'watch_duration': 30, 'round_number': 1},
+            {'video_id': 10101, 'watch_duration': 4.5, 'round_number': 1, 'current_position': 10},
+        ]}),
+        content_type='application/json')
+
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['status'] == 'success'
+    assert data['recorded'] == 3
+
+    with app.app_context():
+        records = {r.video_id: r for r in WatchingTime.query.filter_by(participant_number='10001').all()}
+        assert records[10101].time_spent == 9.5
+        assert records[10101].percentage_watched == pytest.approx(21.11, 0.01)  # 9.5/45 * 100
+        assert records[10102].time_spent == 30
+        assert records[10102].percentage_watched == pytest.approx(50.0)  # 30/60 * 100
+
+def test_api_record_watch_time_batch_rejects_whole_batch(app, authenticated_client):
+    """Test that one invalid entry keeps the whole batch from being written"""
+    # Unknown video; the response names the entries the player should drop
+    response = authenticated_client.post('/api/record_watch_time/batch',
+        data=json.dumps({'entries': [
+            {'video_id': 10101, 'watch_duration': 5, 'round_number': 1},
+            {'video_id': 999999, 'watch_duration': 5, 'round_number': 1},
+        ]}),
+        content_type='application/json')
+    assert response.status_code == 400
+    assert response.get_json()['rejected'] == [1]
+
+    # Malformed entry
+    response = authenticated_client.post('/api/record_watch_time/batch',
+        data=json.dumps({'entries': [
+            {'video_id': 10101, 'watch_duration': 5, 'round_number': 1},
+            {'video_id': 10102, 'round_number': 1},
+        ]}),
+        content_type='application/json')
+    assert response.status_code == 400
+    assert response.get_json()['rejected'] == [1]
+
+    # Empty batch
+    response = authenticated_client.post('/api/record_watch_time/batch',
+        data=json.dumps({'entries': []}),
+        content_type='application/json')
+    assert response.status_code == 400
+
+    with app.app_context():
+        assert WatchingTime.query.filter_by(participant_number='10001').count() == 0
+
+def test_api_record_watch_time_batch_rejects_non_finite_and_bad_rounds(app, authenticated_client):
+    """Test that NaN or infinite durations and rounds other than 1 and 2 are rejected"""
+    for entry in ({'video_id': 10101, 'watch_duration': float('nan'), 'round_number': 1},
+                  {'video_id': 10101, 'watch_duration': float('inf'), 'round_number': 1},
+                  {'video_id': 10101, 'watch_duration': 'NaN', 'round_number': 1},
+                  {'video_id': 10101, 'watch_duration': 5, 'round_number': 3},
+                  {'video_id': 10101, 'watch_duration': 5, 'round_number': 0}):
+        response = authenticated_client.post('/api/record_watch_time/batch',
+            data=json.dumps({'entries': [entry]}),
+            content_type='application/json')
+        assert response.status_code == 400, entry
+
+    with app.app_context():
+        assert WatchingTime.query.filter_by(participant_number='10001').count() == 0
+
+def test_api_user_interaction_batch_reduces_to_final_state(authenticated_client, app):
+    """Test that an ordered batch of toggles is folded into the final reaction state"""
+    response = authenticated_client.post('/api/user_interaction',
+        json={'actions': [
+            {'video_id': 10101, 'action': 'like'},
+            {'video_id': 10101, 'action': 'dislike'},
+            {'video_id': 10101, 'action': 'remove_dislike'},
+            {'video_id': 10101, 'action': 'star'},
+            {'video_id': 10102, 'action': 'like'},
+            {'video_id': 10102, 'action': 'comment', 'comment': 'Nice'},
+        ]})
+
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['success'] is True
+    assert data['recorded'] == 6
+
+    with app.app_context():
+        from services import VideoInteractionService
+        assert VideoInteractionService.get_reaction_state('10001', 10101) == {
+            'liked': False, 'disliked': False, 'starred': True}
+        assert VideoInteractionService.get_reaction_state('10001', 10102)['liked'] is True
+        assert VideoInteraction.query.filter_by(participant_number='10001').count() == 6
+
+def test_api_user_interaction_batch_validation(authenticated_client, app):
+    """Test that an invalid action rejects the whole batch"""
+    response = authenticated_client.post('/api/user_interaction',
+        json={'actions': [
+            {'video_id': 10101, 'action': 'like'},
+            {'video_id': 10101, 'action': 'invalid_action'},
+        ]})
+    assert response.status_code == 400
+
+    response = authenticated_client.post('/api/user_interaction', json={'actions': []})
+    assert response.status_code == 400
+
+    with app.app_context():
+        assert VideoInteraction.query.count() == 0
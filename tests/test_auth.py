@@ -59,3 +59,51 @@ def test_invalid_group_number(client):
     
     # Should be 404 since route doesn't match negative numbers
     assert response.status_code == 404
+
+def test_participant_numbers_are_unique_and_counted(app):
+    """Test that the allocator hands out distinct numbers and tracks what is left"""
+    from services import ParticipantNumberAllocator
+    from config import db
+
+    with app.app_context():
+        numbers = []
+        for _ in range(50):
+            number, remaining = ParticipantNumberAllocator.allocate()
+            numbers.append(number)
+        db.session.commit()
+
+        assert len(set(numbers)) == 50
+        assert all(len(n) == 5 and 10000 <= int(n) <= 99999 for n in numbers)
+        assert remaining == ParticipantNumberAllocator.NUMBER_SPACE - 50
+        assert ParticipantNumberAllocator.remaining() == remaining
+
+def test_participant_number_allocation_skips_existing_numbers(app):
+    """Test that numbers taken before the sequence existed are never reissued"""
+    from services import ParticipantNumberAllocator
+    from config import db
+
+    with app.app_context():
+        taken = ParticipantNumberAllocator.number_for_index(0)
+        db.session.add(Participant(participant_number=taken, group_number=2))
+        db.session.commit()
+
+        number, _ = ParticipantNumberAllocator.allocate()
+        assert number != taken
+        assert number == ParticipantNumberAllocator.number_for_index(1)
+
+def test_participant_number_space_exhausted(app):
+    """Test that allocation fails cleanly once every number has been used"""
+    from services import ParticipantNumberAllocator
+    from models import ParticipantNumberSequence
+    from config import db
+
+    with app.app_context():
+        db.session.add(ParticipantNumberSequence(
+            id=ParticipantNumberAllocator.SEQUENCE_ID,
+            next_index=ParticipantNumberAllocator.NUMBER_SPACE
+        ))
+        db.session.commit()
+
+        with pytest.raises(ValueError):
+            ParticipantNumberAllocator.allocate()
+        assert ParticipantNumberAllocator.remaining() == 0
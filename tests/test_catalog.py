@@ -0,0 +1,88 @@
+"""
+Tests for the per-worker video catalog cache
+"""
+import pytest
+from catalog import VideoCatalog, VideoRecord
+from models import Video
+from config import db
+
+@pytest.fixture
+def catalog(tmp_path):
+    """A catalog cache whose version file lives in a temporary directory"""
+    return VideoCatalog(str(tmp_path / 'catalog.version'))
+
+def test_catalog_groups_records_by_category(app, catalog):
+    """Test that the cache returns immutable records grouped by category name"""
+    videos = catalog.get_videos_by_category(['humor', 'education', 'nonexistent'])
+
+    assert [v.id for v in videos['humor']] == [10101]
+    assert sorted(v.id for v in videos['education']) == [10104, 19999]
+    assert videos['nonexistent'] == ()
+
+    record = videos['humor'][0]
+    assert isinstance(record, VideoRecord)
+    assert record.url == 'https://example.com/video1'
+    assert record.category_name == 'humor'
+    with pytest.raises(AttributeError):
+        record.title = 'changed'
+
+def test_catalog_serves_cached_copy_until_invalidated(app, catalog):
+    """Test that catalog changes only become visible after invalidation"""
+    catalog.get_videos_by_category(['humor'])
+
+    db.session.add(Video(id=10105, title='Funny Video 2', url='https://example.com/video5',
+                         duration=30, category_id=10001))
+    db.session.commit()
+
+    # Still the cached copy
+    assert [v.id for v in catalog.get_videos_by_category(['humor'])['humor']] == [10101]
+
+    catalog.invalidate()
+    assert [v.id for v in catalog.get_videos_by_category(['humor'])['humor']] == [10101, 10105]
+
+def test_catalog_reloads_when_another_worker_invalidates(app, tmp_path):
+    """Test that invalidation through the shared version file reaches other caches"""
+    version_file = str(tmp_path / 'catalog.version')
+    worker_a = VideoCatalog(version_file)
+    worker_b = VideoCatalog(version_file)
+    worker_b.get_videos_by_category(['humor'])
+
+    db.session.add(Video(id=10105, title='Funny Video 2', url='https://example.com/video5',
+                         duration=30, category_id=10001))
+    db.session.commit()
+    worker_a.invalidate()
+
+    assert [v.id for v in worker_b.get_videos_by_category(['humor'])['humor']] == [10101, 10105]
+
+def test_duration_index_lookup(app, tmp_path):
+    """Test id -> duration lookups, including uncategorized and missing videos"""
+    from catalog import VideoDurationIndex
+
+    db.session.add(Video(id=9999, title='Info', url='https://example.com/info', duration=None))
+    db.session.commit()
+    index = VideoDurationIndex(str(tmp_path / 'catalog.version'))
+
+    assert index.get(10101) == 45
+    assert index.get(19999) == 228
+    assert index.get(9999) == 0  # Exists, duration unknown
+    assert index.get(123456) is None
+
+def test_record_watch_time_skips_catalog_queries(app):
+    """Test that recording watch time only touches WatchingTime once the index is warm"""
+    from sqlalchemy import event
+    from utils import record_watch_time
+
+    record_watch_time('10001', 10101, 5, 1)  # Warms the duration index
+
+    statements = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.lower())
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        success, _ = record_watch_time('10001', 10101, 5, 1)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+
+    assert success is True
+    assert len(statements) == 1
+    assert 'watching_time' in statements[0] and 'from video' not in statements[0]
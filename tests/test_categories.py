@@ -105,9 +105,9 @@ def test_save_preferences_helper(app):
         
         # Save new preferences
         preferences_data = [
-            {'category_id': 2, 'rating': 9},
-            {'category_id': 3, 'rating': 7},
-            {'category_id': 4, 'rating': 5}
+            {'category_id': 10002, 'rating': 9},
+            {'category_id': 10003, 'rating': 7},
+            {'category_id': 10004, 'rating': 5}
         ]
         
         result = save_preferences('10001', 2, preferences_data)
@@ -124,6 +124,6 @@ def test_save_preferences_helper(app):
         
         # Check ratings
         ratings = {p.category_id: p.rating for p in preferences}
-        assert ratings[2] == 9
-        assert ratings[3] == 7
-        assert ratings[4] == 5
+        assert ratings[10002] == 9
+        assert ratings[10003] == 7
+        assert ratings[10004] == 5
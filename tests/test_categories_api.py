@@ -125,9 +125,9 @@ def test_category_preference_ratings(authenticated_client, app):
         # Submit with specific ratings
         authenticated_client.post('/submit_categories',
             data={
-                'rating_1': '10',  # Max rating for humor
-                'rating_2': '5',   # Medium rating for food
-                'rating_3': '1'    # Min rating for travel
+                'rating_10001': '10',  # Max rating for humor
+                'rating_10002': '5',   # Medium rating for food
+                'rating_10003': '1'    # Min rating for travel
             })
         
         # Verify in database
@@ -139,6 +139,6 @@ def test_category_preference_ratings(authenticated_client, app):
         # Convert to dictionary for easier lookup
         ratings = {pref.category_id: pref.rating for pref in prefs}
         
-        assert ratings.get(1) == 10  # humor rating
-        assert ratings.get(2) == 5   # food rating
-        assert ratings.get(3) == 1   # travel rating
+        assert ratings.get(10001) == 10  # humor rating
+        assert ratings.get(10002) == 5   # food rating
+        assert ratings.get(10003) == 1   # travel rating
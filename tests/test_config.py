@@ -0,0 +1,56 @@
+"""
+Tests for the database connection profile
+"""
+import pytest
+from sqlalchemy import text
+from config import DB_CONFIG, db
+
+def test_sqlite_connections_use_tuned_profile(app):
+    """Test that every SQLite connection gets the concurrency and durability pragmas"""
+    def pragma(name):
+        return db.session.execute(text(f'PRAGMA {name}')).scalar()
+
+    assert DB_CONFIG.echo is False
+    assert pragma('foreign_keys') == 1
+    assert pragma('busy_timeout') == DB_CONFIG.sqlite_busy_timeout_ms
+    assert pragma('journal_mode') == 'wal'
+    assert pragma('synchronous') == 1  # NORMAL
+    assert pragma('cache_size') == -DB_CONFIG.sqlite_cache_size_kib
+
+def test_pool_sizing_follows_workers_and_threads():
+    """Test per-worker pool sizing with and without a server connection cap"""
+    from db_pool import BACKGROUND_THREADS, size_pool
+
+    assert size_pool(workers=6, threads=4) == (4 + BACKGROUND_THREADS, 4)
+    # 150 connections shared by 6 workers leaves 25 per worker
+    assert size_pool(workers=6, threads=4, max_connections=150) == (4 + BACKGROUND_THREADS, 25 - 4 - BACKGROUND_THREADS)
+    # A tight cap shrinks the pool instead of exceeding it
+    assert size_pool(workers=6, threads=4, max_connections=12) == (2, 0)
+
+def test_pool_metrics_count_waits_and_exhaustion():
+    """Test that checkouts past the pool limit are reported as exhaustion and timeouts"""
+    import sqlite3
+    from sqlalchemy import exc
+    from db_pool import InstrumentedQueuePool, pool_stats
+
+    pool = InstrumentedQueuePool(lambda: sqlite3.connect(':memory:'), pool_size=1, max_overflow=0, timeout=0.05)
+    before = pool_stats.snapshot()
+    held = pool.connect()
+    with pytest.raises(exc.TimeoutError):
+        pool.connect()
+    held.close()
+    pool.connect().close()
+    after = pool_stats.snapshot()
+
+    assert after['checkouts'] - before['checkouts'] == 2
+    assert after['timeouts'] - before['timeouts'] == 1
+    assert after['exhausted'] - before['exhausted'] == 1
+    assert after['wait_seconds_max'] >= 0.05
+
+def test_pool_metrics_endpoint(client, monkeypatch):
+    """Test that pool usage is served to admins"""
+    from config import APP_CONFIG
+    monkeypatch.setattr(APP_CONFIG, 'admin_token', 'secret-token')
+    response = client.get('/admin/metrics/db_pool', headers={'X-Admin-Token': 'secret-token'})
+    assert response.status_code == 200
+    assert {'checkouts', 'exhausted', 'timeouts', 'pool_size', 'checked_out'} <= set(response.get_json())
@@ -0,0 +1,114 @@
+"""
+Tests for the cached study-progress dashboard
+"""
+import threading
+from datetime import datetime
+import pytest
+from config import APP_CONFIG, db
+from dashboard import SingleFlightCache, compute_study_progress, study_progress
+from models import MessageTime, Participant, Preference
+from services import StudySummaryService
+from utils import record_watch_time
+
+@pytest.fixture
+def enrollment(app, monkeypatch):
+    """Participant 10001 (group 1) in round 2, 10002 (control) finished, 10003 (group 1) just enrolled"""
+    monkeypatch.setattr(APP_CONFIG, 'watch_time_write_behind', False)
+    db.session.add_all([
+        Participant(participant_number='10002', group_number=0),
+        Participant(participant_number='10003', group_number=1),
+    ])
+    db.session.commit()
+    db.session.add(Preference(participant_number='10002', round_number=1, category_id=10001, rating=5))
+    for participant_number in ('10001', '10002'):
+        record_watch_time(participant_number, 10101, 5, 1)
+        db.session.add(Preference(participant_number=participant_number, round_number=2,
+                                  category_id=10004, rating=5))
+    db.session.add(MessageTime(participant_number='10001', time_spent=12))
+    db.session.get(Participant, '10002').completed_at = datetime.utcnow()
+    StudySummaryService.rebuild()
+    db.session.commit()
+
+def _stages(funnel):
+    return {step['stage']: step['participants'] for step in funnel}
+
+def test_funnel_reads_summary(enrollment):
+    """Test that stage counts wait for the summary refresh rather than scanning the raw tables"""
+    db.session.add(Participant(participant_number='10004', group_number=1))
+    db.session.commit()
+    assert compute_study_progress()['participants'] == 3
+
+def test_funnel_and_groups(enrollment):
+    """Test that stage counts follow the participants' progress, per group and overall"""
+    progress = compute_study_progress()
+
+    assert progress['participants'] == 3
+    assert _stages(progress['funnel']) == {'enrolled': 3, 'video_viewing_1': 2,
+                                           'additional_information': 2, 'round_2': 2, 'end_study': 1}
+    assert progress['funnel'][1]['from_previous'] == round(2 / 3, 3)
+    assert progress['groups']['1']['participants'] == 2
+    # The control group skips the message page, so reaching round 2 passes that stage
+    assert _stages(progress['groups']['0']['funnel'])['additional_information'] == 1
+    assert progress['groups']['9']['participants'] == 0
+    assert progress['heartbeats']['active_participants_last_minute'] == 2
+    assert progress['heartbeats']['watch_rows_updated_last_minute'] == 2
+
+def test_concurrent_requests_share_one_computation():
+    """Test that one thread computes while the others wait for, then reuse, its result"""
+    started, release = threading.Event(), threading.Event()
+    def compute():
+        started.set()
+        release.wait(5)
+        return {'value': 1}
+    cache = SingleFlightCache(compute, ttl=60)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get())) for _ in range(8)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert cache.computations == 1
+    assert results == [{'value': 1}] * 8
+
+def test_stale_value_served_during_refresh():
+    """Test that an expired value is returned while another thread refreshes it"""
+    values = iter([1, 2])
+    cache = SingleFlightCache(lambda: next(values), ttl=0)
+    assert cache.get() == 1
+
+    cache._lock.acquire()  # A refresh in progress
+    try:
+        assert cache.get() == 1
+    finally:
+        cache._lock.release()
+    assert cache.get() == 2
+
+def test_dashboard_endpoint_is_cached(client, enrollment, monkeypatch):
+    """Test that the endpoint requires the admin token and reuses its computation"""
+    monkeypatch.setattr(APP_CONFIG, 'admin_token', 'secret-token')
+    monkeypatch.setattr(study_progress, 'ttl', 60)
+    study_progress.clear()
+    assert client.get('/admin/dashboard').status_code in (401, 403)
+
+    computations = study_progress.computations
+    for _ in range(3):
+        response = client.get('/admin/dashboard', headers={'X-Admin-Token': 'secret-token'})
+        assert response.status_code == 200
+    assert response.get_json()['participants'] == 3
+    assert study_progress.computations == computations + 1
+    study_progress.clear()
+
+def test_end_study_records_completion(authenticated_client):
+    """Test that the first visit to the end page marks the participant as finished"""
+    assert authenticated_client.get('/end_study').status_code == 200
+    completed_at = db.session.get(Participant, '10001').completed_at
+    assert completed_at is not None
+
+    authenticated_client.get('/end_study')
+    db.session.expire_all()
+    assert db.session.get(Participant, '10001').completed_at == completed_at
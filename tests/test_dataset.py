@@ -0,0 +1,62 @@
+"""
+Tests for the wide-format participant dataset
+"""
+import pandas as pd
+import pytest
+from sqlalchemy import event
+from config import db
+from models import ConsistencyAnswer, Participant, VideoInteraction, VideoReaction, WatchingTime
+from study_dataset import DATASET_QUERIES, build_dataset_command, build_participant_dataset, load_tables
+
+@pytest.fixture
+def activity(app):
+    """Activity for participant 10001; participant 10002 has none"""
+    db.session.add(Participant(participant_number='10002', group_number=3))
+    db.session.add_all([
+        WatchingTime(participant_number='10001', video_id=10101, round_number=1, time_spent=30, percentage_watched=60),
+        WatchingTime(participant_number='10001', video_id=10102, round_number=1, time_spent=10, percentage_watched=20),
+        WatchingTime(participant_number='10001', video_id=10103, round_number=2, time_spent=90, percentage_watched=100),
+        VideoReaction(participant_number='10001', video_id=10101, liked=True, starred=True),
+        VideoReaction(participant_number='10001', video_id=10102, disliked=True),
+        VideoInteraction(participant_number='10001', video_id=10101, action='comment', content='nice'),
+        ConsistencyAnswer(participant_number='10001', question_number=1, answer=4),
+        ConsistencyAnswer(participant_number='10001', question_number=2, answer=2),
+    ])
+    db.session.commit()
+
+def test_one_row_per_participant(app, activity):
+    """Test that ratings, watch time, reactions and answers land in the participant's row"""
+    dataset = build_participant_dataset(load_tables()).set_index('participant_number')
+
+    row = dataset.loc['10001']
+    assert row['group_number'] == 1
+    assert row['rating_r1_humor'] == 9 and row['rating_r1_travel'] == 5
+    assert row['watch_time_r1'] == 40 and row['videos_watched_r1'] == 2
+    assert row['mean_percentage_watched_r1'] == 40
+    assert row['watch_time_r2'] == 90 and row['videos_watched_r2'] == 1
+    assert (row['likes'], row['dislikes'], row['stars'], row['comments']) == (1, 1, 1, 1)
+    assert (row['consistency_q1'], row['consistency_q2']) == (4, 2)
+
+    empty = dataset.loc['10002']
+    assert empty['videos_watched_r1'] == 0 and empty['likes'] == 0
+    assert pd.isna(empty['rating_r1_humor']) and pd.isna(empty['mean_percentage_watched_r2'])
+
+def test_each_table_is_read_once(app, activity):
+    """Test that loading issues one query per source table, whatever the participant count"""
+    statements = []
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        load_tables()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    assert len(statements) == len(DATASET_QUERIES)
+
+def test_build_dataset_command(runner, activity, tmp_path):
+    """Test that the CLI writes the dataset as CSV"""
+    output = tmp_path / 'participants.csv'
+    result = runner.invoke(build_dataset_command, [str(output)])
+
+    assert result.exit_code == 0, result.output
+    assert list(pd.read_csv(output, dtype={'participant_number': str})['participant_number']) == ['10001', '10002']
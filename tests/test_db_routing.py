@@ -0,0 +1,52 @@
+"""
+Tests for read/write routing to the read replica
+"""
+import pytest
+from sqlalchemy import create_engine
+from config import Config, db
+from db_routing import REPLICA_BIND, read_replica
+from models import VideoCategory, VideoInteraction
+
+@pytest.fixture
+def replica(app, tmp_path):
+    """A second SQLite file standing in for the replica, with a different catalog"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(VideoCategory.__table__.insert(), [{'id': 1, 'name': 'replica-only'}])
+    db.engines[REPLICA_BIND] = engine
+    yield engine
+    del db.engines[REPLICA_BIND]
+    engine.dispose()
+
+def test_reads_inside_read_replica_use_replica(app, replica):
+    """Test that only queries inside read_replica() are sent to the replica"""
+    from utils import get_categories_excluding_info
+
+    assert [c.name for c in get_categories_excluding_info()] == ['replica-only']
+    assert 'replica-only' not in [c.name for c in VideoCategory.query.all()]
+
+def test_writes_stay_on_primary(app, replica):
+    """Test that flushes and DML issued inside read_replica() still reach the primary"""
+    from services import VideoInteractionService
+
+    with read_replica():
+        db.session.add(VideoInteraction(participant_number='10001', video_id=10101, action='comment'))
+        VideoInteractionService.apply_reaction('10001', 10101, 'like')
+        db.session.commit()
+
+    assert VideoInteraction.query.count() == 2
+    assert VideoInteractionService.get_reaction_state('10001', 10101)['liked'] is True
+    with replica.connect() as conn:
+        assert conn.execute(VideoInteraction.__table__.select()).all() == []
+
+def test_read_replica_without_replica_uses_primary(app):
+    """Test that read_replica() is a no-op when no replica is configured"""
+    with read_replica():
+        assert {c.name for c in VideoCategory.query.all()} >= {'humor', 'food', 'travel'}
+
+def test_sqlite_replica_url_is_opened_read_only():
+    """Test that a SQLite snapshot path is turned into a read-only URI"""
+    assert Config.get_replica_uri('sqlite:////data/replica.db') == 'sqlite:///file:/data/replica.db?mode=ro&uri=true'
+    assert Config.get_replica_uri('mysql+pymysql://reader@replica/app') == 'mysql+pymysql://reader@replica/app'
+    assert Config.get_replica_uri('') is None
@@ -0,0 +1,111 @@
+"""
+Tests for the streaming study-data export
+"""
+import csv
+import io
+import json
+import pytest
+from config import APP_CONFIG, db
+from models import WatchingTime
+from study_export import export_data_command, stream_export
+
+@pytest.fixture
+def watch_rows(app):
+    with app.app_context():
+        db.session.add_all([
+            WatchingTime(participant_number='10001', video_id=video_id, round_number=1,
+                         time_spent=10.5, percentage_watched=50.0)
+            for video_id in ('10101', '10102', '10103')
+        ])
+        db.session.commit()
+
+def test_csv_streams_one_piece_per_chunk(app, watch_rows):
+    """Test that rows are written in chunks and the CSV round-trips"""
+    with app.app_context():
+        pieces = list(stream_export('watching_time', 'csv', chunk_size=2))
+
+    assert len(pieces) == 2
+    rows = list(csv.DictReader(io.StringIO(''.join(pieces))))
+    assert [row['video_id'] for row in rows] == ['10101', '10102', '10103']
+    assert rows[0]['time_spent'] == '10.5'
+
+def test_jsonl_export(app, watch_rows):
+    """Test that each JSONL line is one row with ISO timestamps"""
+    with app.app_context():
+        lines = ''.join(stream_export('watching_time', 'jsonl')).splitlines()
+
+    records = [json.loads(line) for line in lines]
+    assert len(records) == 3
+    assert records[0]['participant_number'] == '10001'
+    assert 'T' in records[0]['timestamp']
+
+def test_unknown_table_rejected(app):
+    """Test that only study tables can be exported"""
+    with app.app_context(), pytest.raises(ValueError):
+        next(stream_export('video', 'csv'))
+
+def test_export_command_writes_files(app, watch_rows, tmp_path):
+    """Test that the CLI writes one file per requested table"""
+    result = app.test_cli_runner().invoke(export_data_command,
+        [str(tmp_path), '--format', 'jsonl', '--table', 'watching_time', '--table', 'participant'])
+
+    assert result.exit_code == 0, result.output
+    assert len((tmp_path / 'watching_time.jsonl').read_text().splitlines()) == 3
+    assert json.loads((tmp_path / 'participant.jsonl').read_text())['group_number'] == 1
+
+def test_admin_export_endpoint(client, watch_rows, monkeypatch):
+    """Test that the admin endpoint streams the export and requires the admin token"""
+    monkeypatch.setattr(APP_CONFIG, 'admin_token', 'secret-token')
+    assert client.get('/admin/export/watching_time').status_code in (401, 403)
+
+    response = client.get('/admin/export/watching_time', headers={'X-Admin-Token': 'secret-token'})
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'text/csv'
+    assert len(response.get_data(as_text=True).splitlines()) == 4
+
+    response = client.get('/admin/export/video?format=csv', headers={'X-Admin-Token': 'secret-token'})
+    assert response.status_code == 404
+
+def test_incremental_export_only_emits_changes(app, monkeypatch, tmp_path):
+    """Test that each incremental run exports new and grown rows since the last watermark"""
+    from services import WatchTimeService
+    from study_export import export_incremental
+    monkeypatch.setattr(APP_CONFIG, 'watch_time_write_behind', False)
+    monkeypatch.setattr(APP_CONFIG, 'export_watermark_lag_seconds', 0)
+
+    def watch(video_id, seconds):
+        WatchTimeService.upsert([WatchTimeService.build_row('10001', video_id, 1, seconds, 60)])
+        db.session.commit()
+
+    def exported(paths, table_name):
+        return list(csv.DictReader(open(paths[table_name])))
+
+    watch(10101, 10)
+    first = export_incremental(str(tmp_path / 'run1'), 'csv')
+    assert [row['time_spent'] for row in exported(first, 'watching_time')] == ['10.0']
+    assert len(exported(first, 'participant')) == 1
+
+    watch(10101, 5)  # Grows the exported row
+    watch(10102, 7)
+    second = export_incremental(str(tmp_path / 'run2'), 'csv')
+    rows = exported(second, 'watching_time')
+    assert [(row['video_id'], row['time_spent']) for row in rows] == [('10101', '15.0'), ('10102', '7.0')]
+    assert exported(second, 'participant') == []
+    assert len(exported(second, 'preference')) == 3  # No change column: always in full
+
+def test_incremental_export_picks_up_completion(app, monkeypatch, tmp_path):
+    """Test that a participant who finishes after being exported is exported again with completed_at"""
+    from services import ParticipantService
+    from study_export import export_incremental
+    monkeypatch.setattr(APP_CONFIG, 'export_watermark_lag_seconds', 0)
+
+    first = export_incremental(str(tmp_path / 'run1'), 'csv', tables=['participant'])
+    assert [row['completed_at'] for row in csv.DictReader(open(first['participant']))] == ['']
+
+    ParticipantService.mark_completed('10001')
+    db.session.commit()
+    second = export_incremental(str(tmp_path / 'run2'), 'csv', tables=['participant'])
+    rows = list(csv.DictReader(open(second['participant'])))
+    assert [row['participant_number'] for row in rows] == ['10001']
+    assert rows[0]['completed_at'] != ''
@@ -0,0 +1,50 @@
+"""
+Tests for the Prometheus metrics endpoint
+"""
+import pytest
+from prometheus_client import REGISTRY
+from config import APP_CONFIG
+
+@pytest.fixture
+def admin_token(monkeypatch):
+    monkeypatch.setattr(APP_CONFIG, 'admin_token', 'secret-token')
+    return 'secret-token'
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+def test_requests_record_latency_and_query_counts(authenticated_client):
+    """Test that each request is timed and charged with the queries it issued"""
+    labels = {'endpoint': 'api.record_watch_time_endpoint'}
+    requests_before = _sample('http_request_duration_seconds_count', method='POST', status='200', **labels)
+    queries_before = _sample('db_queries_per_request_sum', **labels)
+
+    for _ in range(2):
+        response = authenticated_client.post('/api/record_watch_time',
+            json={'video_id': 10101, 'watch_duration': 5, 'round_number': 1})
+        assert response.status_code == 200
+
+    assert _sample('http_request_duration_seconds_count', method='POST', status='200', **labels) - requests_before == 2
+    # Participant lookup and the upsert at least, per request
+    assert _sample('db_queries_per_request_sum', **labels) - queries_before >= 4
+    assert _sample('db_time_per_request_seconds_count', **labels) >= 2
+
+def test_unmatched_urls_share_one_label(client):
+    """Test that 404s are not labelled by their URL"""
+    before = _sample('http_request_duration_seconds_count', endpoint='unmatched', method='GET', status='404')
+    client.get('/no/such/page')
+    assert _sample('http_request_duration_seconds_count', endpoint='unmatched', method='GET', status='404') == before + 1
+
+def test_metrics_endpoint_requires_token(client, admin_token):
+    """Test that /metrics is served in Prometheus format to bearer or header tokens only"""
+    assert client.get('/metrics').status_code == 403
+
+    response = client.get('/metrics', headers={'Authorization': f'Bearer {admin_token}'})
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
+    body = response.get_data(as_text=True)
+    assert '# TYPE http_request_duration_seconds histogram' in body
+    assert 'db_pool_checked_out' in body
+    assert 'watch_time_buffer_keys' in body
+
+    assert client.get('/metrics', headers={'X-Admin-Token': admin_token}).status_code == 200
@@ -0,0 +1,64 @@
+"""
+Tests for the N+1, slow-query and query-budget inspector.
+Run the whole suite with QUERY_INSPECTION=strict to enforce every endpoint budget.
+"""
+import logging
+import pytest
+from config import APP_CONFIG
+from models import Preference
+import query_inspector
+from query_inspector import QueryBudgetExceeded, statement_shape
+
+@pytest.fixture
+def inspection(monkeypatch):
+    def enable(mode):
+        monkeypatch.setattr(APP_CONFIG, 'query_inspection', mode)
+    return enable
+
+def test_statement_shape_ignores_in_list_length():
+    """Test that IN-lists of different sizes normalize to the same shape"""
+    assert statement_shape('SELECT * FROM video\n WHERE id IN (?, ?, ?)') == \
+        statement_shape('SELECT * FROM video WHERE id IN (?, ?)') == 'SELECT * FROM video WHERE id IN (?)'
+
+def test_lazy_loads_in_a_loop_are_flagged(app, inspection, caplog):
+    """Test that a relationship loaded per row is reported with its call site"""
+    inspection('log')
+    with app.test_request_context('/video_viewing_1'):
+        query_inspector._start_request()
+        preferences = Preference.query.filter_by(participant_number='10001').all()
+        names = [pref.category.name for pref in preferences]
+        with caplog.at_level(logging.WARNING):
+            query_inspector._check_request(app.response_class())
+
+    assert len(names) == 3
+    warnings = [r.getMessage() for r in caplog.records if 'Possible N+1' in r.getMessage()]
+    assert len(warnings) == 1
+    assert 'ran 3 times' in warnings[0]
+    assert 'test_query_inspector.py' in warnings[0]
+
+def test_slow_queries_are_logged(app, inspection, monkeypatch, caplog):
+    """Test that queries over the threshold are logged with where they came from"""
+    inspection('log')
+    monkeypatch.setattr(APP_CONFIG, 'slow_query_ms', 0)
+    with app.test_request_context('/'):
+        query_inspector._start_request()
+        with caplog.at_level(logging.WARNING):
+            Preference.query.count()
+
+    assert any('Slow query' in r.getMessage() and 'test_query_inspector.py' in r.getMessage()
+               for r in caplog.records)
+
+def test_strict_mode_fails_requests_over_budget(authenticated_client, inspection, monkeypatch):
+    """Test that strict mode turns a budget overrun into an error"""
+    inspection('strict')
+    assert authenticated_client.get('/video_viewing_1').status_code == 200
+
+    monkeypatch.setitem(query_inspector.ENDPOINT_QUERY_BUDGETS, 'main.video_viewing_1', 1)
+    with pytest.raises(QueryBudgetExceeded, match='main.video_viewing_1 issued 2 queries'):
+        authenticated_client.get('/video_viewing_1')
+
+def test_inspection_off_by_default(authenticated_client, monkeypatch):
+    """Test that nothing is tracked unless inspection is enabled"""
+    monkeypatch.setattr(APP_CONFIG, 'query_inspection', 'off')
+    monkeypatch.setitem(query_inspector.ENDPOINT_QUERY_BUDGETS, 'main.video_viewing_1', 0)
+    assert authenticated_client.get('/video_viewing_1').status_code == 200
@@ -0,0 +1,118 @@
+"""
+Tests that the hot query paths are served by indexes.
+
+Runs EXPLAIN QUERY PLAN on every statement issued by the service and utility
+helpers and fails when SQLite has to scan a whole table to answer one of them,
+unless the statement is marked with `FULL_SCAN_OPTION` as a deliberate full read.
+"""
+import re
+import pytest
+from sqlalchemy import event
+from config import db
+from query_inspector import FULL_SCAN_OPTION
+
+SCAN = re.compile(r'^SCAN (\w+)(?! USING (?:COVERING )?INDEX)')
+
+
+def _full_scans(statement, parameters):
+    """Tables the statement reads without an index."""
+    plan = db.session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+    scans = set()
+    for row in plan:
+        match = SCAN.match(row[-1])
+        # Scans of derived tables (subqueries) are only as wide as their indexed inner query
+        if match and match.group(1) in db.metadata.tables:
+            scans.add(match.group(1))
+    return scans
+
+
+@pytest.fixture
+def captured_statements(app):
+    """Collect (statement, parameters) for every query not marked as an intentional full scan"""
+    statements = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not context.execution_options.get(FULL_SCAN_OPTION) and not statement.startswith('EXPLAIN'):
+            statements.append((statement, parameters[0] if executemany else parameters))
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', capture)
+
+
+def _assert_indexed(statements):
+    assert statements
+    for statement, parameters in statements:
+        scans = _full_scans(statement, parameters)
+        assert not scans, f"Full scan of {sorted(scans)} in:\n{statement}"
+
+
+def test_watch_time_and_reaction_paths_use_indexes(app, captured_statements):
+    """Test that recording watch time and reactions never scans the history tables"""
+    from utils import record_watch_time, record_watch_time_batch
+    from services import VideoInteractionService
+
+    record_watch_time('10001', 10101, 5, 1)
+    record_watch_time('10001', 10101, 5, 1)
+    record_watch_time_batch('10001', [{'video_id': 10101, 'watch_duration': 3, 'round_number': 1},
+                                      {'video_id': 10102, 'watch_duration': 4, 'round_number': 1}])
+    VideoInteractionService.apply_reaction('10001', 10101, 'like')
+    VideoInteractionService.apply_actions('10001', [
+        {'video_id': 10102, 'action': 'star', 'content': ''},
+        {'video_id': 10102, 'action': 'comment', 'content': 'nice'},
+    ])
+    VideoInteractionService.handle_comment('10001', 10101, 'fun')
+    VideoInteractionService.get_reaction_state('10001', 10101)
+    db.session.commit()
+
+    _assert_indexed(captured_statements)
+
+
+def test_selection_and_playlist_paths_use_indexes(app, captured_statements):
+    """Test that playlist assignment and lookups never scan the per-participant tables"""
+    from services import ParticipantService, PlaylistService, VideoSelectionService
+    from utils import get_categories_excluding_info, record_watch_time, save_preferences
+
+    record_watch_time('10001', 10101, 5, 1)
+    ParticipantService.get_participant_preferences('10001', 1)
+    ParticipantService.get_selected_category_names('10001', 1)
+    ParticipantService.get_remaining_categories('10001', 1)
+    get_categories_excluding_info()
+    save_preferences('10001', 2, [{'category_id': 10001, 'rating': 8}, {'category_id': 10002, 'rating': 6},
+                                  {'category_id': 10004, 'rating': 4}])
+    PlaylistService.assign_playlist('10001', 2, [10001, 10002, 10003])
+    db.session.commit()
+    PlaylistService.get_playlist_videos('10001', 2, ['humor', 'food', 'travel'])
+    PlaylistService.get_playlist_videos('10001', 1, ['humor', 'food', 'travel'])
+    PlaylistService.get_playlist_videos('10001', 2, ['education'])
+    VideoSelectionService.select_videos_for_preferences(
+        '10001', ParticipantService.get_participant_preferences('10001', 1))
+
+    _assert_indexed(captured_statements)
+
+
+def test_incremental_export_uses_indexes(app, captured_statements, tmp_path):
+    """Test that the incremental export reads only the changed range of each table"""
+    from study_export import export_incremental
+
+    export_incremental(str(tmp_path), 'csv')
+    export_incremental(str(tmp_path), 'csv')
+
+    _assert_indexed(captured_statements)
+
+
+def test_participant_and_summary_paths_use_indexes(app, captured_statements, monkeypatch):
+    """Test that enrollment, completion and the study summary refresh and reads avoid unplanned scans"""
+    from config import APP_CONFIG
+    from services import ParticipantNumberAllocator, ParticipantService, StudySummaryService
+    from utils import generate_unique_participant_number
+
+    monkeypatch.setattr(APP_CONFIG, 'summary_refresh_lag_seconds', 0)
+    StudySummaryService.refresh()  # The first run rebuilds and sets the watermark
+    ParticipantNumberAllocator.allocate()
+    ParticipantNumberAllocator.remaining()
+    generate_unique_participant_number()
+    ParticipantService.mark_completed('10001')
+    assert StudySummaryService.refresh() == 1
+    StudySummaryService.get_rows()
+    db.session.commit()
+
+    _assert_indexed(captured_statements)
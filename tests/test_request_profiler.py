@@ -0,0 +1,73 @@
+"""
+Tests for on-demand request profiling
+"""
+import pstats
+import pytest
+from config import APP_CONFIG
+from request_profiler import (PROFILE_HEADER, ProfilingToggle, sign_profile_request,
+                              verify_profile_request)
+
+@pytest.fixture
+def profiling(tmp_path, monkeypatch):
+    """Profiles go to a temporary directory and the toggle to a temporary file"""
+    monkeypatch.setattr(APP_CONFIG, 'admin_token', 'secret-token')
+    monkeypatch.setattr(APP_CONFIG, 'profile_dir', str(tmp_path / 'profiles'))
+    toggle = ProfilingToggle(str(tmp_path / 'profiling.json'))
+    monkeypatch.setattr('request_profiler.profiling_toggle', toggle)
+    monkeypatch.setattr('blueprints.admin.profiling_toggle', toggle)
+    return tmp_path / 'profiles'
+
+def _profiles(profile_dir):
+    return sorted(profile_dir.rglob('*.prof')) if profile_dir.exists() else []
+
+def test_signature_verification():
+    """Test that only unexpired headers signed with the admin token are accepted"""
+    header = sign_profile_request('secret-token', ttl_seconds=60, now=1000)
+    assert verify_profile_request(header, 'secret-token', now=1000)
+    assert not verify_profile_request(header, 'other-secret', now=1000)
+    assert not verify_profile_request(header, 'secret-token', now=1061)  # Expired
+    assert not verify_profile_request(header.replace('.', '0.', 1), 'secret-token', now=1000)
+    assert not verify_profile_request(sign_profile_request('secret-token', ttl_seconds=7200, now=1000),
+                                      'secret-token', now=1000)  # Too long-lived
+    assert not verify_profile_request(header, '', now=1000)
+
+def test_signed_header_profiles_one_request(authenticated_client, profiling):
+    """Test that a signed request is profiled and labelled by endpoint and group"""
+    authenticated_client.get('/video_viewing_1')
+    assert _profiles(profiling) == []
+
+    response = authenticated_client.get('/video_viewing_1',
+        headers={PROFILE_HEADER: sign_profile_request('secret-token')})
+    assert response.status_code == 200
+
+    [profile] = _profiles(profiling)
+    assert profile.parent == profiling / 'main.video_viewing_1' / 'group-1'
+    stats = pstats.Stats(str(profile))
+    assert any(name == 'video_viewing_1' for _, _, name in stats.stats)
+
+def test_bad_signature_is_ignored(authenticated_client, profiling):
+    """Test that an unsigned header does not turn profiling on"""
+    authenticated_client.get('/video_viewing_1', headers={PROFILE_HEADER: '9999999999.forged'})
+    assert _profiles(profiling) == []
+
+def test_admin_toggle_samples_one_endpoint(authenticated_client, profiling):
+    """Test that the admin toggle profiles the chosen endpoint until switched off"""
+    admin = {'X-Admin-Token': 'secret-token'}
+    response = authenticated_client.post('/admin/profiling', headers=admin,
+        json={'sample_rate': 1, 'minutes': 5, 'endpoint': 'main.video_viewing_1'})
+    assert response.status_code == 200
+    assert authenticated_client.get('/admin/profiling', headers=admin).get_json()['enabled'] is True
+
+    authenticated_client.get('/video_viewing_1')
+    authenticated_client.get('/select_categories')  # Other endpoints are left alone
+    assert len(_profiles(profiling)) == 1
+
+    authenticated_client.delete('/admin/profiling', headers=admin)
+    authenticated_client.get('/video_viewing_1')
+    assert len(_profiles(profiling)) == 1
+
+def test_admin_toggle_validates_input(client, profiling):
+    """Test that out-of-range sampling settings are rejected"""
+    response = client.post('/admin/profiling', headers={'X-Admin-Token': 'secret-token'},
+        json={'sample_rate': 5, 'minutes': 5})
+    assert response.status_code == 400
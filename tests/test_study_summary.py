@@ -0,0 +1,142 @@
+"""
+Tests for the periodically refreshed study summary
+"""
+import pytest
+from config import APP_CONFIG, db
+from models import ExportWatermark, Participant, StudySummary, WatchingTime
+from services import ParticipantService, StudySummaryService, VideoInteractionService
+from utils import record_watch_time, record_watch_time_batch, save_preferences
+
+@pytest.fixture(autouse=True)
+def direct_writes(monkeypatch):
+    monkeypatch.setattr(APP_CONFIG, 'watch_time_write_behind', False)
+    monkeypatch.setattr(APP_CONFIG, 'summary_refresh_lag_seconds', 0)
+
+def _snapshot():
+    columns = [column.name for column in StudySummary.__table__.columns if column.name != 'updated_at']
+    rows = [tuple(getattr(row, name) for name in columns) for row in StudySummary.query.all()]
+    return sorted(row for row in rows if any(row[3:]))  # Rows whose totals returned to zero are kept
+
+def _row(group_number, round_number, category_id):
+    return db.session.get(StudySummary, (group_number, round_number, category_id))
+
+def _activity():
+    """Activity covering every write path, including updates and resubmissions"""
+    db.session.add(Participant(participant_number='10002', group_number=3))
+    db.session.commit()
+    save_preferences('10001', 2, [{'category_id': 10001, 'rating': 8}, {'category_id': 10004, 'rating': 6}])
+    save_preferences('10001', 2, [{'category_id': 10002, 'rating': 4}, {'category_id': 10004, 'rating': 2}])
+    save_preferences('10002', 1, [{'category_id': 10001, 'rating': 10}])
+    record_watch_time('10001', 10101, 30, 1)
+    record_watch_time('10001', 10101, 30, 1)  # Grows the same row past 100%
+    record_watch_time('10002', 10101, 9, 1)
+    record_watch_time_batch('10001', [{'video_id': 10102, 'watch_duration': 6, 'round_number': 2},
+                                      {'video_id': 10104, 'watch_duration': 12, 'round_number': 2}])
+    for participant_number, action in (('10001', 'like'), ('10001', 'dislike'),
+                                       ('10001', 'star'), ('10002', 'like')):
+        VideoInteractionService.apply_reaction(participant_number, 10101, action)
+    VideoInteractionService.apply_actions('10001', [
+        {'video_id': 10102, 'action': 'star', 'content': ''},
+        {'video_id': 10102, 'action': 'comment', 'content': 'nice'},
+        {'video_id': 10101, 'action': 'star_remove', 'content': ''},
+    ])
+    VideoInteractionService.handle_comment('10002', 10101, 'fun')
+    for participant_number in ('10001', '10001', '10002'):  # Only the first visit counts
+        ParticipantService.mark_completed(participant_number)
+    db.session.commit()
+
+def _refresh():
+    refreshed = StudySummaryService.refresh()
+    db.session.commit()
+    return refreshed
+
+def test_request_paths_leave_summary_to_refresh(app):
+    """Test that writes only reach the summary when the refresh job runs"""
+    assert _refresh() == 1  # The first run rebuilds from the fixture's data
+    record_watch_time('10001', 10101, 9, 1)
+    assert _row(1, 1, 10001).videos_watched == 0
+
+    assert _refresh() == 1
+    assert _row(1, 1, 10001).videos_watched == 1
+    assert _refresh() == 0  # Nothing changed since
+
+def test_refresh_keeps_summary_current(app):
+    """Test that each write path's changes reach its group, round and category totals"""
+    _refresh()
+    _activity()
+    assert _refresh() == 2
+
+    humor_round_1 = _row(1, 1, 10001)
+    assert (humor_round_1.preferences, humor_round_1.rating_sum) == (1, 9)  # From the fixture data
+    assert humor_round_1.videos_watched == 1
+    assert humor_round_1.watch_time_sum == 60
+    assert humor_round_1.percentage_sum == 100
+
+    assert _row(1, 2, 10001) is None  # Replaced on resubmission before the refresh
+    assert (_row(1, 2, 10002).preferences, _row(1, 2, 10002).rating_sum) == (1, 4)
+    assert _row(1, 2, 10004).videos_watched == 1 and _row(1, 2, 10004).percentage_sum == 10
+
+    reactions = _row(1, 0, 10001)
+    assert (reactions.likes, reactions.dislikes, reactions.stars) == (0, 1, 0)
+    assert (_row(1, 0, 10002).stars, _row(1, 0, 10002).comments) == (1, 1)
+    assert (_row(3, 0, 10001).likes, _row(3, 0, 10001).comments) == (1, 1)
+    assert _row(3, 1, 10001).watch_time_sum == 9
+
+def test_participant_counts_per_group_and_round(app):
+    """Test enrollment, reaching and completing each round, and the finishers' mean percentage"""
+    _refresh()
+    _activity()
+    _refresh()
+
+    assert (_row(1, 0, 0).participants, _row(3, 0, 0).participants) == (1, 1)
+    assert _row(1, 1, 0).participants == 1  # From the fixture data
+    assert _row(1, 2, 0).participants == 1  # Resubmitting does not count twice
+    # 10001 moved on to round 2 after watching 100% of their one round-1 video
+    assert (_row(1, 1, 0).participants_completed, _row(1, 1, 0).completed_percentage_sum) == (1, 100)
+    assert (_row(1, 2, 0).participants_completed, _row(1, 2, 0).completed_percentage_sum) == (1, 10)
+    # 10002 never watched in round 2, so they count as 0%
+    assert (_row(3, 2, 0).participants_completed, _row(3, 2, 0).completed_percentage_sum) == (1, 0)
+    assert _row(3, 1, 0).participants_completed == 0
+
+def test_refresh_matches_rebuild_and_is_idempotent(app):
+    """Test that refreshed totals equal a full rebuild, even when refresh windows overlap"""
+    _refresh()
+    first_watermark = db.session.get(ExportWatermark, StudySummaryService.WATERMARK).exported_until
+    _activity()
+    _refresh()
+    refreshed = _snapshot()
+
+    # Re-running over an already applied window changes nothing
+    db.session.get(ExportWatermark, StudySummaryService.WATERMARK).exported_until = first_watermark
+    assert _refresh() == 2
+    assert _snapshot() == pytest.approx(refreshed)
+
+    StudySummaryService.rebuild()
+    db.session.commit()
+    assert _snapshot() == pytest.approx(refreshed)
+
+def test_refresh_ignores_changes_inside_the_lag(app, monkeypatch):
+    """Test that rows stamped after the lagged watermark wait for the next refresh"""
+    monkeypatch.setattr(APP_CONFIG, 'summary_refresh_lag_seconds', 3600)
+    _refresh()
+    record_watch_time('10001', 10101, 9, 1)
+    assert _refresh() == 0
+    assert WatchingTime.query.count() == 1
+
+def test_rebuild_and_refresh_commands_and_admin_endpoint(app, runner, client, monkeypatch):
+    """Test that the CLI rebuilds and refreshes the table and the admin endpoint serves it with means"""
+    result = runner.invoke(args=['rebuild-summary'])
+    assert result.exit_code == 0, result.output
+    assert 'Rebuilt study summary: 5 rows' in result.output
+
+    result = runner.invoke(args=['refresh-summary'])
+    assert result.exit_code == 0, result.output
+    assert 'Refreshed study summary for 1 participants' in result.output
+
+    monkeypatch.setattr(APP_CONFIG, 'admin_token', 'secret-token')
+    rows = client.get('/admin/summary', headers={'X-Admin-Token': 'secret-token'}).get_json()['rows']
+    humor = next(row for row in rows if row['category'] == 'humor')
+    assert (humor['group_number'], humor['round_number'], humor['mean_rating']) == (1, 1, 9)
+    assert humor['mean_percentage_watched'] is None
+    round_1 = next(row for row in rows if row['round_number'] == 1 and row['category_id'] == 0)
+    assert (round_1['participants'], round_1['mean_completed_percentage_watched']) == (1, None)
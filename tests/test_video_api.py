@@ -185,3 +185,50 @@ def test_api_errors_without_authentication(client):
         })
     
     assert response.status_code in [302, 401, 403]
+
+def test_playlist_assigned_on_category_submission(app, authenticated_client):
+    """Test that submitting categories stores a playlist that the videos API returns unchanged"""
+    from models import PlaylistEntry
+
+    response = authenticated_client.post('/submit_categories', data={
+        'rating_10001': '9',  # humor
+        'rating_10002': '7',  # food
+        'rating_10003': '5',  # travel
+    })
+    assert response.status_code == 302
+
+    with app.app_context():
+        entries = PlaylistEntry.query.filter_by(participant_number='10001', round_number=1) \
+            .order_by(PlaylistEntry.position).all()
+        assert sorted(e.video_id for e in entries) == [10101, 10102, 10103]
+
+        first = authenticated_client.get('/api/videos?categories=humor,food,travel').get_json()
+        second = authenticated_client.get('/api/videos?categories=humor,food,travel').get_json()
+        assert [v['id'] for v in first['videos']] == [e.video_id for e in entries]
+        assert first == second
+
+def test_round2_playlist_excludes_round1_videos(app, authenticated_client):
+    """Test that the round 2 playlist is drawn from videos not watched in round 1"""
+    from models import PlaylistEntry
+
+    with app.app_context():
+        db.session.add(Video(id=10105, title='Funny Video 2', url='https://example.com/video5',
+                             duration=30, category_id=10001))
+        db.session.add(WatchingTime(participant_number='10001', video_id=10101, round_number=1,
+                                    time_spent=10, percentage_watched=20))
+        db.session.commit()
+
+        response = authenticated_client.post('/round2/submit_categories', data={
+            'rating_10001': '9',  # humor
+            'rating_10002': '7',  # food
+            'rating_10004': '5',  # education
+        })
+        assert response.status_code == 302
+
+        entries = PlaylistEntry.query.filter_by(participant_number='10001', round_number=2).all()
+        by_category = {e.category_name: e.video_id for e in entries}
+        assert len(entries) == 3
+        assert by_category['humor'] == 10105
+
+        data = authenticated_client.get('/api/videos_round2?categories=humor,food,education').get_json()
+        assert sorted(v['id'] for v in data['videos']) == sorted(by_category.values())
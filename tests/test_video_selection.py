@@ -0,0 +1,84 @@
+"""
+Tests for database-side video selection in VideoSelectionService
+"""
+import pytest
+from models import Video, WatchingTime
+from config import db
+from services import VideoSelectionService
+
+@pytest.fixture
+def humor_videos(app):
+    """Add extra humor videos so per-category sampling has something to choose from"""
+    for video_id in range(10201, 10206):
+        db.session.add(Video(id=video_id, title=f'Funny Video {video_id}',
+                             url=f'https://example.com/{video_id}', duration=30, category_id=10001))
+    db.session.commit()
+    return [10101] + list(range(10201, 10206))
+
+def _watch(video_id, round_number=1):
+    db.session.add(WatchingTime(participant_number='10001', video_id=video_id,
+                                round_number=round_number, time_spent=5, percentage_watched=10))
+    db.session.commit()
+
+def test_sample_unwatched_videos_excludes_watched(app, humor_videos):
+    """Test that videos watched in the excluded round never come back"""
+    _watch(10101)
+    _watch(10201)
+    _watch(10202, round_number=2)  # Other rounds do not count
+
+    videos = VideoSelectionService.sample_unwatched_videos(
+        '10001', Video.category_id.in_([10001]), exclude_round=1
+    )
+
+    assert sorted(v.id for v in videos) == [10202, 10203, 10204, 10205]
+    assert all(v.category_name == 'humor' for v in videos)
+
+def test_sample_unwatched_videos_limits_per_category(app, humor_videos):
+    """Test that the per-category sample size is enforced in the query"""
+    _watch(10101)
+
+    videos = VideoSelectionService.sample_unwatched_videos(
+        '10001', Video.category_id.in_([10001, 10002]), exclude_round=1, limit_per_category=2
+    )
+
+    by_category = {}
+    for video in videos:
+        by_category.setdefault(video.category_name, []).append(video.id)
+    assert len(by_category['humor']) == 2
+    assert 10101 not in by_category['humor']
+    assert by_category['food'] == [10102]
+
+def test_get_unwatched_videos_for_categories_groups_by_id(app, humor_videos):
+    """Test grouping of unwatched videos by category ID"""
+    videos_by_category = VideoSelectionService.get_unwatched_videos_for_categories(
+        '10001', [10001, 10003], limit_per_category=1
+    )
+
+    assert set(videos_by_category) == {10001, 10003}
+    assert len(videos_by_category[10001]) == 1
+    assert videos_by_category[10003][0].id == 10103
+
+def test_select_videos_for_preferences_uses_constant_queries(app, humor_videos):
+    """Test that exhausted categories fall back without extra per-preference queries"""
+    from sqlalchemy import event
+    from catalog import video_catalog
+    from models import Preference
+
+    # Every video in all three categories has already been watched
+    for video_id in humor_videos + [10102, 10103]:
+        _watch(video_id)
+    preferences = Preference.query.filter_by(participant_number='10001', round_number=1).all()
+    video_catalog.get_videos_by_category(['humor'])  # Warm the per-worker cache
+
+    statements = []
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        chosen, categories = VideoSelectionService.select_videos_for_preferences('10001', preferences)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+
+    assert len(statements) == 2
+    assert sorted(categories) == ['food', 'humor', 'travel']
+    assert chosen[categories.index('food')]['id'] == 10102
@@ -161,3 +161,69 @@ def test_record_watch_time_invalid_data(authenticated_client):
         content_type='application/json')
     
     assert response.status_code == 400
+
+def test_record_watch_time_string_video_id(app, authenticated_client):
+    """Test that a numeric string video_id is accepted and a non-numeric one is rejected"""
+    response = authenticated_client.post('/api/record_watch_time',
+        data=json.dumps({'video_id': '10101', 'watch_duration': 10, 'round_number': 1}),
+        content_type='application/json')
+    assert response.status_code == 200
+
+    response = authenticated_client.post('/api/record_watch_time',
+        data=json.dumps({'video_id': 'abc', 'watch_duration': 10, 'round_number': 1}),
+        content_type='application/json')
+    assert response.status_code == 400
+
+    with app.app_context():
+        assert WatchingTime.query.filter_by(participant_number='10001', video_id=10101).one().time_spent == 10
+
+def test_watch_time_upsert_keeps_one_row_per_video_and_round(app):
+    """Test that repeated deltas for the same key are summed into a single row"""
+    from config import db
+    from services import WatchTimeService
+
+    with app.app_context():
+        rows = [WatchTimeService.build_row('10001', 10101, 1, 20, 45) for _ in range(3)]
+        WatchTimeService.upsert(rows)
+        db.session.commit()
+
+        records = WatchingTime.query.filter_by(participant_number='10001', video_id=10101).all()
+        assert len(records) == 1
+        assert records[0].time_spent == 60
+        assert records[0].percentage_watched == 100  # Capped at 100%
+
+def test_watching_time_rejects_duplicate_rows(app):
+    """Test the unique constraint on (participant, video, round)"""
+    from sqlalchemy.exc import IntegrityError
+    from config import db
+
+    with app.app_context():
+        for _ in range(2):
+            db.session.add(WatchingTime(participant_number='10001', video_id=10101,
+                                        round_number=1, time_spent=5))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+def test_mysql_upsert_conflict_clause_has_no_placeholders():
+    """Test that PyMySQL's executemany can rewrite the upsert, which needs a parameter-free ON DUPLICATE clause"""
+    from sqlalchemy.dialects.mysql import pymysql
+    from services import WatchTimeService
+
+    sql = str(WatchTimeService._build_upsert('mysql').compile(dialect=pymysql.dialect()))
+    values, on_duplicate = sql.split('ON DUPLICATE KEY UPDATE')
+    assert 'VALUES (%s' in values
+    assert '%s' not in on_duplicate
+
+def test_upsert_percentage_follows_the_total(app):
+    """Test that the percentage grows with each delta and keeps the fixture's 45s duration"""
+    from config import db
+    from services import WatchTimeService
+
+    with app.app_context():
+        for seconds in (0, 9, 9, 30):
+            WatchTimeService.upsert([WatchTimeService.build_row('10001', 10101, 1, seconds, 45)])
+            db.session.commit()
+            record = WatchingTime.query.filter_by(participant_number='10001', video_id=10101).one()
+            expected = min(record.time_spent / 45 * 100, 100) if record.time_spent else None
+            assert record.percentage_watched == pytest.approx(expected)
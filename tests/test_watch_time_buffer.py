@@ -0,0 +1,96 @@
+"""
+Tests for the write-behind watch-time buffer
+"""
+import json
+from datetime import datetime
+import pytest
+from config import APP_CONFIG, db
+from models import WatchingTime
+from services import WatchTimeService
+from watch_time_buffer import WatchTimeBuffer
+
+@pytest.fixture
+def buffer(app):
+    """A buffer whose timer never fires on its own during a test"""
+    buffer = WatchTimeBuffer(app, flush_interval=3600, max_keys=1000)
+    yield buffer
+    buffer.shutdown()
+
+def test_buffer_aggregates_until_flushed(app, buffer):
+    """Test that deltas are summed in memory and written in one flush"""
+    for _ in range(4):
+        buffer.add([WatchTimeService.build_row('10001', 10101, 1, 4.5, 45)])
+    buffer.add([WatchTimeService.build_row('10001', 10102, 1, 6, 60)])
+
+    stats = buffer.stats()
+    assert stats['buffered_keys'] == 2
+    assert stats['buffered_watch_seconds'] == 24
+    assert WatchingTime.query.count() == 0
+
+    assert buffer.flush() == 2
+    records = {r.video_id: r for r in WatchingTime.query.all()}
+    assert records[10101].time_spent == 18
+    assert records[10101].percentage_watched == pytest.approx(40.0)  # 18/45 * 100
+    assert records[10102].time_spent == 6
+
+    stats = buffer.stats()
+    assert stats['buffered_keys'] == 0
+    assert stats['flush_lag_seconds'] == 0
+    assert stats['rows_flushed'] == 2
+
+def test_buffer_flush_adds_to_existing_rows(app, buffer):
+    """Test that flushed totals are added to rows already in the database"""
+    WatchTimeService.upsert([WatchTimeService.build_row('10001', 10101, 1, 10, 45)])
+    db.session.commit()
+
+    buffer.add([WatchTimeService.build_row('10001', 10101, 1, 5, 45)])
+    buffer.flush()
+
+    record = WatchingTime.query.filter_by(participant_number='10001', video_id=10101).one()
+    assert record.time_spent == 15
+    assert record.percentage_watched == pytest.approx(33.33, 0.01)  # 15/45 * 100
+
+def test_write_behind_mode_skips_synchronous_write(app, authenticated_client, monkeypatch):
+    """Test that the API hands deltas to the buffer when write-behind is enabled"""
+    buffer = WatchTimeBuffer(app, flush_interval=3600, max_keys=1000)
+    monkeypatch.setattr(APP_CONFIG, 'watch_time_write_behind', True)
+    monkeypatch.setattr('services.watch_time_buffer', buffer)
+
+    response = authenticated_client.post('/api/record_watch_time',
+        data=json.dumps({'video_id': 10101, 'watch_duration': 10, 'round_number': 1}),
+        content_type='application/json')
+    assert response.status_code == 200
+    assert WatchingTime.query.count() == 0
+
+    buffer.shutdown()  # Flushes what is left, as on worker exit
+    assert WatchingTime.query.one().time_spent == 10
+
+def test_buffer_metrics_endpoint_requires_admin_token(client, monkeypatch):
+    """Test that buffer metrics are only served with the admin token"""
+    response = client.get('/admin/metrics/watch_time_buffer')
+    assert response.status_code == 403
+
+    monkeypatch.setattr(APP_CONFIG, 'admin_token', 'secret-token')
+    response = client.get('/admin/metrics/watch_time_buffer', headers={'X-Admin-Token': 'wrong'})
+    assert response.status_code == 403
+
+    response = client.get('/admin/metrics/watch_time_buffer', headers={'X-Admin-Token': 'secret-token'})
+    assert response.status_code == 200
+    assert {'buffered_keys', 'flush_lag_seconds'} <= set(response.get_json())
+
+def test_retried_flush_stamps_write_time(app, buffer, monkeypatch):
+    """Test that deltas put back after a failed flush get the time of the write that succeeds"""
+    buffer.add([WatchTimeService.build_row('10001', 10101, 1, 5, 45)])
+
+    upsert = WatchTimeService.upsert
+    def fail_once(rows):
+        monkeypatch.setattr(WatchTimeService, 'upsert', upsert)
+        raise RuntimeError('database unavailable')
+    monkeypatch.setattr(WatchTimeService, 'upsert', fail_once)
+    assert buffer.flush() == 0
+
+    failed_at = datetime.utcnow()
+    assert buffer.flush() == 1
+    record = WatchingTime.query.one()
+    assert record.time_spent == 5
+    assert record.updated_at >= failed_at
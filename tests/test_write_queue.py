@@ -0,0 +1,90 @@
+"""
+Tests for the single-writer queue
+"""
+import json
+import threading
+import pytest
+from config import db
+from models import VideoInteraction, WatchingTime
+from write_queue import SerializedWriter, serialized_writer
+
+@pytest.fixture
+def writer(app, tmp_path):
+    """An enabled writer with its own lock file"""
+    writer = SerializedWriter(app, str(tmp_path / 'write.lock'), enabled=True, max_batch=64)
+    yield writer
+    writer.shutdown()
+
+def _hold(started, release):
+    """A write that keeps the writer busy until released"""
+    started.set()
+    return release.wait(5)
+
+def _log(video_id, action='like'):
+    db.session.add(VideoInteraction(participant_number='10001', video_id=video_id, action=action))
+    return video_id
+
+def test_queued_writes_share_one_transaction(app, writer):
+    """Test that writes queued behind a running commit are grouped into the next one"""
+    started, release = threading.Event(), threading.Event()
+    blocker = writer.submit(_hold, started, release)
+    started.wait(5)
+    futures = [writer.submit(_log, video_id) for video_id in (10101, 10102, 10103, 10104)]
+    release.set()
+
+    assert blocker.result(5) is True
+    assert [f.result(5) for f in futures] == [10101, 10102, 10103, 10104]
+    assert VideoInteraction.query.count() == 4
+
+    stats = writer.stats()
+    assert stats['transactions'] == 2
+    assert stats['writes'] == 5
+    assert stats['largest_group'] == 4
+
+def test_failed_write_only_fails_its_caller(app, writer):
+    """Test that a failing write is retried alone and the rest of its group still commits"""
+    def fail():
+        _log(10102)
+        raise ValueError('bad write')
+
+    started, release = threading.Event(), threading.Event()
+    writer.submit(_hold, started, release)
+    started.wait(5)
+    ok_before = writer.submit(_log, 10101)
+    failing = writer.submit(fail)
+    ok_after = writer.submit(_log, 10103)
+    release.set()
+
+    assert ok_before.result(5) == 10101
+    assert ok_after.result(5) == 10103
+    with pytest.raises(ValueError):
+        failing.result(5)
+    assert sorted(i.video_id for i in VideoInteraction.query.all()) == [10101, 10103]
+    assert writer.stats()['retried_groups'] == 1
+
+def test_disabled_writer_runs_inline(app, tmp_path):
+    """Test that a disabled writer leaves the write in the caller's transaction"""
+    writer = SerializedWriter(app, str(tmp_path / 'write.lock'), enabled=False, max_batch=64)
+
+    assert writer.run(_log, 10101) == 10101
+    assert writer.stats()['transactions'] == 0
+    db.session.rollback()
+    assert VideoInteraction.query.count() == 0
+
+def test_api_writes_go_through_writer_when_enabled(app, authenticated_client, monkeypatch):
+    """Test that watch time and interactions are committed by the writer thread"""
+    monkeypatch.setattr(serialized_writer, 'enabled', True)
+    try:
+        response = authenticated_client.post('/api/record_watch_time',
+            data=json.dumps({'video_id': 10101, 'watch_duration': 9, 'round_number': 1}),
+            content_type='application/json')
+        assert response.status_code == 200
+        response = authenticated_client.post('/api/user_interaction',
+            json={'video_id': 10101, 'action': 'like'})
+        assert response.status_code == 200
+    finally:
+        serialized_writer.shutdown()
+
+    assert WatchingTime.query.one().time_spent == 9
+    assert VideoInteraction.query.filter_by(action='like').count() == 1
+    assert serialized_writer.stats()['writes'] >= 2
@@ -1,8 +1,15 @@
 from functools import wraps
+import hmac
+import math
 from flask import session, flash, redirect, url_for, jsonify, current_app, request
-from config import db
-from models import Participant, Preference, Video, WatchingTime, VideoCategory
-import random
+from config import db, APP_CONFIG
+from models import Participant, Preference, VideoCategory
+from catalog import video_durations
+from write_queue import serialized_writer
+from db_routing import read_replica
+from query_inspector import FULL_SCAN_OPTION
+from services import (VideoSelectionService, PlaylistService, ParticipantNumberAllocator,
+                      WatchTimeService)
 
 # Group messages moved to utils for reusability
 GROUP_MESSAGES = {
@@ -31,13 +38,13 @@ def get_route_with_participant_check(required_message='未找到参与者信息
     return participant_number, None
 
 def generate_unique_participant_number():
-    """Generates a unique 5-digit participant number."""
-    MAX_ATTEMPTS = 500
-    for _ in range(MAX_ATTEMPTS):
-        number = str(random.randint(10000, 99999)).zfill(5)
-        if not Participant.query.get(number):
-            return number
-    raise ValueError("无法生成唯一的参与者编号。请稍后再试。")
+    """
+    Generates a unique 5-digit participant number.
+    The number is claimed atomically in the current transaction and is kept once it is committed.
+    """
+    number, remaining = ParticipantNumberAllocator.allocate()
+    current_app.logger.info(f"Allocated participant number {number} ({remaining} numbers remaining)")
+    return number
 
 def get_participant_or_redirect():
     """
@@ -58,6 +65,24 @@ def get_participant_or_redirect():
         
     return participant, None
 
+def admin_required(f):
+    """
+    Decorator for admin endpoints.
+    Requires the configured ADMIN_TOKEN in the X-Admin-Token header (or as a
+    bearer token, for scrapers); without a configured token every admin
+    endpoint is disabled.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        token = request.headers.get('X-Admin-Token', '')
+        authorization = request.headers.get('Authorization', '')
+        if not token and authorization.startswith('Bearer '):
+            token = authorization[len('Bearer '):]
+        if not APP_CONFIG.admin_token or not hmac.compare_digest(token, APP_CONFIG.admin_token):
+            return jsonify({'success': False, 'message': 'Forbidden'}), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
 def participant_required(f):
     """
     Decorator that checks for a valid participant in the session.
@@ -73,78 +98,17 @@ def participant_required(f):
         return f(participant, *args, **kwargs)
     return decorated_function
 
-def _query_videos_with_categories(category_names):
-    """Fetch all (Video, VideoCategory) tuples for the given category names."""
-    return db.session.query(Video, VideoCategory).join(
-        VideoCategory, Video.category_id == VideoCategory.id
-    ).filter(VideoCategory.name.in_(category_names)).all()
-
-def _get_watched_video_ids(participant_number, round_number):
-    """Return a set of video IDs watched by the participant in the given round."""
-    watched_video_ids = db.session.query(WatchingTime.video_id).filter(
-        WatchingTime.participant_number == participant_number,
-        WatchingTime.round_number == round_number
-    ).all()
-    return set(row[0] for row in watched_video_ids)
-
-def _exclude_watched_videos(videos_with_categories, watched_ids):
-    """Filter out videos whose IDs are in watched_ids."""
-    return [
-        (video, category)
-        for video, category in videos_with_categories
-        if video.id not in watched_ids
-    ]
-
-def _group_videos_by_category(videos_with_categories):
-    """Group videos by category name."""
-    videos_by_category = {}
-    for video, category in videos_with_categories:
-        videos_by_category.setdefault(category.name, []).append(video)
-    return videos_by_category
-
-def _limit_videos_per_category(videos_by_category, category_names, limit_per_category):
-    """For each category, select up to limit_per_category videos (randomly if needed)."""
-    result = {}
-    for category_name in category_names:
-        videos = videos_by_category.get(category_name, [])
-        if limit_per_category:
-            selected = random.sample(videos, min(limit_per_category, len(videos)))
-        else:
-            selected = videos
-        result[category_name] = selected
-    return result
-
 def get_videos_for_categories(category_names, participant_number=None, exclude_watched_round=None, limit_per_category=None):
     """
     Fetches videos for a given list of category names, with options to exclude watched videos and limit results.
     """
-    # Step 1: Query all videos for the categories
-    videos_with_categories = _query_videos_with_categories(category_names)
-
-    # Step 2: Exclude watched videos if needed
-    if participant_number and exclude_watched_round:
-        watched_ids = _get_watched_video_ids(participant_number, exclude_watched_round)
-        if watched_ids:
-            videos_with_categories = _exclude_watched_videos(videos_with_categories, watched_ids)
-
-    # Step 3: Group by category
-    videos_by_category = _group_videos_by_category(videos_with_categories)
-
-    # Step 4: Limit per category if needed
-    limited_videos = _limit_videos_per_category(videos_by_category, category_names, limit_per_category)
-
-    # Step 5: Assemble result
-    videos_data = []
-    for category_name in category_names:
-        for video in limited_videos.get(category_name, []):
-            videos_data.append({
-                'id': video.id,
-                'title': video.title,  # Add title field for backward compatibility
-                'link': video.url,
-                'category': category_name
-            })
-    random.shuffle(videos_data)
-    return videos_data
+    videos = VideoSelectionService.select_videos(
+        category_names,
+        participant_number=participant_number,
+        exclude_watched_round=exclude_watched_round,
+        limit_per_category=limit_per_category
+    )
+    return VideoSelectionService.serialize_videos(videos)
 
 def db_handler(f):
     """
@@ -198,12 +162,8 @@ def validate_category_selection(form_data, required_count=3):
 
     return None, selected_data
 
-@db_handler
-def save_preferences(participant_number, round_number, preferences_data):
-    """
-    Saves participant's category preferences for a given round.
-    This function is decorated with @db_handler to manage the session.
-    """
+def _replace_preferences(participant_number, round_number, preferences_data):
+    """Replace a round's preferences and playlist. Runs as one serialized write; the caller commits."""
     # Clear previous preferences for this round to handle resubmissions
     Preference.query.filter_by(
         participant_number=participant_number, 
@@ -220,11 +180,34 @@ def save_preferences(participant_number, round_number, preferences_data):
     ]
     
     db.session.bulk_save_objects(new_preferences)
+    playlist_size = PlaylistService.assign_playlist(
+        participant_number, round_number, [item['category_id'] for item in preferences_data]
+    )
     current_app.logger.info(
-        f"Saved {len(new_preferences)} preferences for participant {participant_number} in round {round_number}."
+        f"Saved {len(new_preferences)} preferences and a {playlist_size}-video playlist "
+        f"for participant {participant_number} in round {round_number}."
     )
+
+@db_handler
+def save_preferences(participant_number, round_number, preferences_data):
+    """
+    Saves participant's category preferences for a given round.
+    This function is decorated with @db_handler to manage the session.
+    """
+    serialized_writer.run(_replace_preferences, participant_number, round_number, preferences_data)
     return True # Indicate success
 
+def _get_video_duration(video_id):
+    """
+    Returns the duration used for percentage calculations, or None if the video does not exist.
+    Served from the in-memory index, so no catalog query is needed.
+    """
+    duration = video_durations.get(video_id)
+    if video_id == 9999 and duration == 0:
+        # The info video's row exists but has no duration: use the configured one
+        return APP_CONFIG.info_video_duration
+    return duration
+
 @db_handler
 def record_watch_time(participant_number, video_id, watch_duration, round_number, current_position=None):
     """
@@ -243,68 +226,98 @@ def record_watch_time(participant_number, video_id, watch_duration, round_number
     if not participant_number or not video_id or watch_duration is None or round_number is None:
         return False, "Missing required parameters"
     
-    # Calculate percentage watched based on video type
-    percentage_watched = None
-    INFO_VIDEO_DURATION = 228  # Hardcoded duration for info video (ID 9999)
-    
-    if video_id == 9999:  
-        # For info video, use hardcoded duration
-        if watch_duration > 0:
-            percentage_watched = min((watch_duration / INFO_VIDEO_DURATION) * 100, 100)
-    else:
-        # For regular videos
-        video = Video.query.get(video_id)
-        if not video:
-            return False, "Video not found"
-            
-        if video.duration and video.duration > 0:
-            percentage_watched = min((watch_duration / video.duration) * 100, 100)
-    
-    # Check if an entry already exists for this participant, video, and round
-    existing_record = WatchingTime.query.filter_by(
-        participant_number=participant_number,
-        video_id=video_id,
-        round_number=round_number
-    ).first()
-    
+    # Resolve the duration used for the percentage calculation
+    video_duration = _get_video_duration(video_id)
+    if video_duration is None:
+        return False, "Video not found"
+
+    # Insert the record, or atomically add to an existing one for this participant, video, and round
+    WatchTimeService.record([WatchTimeService.build_row(
+        participant_number, video_id, round_number, watch_duration, video_duration
+    )])
+
     position_info = f", Position: {current_position}s" if current_position is not None else ""
+    current_app.logger.info(f"Recorded Watch Time: Participant {participant_number}, Video {video_id}, "
+                          f"Round {round_number}, Time Spent +{watch_duration} seconds{position_info}")
     
-    if existing_record:
-        # Update existing record
-        existing_record.time_spent += watch_duration
-        
-        # Update percentage watched based on video type
-        if video_id == 9999:
-            if existing_record.time_spent > 0:
-                existing_record.percentage_watched = min((existing_record.time_spent / INFO_VIDEO_DURATION) * 100, 100)
-        else:
-            if video.duration and video.duration > 0:
-                existing_record.percentage_watched = min((existing_record.time_spent / video.duration) * 100, 100)
-        
-        # Format percentage for logging
-        percentage_str = f"{existing_record.percentage_watched:.1f}" if existing_record.percentage_watched is not None else "N/A"
-        
-        current_app.logger.info(f"Updated Watch Time: Participant {participant_number}, Video {video_id}, "
-                              f"Round {round_number}, Total Time Spent {existing_record.time_spent} seconds, "
-                              f"Percentage {percentage_str}%{position_info}")
-    else:
-        # Create a new record
-        new_record = WatchingTime(
-            participant_number=participant_number,
-            video_id=video_id,
-            round_number=round_number,
-            time_spent=watch_duration,
-            percentage_watched=percentage_watched
-        )
-        db.session.add(new_record)
-        
-        # Format percentage for logging
-        percentage_str = f"{percentage_watched:.1f}" if percentage_watched is not None else "N/A"
-        
-        current_app.logger.info(f"New Watch Time Record: Participant {participant_number}, Video {video_id}, "
-                              f"Round {round_number}, Time Spent {watch_duration} seconds, "
-                              f"Percentage {percentage_str}%{position_info}")
+    return True, "Watch time recorded successfully"
+
+
+def validate_watch_time_entries(entries, max_entries):
+    """
+    Validates a batch of watch-time deltas from the player.
+    Returns (error_message, None) on failure, and (None, cleaned_entries) on success.
+    """
+    if not isinstance(entries, list) or not entries:
+        return "entries must be a non-empty list", None
+    if len(entries) > max_entries:
+        return f"At most {max_entries} entries are allowed per batch", None
+
+    cleaned = []
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            return f"Entry {index} must be an object", None
+        try:
+            video_id = int(entry['video_id'])
+            watch_duration = float(entry['watch_duration'])
+            round_number = int(entry['round_number'])
+        except (KeyError, TypeError, ValueError):
+            return f"Entry {index} needs numeric video_id, watch_duration and round_number", None
+        # float() accepts NaN and Infinity, which would poison the stored totals
+        if not math.isfinite(watch_duration) or watch_duration < 0:
+            return f"Entry {index} needs a finite, non-negative watch_duration", None
+        if round_number not in (1, 2):
+            return f"Entry {index} has an invalid round_number", None
+        cleaned.append({
+            'video_id': video_id,
+            'watch_duration': watch_duration,
+            'round_number': round_number,
+            'current_position': entry.get('current_position')
+        })
+    return None, cleaned
+
+
+@db_handler
+def rejected_watch_time_entries(entries):
+    """
+    Indexes of the entries in a rejected batch that can never be recorded,
+    so the player can drop just those and retry the rest.
+    """
+    if not isinstance(entries, list):
+        return []
+    rejected = []
+    for index, entry in enumerate(entries):
+        validation_error, cleaned = validate_watch_time_entries([entry], 1)
+        if validation_error or _get_video_duration(cleaned[0]['video_id']) is None:
+            rejected.append(index)
+    return rejected
+
+
+def record_watch_time_batch(participant_number, entries):
+    """
+    Records a validated batch of watch-time deltas in one transaction.
+    Deltas for the same video and round are summed first, and every video is
+    checked before anything is written, so a batch is applied entirely or not at all.
     
+    Returns:
+        tuple: (success boolean, message string)
+    """
+    totals = {}
+    for entry in entries:
+        key = (entry['video_id'], entry['round_number'])
+        totals[key] = totals.get(key, 0) + entry['watch_duration']
+
+    durations = {video_id: _get_video_duration(video_id) for video_id, _ in totals}
+    missing = sorted(video_id for video_id, duration in durations.items() if duration is None)
+    if missing:
+        return False, f"Video not found: {', '.join(str(video_id) for video_id in missing)}"
+
+    WatchTimeService.record([
+        WatchTimeService.build_row(participant_number, video_id, round_number, watch_duration, durations[video_id])
+        for (video_id, round_number), watch_duration in totals.items()
+    ])
+    current_app.logger.info(f"Recorded Watch Time Batch: Participant {participant_number}, "
+                          f"{len(entries)} entries merged into {len(totals)} records")
     return True, "Watch time recorded successfully"
 
 
@@ -314,9 +327,12 @@ def validate_group_number(group_number):
 
 
 def get_categories_excluding_info():
-    """Get all video categories except 'info'."""
+    """Get all video categories except 'info'. Served from the read replica when one is configured."""
     from models import VideoCategory
-    return VideoCategory.query.filter(VideoCategory.name != 'info').all()
+    with read_replica():
+        return VideoCategory.query.filter(VideoCategory.name != 'info').execution_options(
+            **{FULL_SCAN_OPTION: True}
+        ).all()
 
 
 def create_json_response(success=True, message="", data=None, status_code=200):
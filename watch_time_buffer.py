@@ -0,0 +1,167 @@
+"""
+Per-worker write-behind buffer for watch-time heartbeats.
+Sums watch-time deltas in memory and writes them to the database in bulk from
+a background thread, keeping database latency off the request path.
+"""
+import atexit
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import APP_CONFIG, app, db
+from write_queue import serialized_writer
+
+
+class WatchTimeBuffer:
+    """
+    In-memory aggregation of watch-time deltas keyed by (participant, video, round).
+
+    Deltas are flushed every `flush_interval` seconds, as soon as `max_keys`
+    distinct keys are pending, and once more when the worker exits. At most
+    one flush interval of heartbeats can be lost if a worker is killed hard.
+    """
+
+    def __init__(self, flask_app, flush_interval: float, max_keys: int):
+        self._app = flask_app
+        self._flush_interval = flush_interval
+        self._max_keys = max_keys
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending: Dict[Tuple[str, int, int], Dict[str, Any]] = {}
+        self._oldest_pending: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._owner_pid: Optional[int] = None
+        self._stopped = False
+
+        self._flushes = 0
+        self._flush_failures = 0
+        self._rows_flushed = 0
+        self._last_flush_at: Optional[float] = None
+        self._last_flush_seconds = 0.0
+
+    def _ensure_worker(self) -> None:
+        """Start the flusher thread in the current process (threads do not survive fork)."""
+        pid = os.getpid()
+        if self._owner_pid == pid and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._owner_pid != pid or self._thread is None or not self._thread.is_alive():
+                if self._owner_pid != pid:
+                    # Deltas inherited from the parent process belong to the parent
+                    self._pending = {}
+                    self._oldest_pending = None
+                self._owner_pid = pid
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, name='watch-time-flusher', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self._flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def _merge(self, rows: List[Dict[str, Any]]) -> None:
+        """Add rows into the pending map. Must be called with the lock held."""
+        for row in rows:
+            key = (row['participant_number'], row['video_id'], row['round_number'])
+            pending = self._pending.get(key)
+            if pending is None:
+                self._pending[key] = dict(row)
+            else:
+                pending['time_spent'] += row['time_spent']
+                pending['timestamp'] = row['timestamp']
+                pending['video_duration'] = row['video_duration']
+        if self._pending and self._oldest_pending is None:
+            self._oldest_pending = time.monotonic()
+
+    def add(self, rows: List[Dict[str, Any]]) -> None:
+        """Buffer watch-time rows built with `WatchTimeService.build_row`."""
+        self._ensure_worker()
+        with self._lock:
+            self._merge(rows)
+            full = len(self._pending) >= self._max_keys
+        if full:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Write every pending delta to the database. Returns the number of rows written."""
+        from services import WatchTimeService
+
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                oldest, self._oldest_pending = self._oldest_pending, None
+            if not pending:
+                return 0
+
+            rows = []
+            for row in pending.values():
+                row['percentage_watched'] = WatchTimeService.compute_percentage(
+                    row['time_spent'], row['video_duration']
+                )
+                rows.append(row)
+
+            started = time.monotonic()
+            try:
+                if serialized_writer.enabled:
+                    serialized_writer.run(WatchTimeService.upsert, rows)
+                else:
+                    with self._app.app_context():
+                        try:
+                            WatchTimeService.upsert(rows)
+                            db.session.commit()
+                        except Exception:
+                            db.session.rollback()
+                            raise
+                        finally:
+                            db.session.remove()
+            except Exception as e:
+                with self._lock:
+                    # Put the deltas back so the next flush retries them
+                    self._merge(rows)
+                    if oldest is not None:
+                        self._oldest_pending = min(self._oldest_pending or oldest, oldest)
+                    self._flush_failures += 1
+                self._app.logger.error(f"Watch time buffer flush failed for {len(rows)} rows: {str(e)}")
+                return 0
+
+            self._flushes += 1
+            self._rows_flushed += len(rows)
+            self._last_flush_at = time.time()
+            self._last_flush_seconds = time.monotonic() - started
+            return len(rows)
+
+    def stats(self) -> Dict[str, Any]:
+        """Buffer size and flush lag for monitoring."""
+        with self._lock:
+            buffered_keys = len(self._pending)
+            buffered_seconds = sum(row['time_spent'] for row in self._pending.values())
+            oldest = self._oldest_pending
+        return {
+            'buffered_keys': buffered_keys,
+            'buffered_watch_seconds': buffered_seconds,
+            'flush_lag_seconds': time.monotonic() - oldest if oldest is not None else 0.0,
+            'flushes': self._flushes,
+            'flush_failures': self._flush_failures,
+            'rows_flushed': self._rows_flushed,
+            'last_flush_at': self._last_flush_at,
+            'last_flush_seconds': self._last_flush_seconds,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the flusher thread and write whatever is still buffered."""
+        self._stopped = True
+        self._wake.set()
+        if self._owner_pid == os.getpid():
+            self.flush()
+
+
+watch_time_buffer = WatchTimeBuffer(
+    app,
+    flush_interval=APP_CONFIG.watch_time_flush_interval,
+    max_keys=APP_CONFIG.watch_time_buffer_max_keys
+)
+atexit.register(watch_time_buffer.shutdown)
@@ -0,0 +1,183 @@
+"""
+Optional single-writer queue for SQLite deployments.
+Sends database writes through one writer thread per worker process, commits
+whatever has queued up in one shared transaction, and holds a file lock
+around each transaction so only one process writes at a time.
+"""
+import atexit
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines: only in-process serialization
+    fcntl = None
+
+from config import APP_CONFIG, app, db
+
+Job = Tuple[Future, Callable, tuple, dict]
+
+
+class SerializedWriter:
+    """
+    Runs write functions on a dedicated writer thread and returns futures.
+
+    Write functions use `db.session` as usual and must not commit; the writer
+    commits up to `max_batch` queued writes together, so concurrent requests
+    share one lock acquisition and one fsync. If any write in a group fails,
+    the group is rolled back and each write is retried in its own transaction,
+    so only the failing caller sees the exception.
+
+    When disabled, `submit` runs the function inline in the caller's session
+    and the caller commits as before.
+    """
+
+    def __init__(self, flask_app, lock_path: str, enabled: bool, max_batch: int):
+        self._app = flask_app
+        self._lock_path = lock_path
+        self.enabled = enabled
+        self._max_batch = max_batch
+        self._queue: 'queue.Queue[Optional[Job]]' = queue.Queue()
+        self._start_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._owner_pid: Optional[int] = None
+        self._lock_fd: Optional[int] = None
+
+        self._transactions = 0
+        self._writes = 0
+        self._retried_groups = 0
+        self._largest_group = 0
+
+    def _ensure_worker(self) -> None:
+        """Start the writer thread in the current process (threads do not survive fork)."""
+        pid = os.getpid()
+        if self._owner_pid == pid and self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._owner_pid != pid or self._thread is None or not self._thread.is_alive():
+                if self._owner_pid != pid:
+                    # Jobs inherited from the parent process belong to the parent
+                    self._queue = queue.Queue()
+                    self._lock_fd = None
+                if fcntl is not None and self._lock_fd is None:
+                    os.makedirs(os.path.dirname(self._lock_path) or '.', exist_ok=True)
+                    self._lock_fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+                self._owner_pid = pid
+                self._thread = threading.Thread(target=self._run, name='serialized-writer', daemon=True)
+                self._thread.start()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Queue `fn(*args, **kwargs)` as a write. The future resolves once it is committed."""
+        future = Future()
+        if not self.enabled:
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        self._ensure_worker()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Submit a write and wait for its result, re-raising its exception."""
+        return self.submit(fn, *args, **kwargs).result()
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            group = [job]
+            # Everything that queued up during the previous commit goes into this one
+            while len(group) < self._max_batch:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    self._execute(group)
+                    return
+                group.append(job)
+            self._execute(group)
+
+    @contextmanager
+    def _process_lock(self):
+        """Exclusive lock shared by every worker process writing to the same database."""
+        if self._lock_fd is None:
+            yield
+            return
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _execute(self, group: List[Job]) -> None:
+        group = [job for job in group if job[0].set_running_or_notify_cancel()]
+        if not group:
+            return
+        self._largest_group = max(self._largest_group, len(group))
+        with self._app.app_context():
+            try:
+                if not self._commit(group) and len(group) > 1:
+                    self._retried_groups += 1
+                    for job in group:
+                        self._commit([job])
+            finally:
+                db.session.remove()
+
+    def _commit(self, group: List[Job]) -> bool:
+        """
+        Run the jobs in one transaction and resolve their futures.
+        Returns False if the transaction failed; only a lone job is then given the exception.
+        """
+        try:
+            with self._process_lock():
+                results = [fn(*args, **kwargs) for _, fn, args, kwargs in group]
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            if len(group) == 1:
+                group[0][0].set_exception(e)
+            return False
+
+        self._transactions += 1
+        self._writes += len(group)
+        for (future, *_), result in zip(group, results):
+            future.set_result(result)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and grouping counters for monitoring."""
+        return {
+            'enabled': self.enabled,
+            'queued_writes': self._queue.qsize(),
+            'transactions': self._transactions,
+            'writes': self._writes,
+            'writes_per_transaction': self._writes / self._transactions if self._transactions else 0.0,
+            'largest_group': self._largest_group,
+            'retried_groups': self._retried_groups,
+        }
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Let the writer thread finish the queued writes and stop."""
+        thread = self._thread
+        if thread is None or self._owner_pid != os.getpid() or not thread.is_alive():
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+
+
+serialized_writer = SerializedWriter(
+    app,
+    lock_path=APP_CONFIG.write_lock_file,
+    enabled=APP_CONFIG.serialized_writes,
+    max_batch=APP_CONFIG.write_queue_max_batch
+)
+atexit.register(serialized_writer.shutdown)